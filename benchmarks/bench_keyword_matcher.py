@@ -0,0 +1,112 @@
+# -*- coding: utf-8 -*-
+"""
+키워드 검출 벤치마크: 기존 `keyword in msg_lower` 반복 스캔 vs Aho-Corasick 오토마톤.
+
+실행: python benchmarks/bench_keyword_matcher.py [--rounds 200]
+chat_log.txt 의 사용자 메시지와 샘플 질문을 사용하며, 두 방식의 판단 결과가
+같은지도 함께 검증합니다.
+"""
+import argparse
+import logging
+import os
+import re
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+logging.disable(logging.CRITICAL)
+
+import flask_app  # noqa: E402
+
+SAMPLE_MESSAGES = [
+    "500 mango soaps how much",
+    "망고 비누 가격 알려줘",
+    "สบู่มะม่วงราคาเท่าไหร่",
+    "ラベンダーのバスボムはありますか",
+    "薰衣草香皂多少钱",
+    "tell me more about the jasmine soap",
+    "자세히 설명해 주세요",
+    "where is your shop?",
+    "do you ship abroad?",
+    "prix du savon à la lavande",
+]
+
+
+def load_log_messages(path: str):
+    """chat_log.txt 에서 사용자 메시지만 추출"""
+    messages = []
+    if not os.path.exists(path):
+        return messages
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            match = re.match(r'^(?:User|사용자)(?: \([^)]*\))?(?: \[[^\]]*\])?:\s*(.+)$', line.strip())
+            if match:
+                messages.append(match.group(1))
+    return messages
+
+
+def naive_scan(message: str):
+    """기존 방식: 카테고리/키워드마다 부분 문자열 검사"""
+    msg_lower = message.lower()
+    intents = flask_app.INTENT_KEYWORDS
+    has_product = any(k in msg_lower for k in intents['product_names'])
+    has_search = any(k in msg_lower for k in intents['purchase_intent'] + intents['list_intent'])
+    is_feature = any(k in msg_lower for k in intents['feature_intent'])
+    is_price = any(k in msg_lower for k in intents['purchase_intent'])
+    is_list = any(k in msg_lower for k in intents['list_intent'])
+    more_info = any(k.lower() in msg_lower for kws in flask_app.MORE_INFO_KEYWORDS.values() for k in kws)
+    translated = msg_lower
+    for local_name, english_name in flask_app.PRODUCT_NAME_MAPPING.items():
+        if local_name.lower() in msg_lower:
+            translated = translated.replace(local_name.lower(), english_name)
+    return has_product, has_search, is_feature, is_price, is_list, more_info, translated
+
+
+def automaton_scan(message: str):
+    """새 방식: 오토마톤 한 번 스캔"""
+    hits = flask_app.scan_keywords(message)
+    return (
+        hits.has('product_names'),
+        hits.has('purchase_intent', 'list_intent'),
+        hits.has('feature_intent'),
+        hits.has('purchase_intent'),
+        hits.has('list_intent'),
+        hits.has('more_info'),
+        flask_app.message_analyzer.translate_product_names(message.lower(), hits),
+    )
+
+
+def bench(func, messages, rounds):
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for message in messages:
+            func(message)
+    elapsed = time.perf_counter() - start
+    return elapsed, rounds * len(messages) / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="키워드 검출 벤치마크")
+    parser.add_argument("--rounds", type=int, default=200)
+    args = parser.parse_args()
+
+    messages = load_log_messages(os.path.join(ROOT, "chat_log.txt")) + SAMPLE_MESSAGES
+    mismatches = [m for m in messages if naive_scan(m) != automaton_scan(m)]
+
+    flask_app.logger.disabled = True
+    naive_time, naive_rate = bench(naive_scan, messages, args.rounds)
+    ac_time, ac_rate = bench(automaton_scan, messages, args.rounds)
+
+    print(f"messages: {len(messages)}  rounds: {args.rounds}  automaton: {flask_app.KEYWORD_MATCHER.stats()}")
+    print(f"naive scans   : {naive_time:8.3f}s  {naive_rate:10.0f} msg/s")
+    print(f"aho-corasick  : {ac_time:8.3f}s  {ac_rate:10.0f} msg/s  (x{naive_time / ac_time:.1f})")
+    print(f"decision mismatches: {len(mismatches)}")
+    for message in mismatches:
+        print(f"  - {message}")
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,121 @@
+# -*- coding: utf-8 -*-
+"""
+언어 감지 정확도/처리량 비교: 기존 re.search 연쇄 vs LanguageDetector.
+
+실행: python benchmarks/bench_language_detector.py [--rounds 2000] [--show-errors] [--sweep]
+- 정확도: language_samples.EVAL_SAMPLES (학습 문장과 별도)
+- 안정성: chat_log.txt 사용자 메시지 중 기존 감지와 결과가 달라진 메시지 목록
+- 처리량: 평가 표본 + 로그 메시지를 rounds 번 반복 감지
+"""
+import argparse
+import os
+import re
+import sys
+import time
+from collections import Counter
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import language_detector  # noqa: E402
+from bench_keyword_matcher import load_log_messages  # noqa: E402
+from language_detector import LanguageDetector  # noqa: E402
+from language_samples import EVAL_SAMPLES  # noqa: E402
+
+
+def legacy_detect(message: str) -> str:
+    """기존 flask_app.detect_user_language 와 같은 규칙"""
+    if re.search(r'[฀-๿]+', message): return 'thai'
+    elif re.search(r'[가-힯]+', message): return 'korean'
+    elif re.search(r'[぀-ゟ゠-ヿ]+', message): return 'japanese'
+    elif re.search(r'[一-鿿]+', message):
+        return 'japanese' if re.search(r'[぀-ゟ゠-ヿ]', message) else 'chinese'
+    elif re.search(r'[؀-ۿ]+', message): return 'arabic'
+    elif re.search(r'[ЁёА-я]+', message): return 'russian'
+    elif re.search(r'[àâäéèêëïîôùûüÿç]+', message.lower()): return 'french'
+    elif re.search(r'[àáâãçéêíóôõú]+', message.lower()): return 'spanish'
+    elif re.search(r'[äöüß]+', message.lower()): return 'german'
+    elif re.search(r'[ăâđêôơưàáảãạèéẻẽẹìíỉĩịòóỏõọùúủũụ]+', message.lower()): return 'vietnamese'
+    return 'english'
+
+
+def accuracy(detect, samples):
+    per_language = Counter()
+    correct = Counter()
+    errors = []
+    for message, expected in samples:
+        per_language[expected] += 1
+        got = detect(message)
+        if got == expected:
+            correct[expected] += 1
+        else:
+            errors.append((message, expected, got))
+    return per_language, correct, errors
+
+
+def report_accuracy(label, detect, samples, show_errors):
+    per_language, correct, errors = accuracy(detect, samples)
+    total = sum(per_language.values())
+    breakdown = "  ".join(f"{lang[:3]}={correct[lang]}/{count}" for lang, count in sorted(per_language.items()))
+    print(f"{label:<18} {sum(correct.values()):>3}/{total} ({sum(correct.values()) / total:.0%})  {breakdown}")
+    if show_errors:
+        for message, expected, got in errors:
+            print(f"    ✗ {expected:>10} → {got:<10} {message}")
+    return sum(correct.values()) / total
+
+
+def throughput(label, detect, messages, rounds):
+    started = time.perf_counter()
+    for _ in range(rounds):
+        for message in messages:
+            detect(message)
+    elapsed = time.perf_counter() - started
+    calls = rounds * len(messages)
+    print(f"{label:<18} {calls / elapsed:>10,.0f} msg/s  ({elapsed / calls * 1e6:.2f}µs/msg)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="language detector benchmark")
+    parser.add_argument("--rounds", type=int, default=2000)
+    parser.add_argument("--log", default=os.path.join(ROOT, "chat_log.txt"))
+    parser.add_argument("--show-errors", action="store_true")
+    parser.add_argument("--sweep", action="store_true", help="MIN_MARGIN 값별 정확도")
+    args = parser.parse_args()
+
+    detector = LanguageDetector()
+    log_messages = load_log_messages(args.log)
+
+    print(f"== 정확도 (평가 표본 {len(EVAL_SAMPLES)}개) ==")
+    report_accuracy("re.search (기존)", legacy_detect, EVAL_SAMPLES, args.show_errors)
+    report_accuracy("LanguageDetector", detector.detect, EVAL_SAMPLES, args.show_errors)
+
+    if args.sweep:
+        print("\n== MIN_MARGIN 별 정확도 ==")
+        original = language_detector.MIN_MARGIN
+        for margin in (0.0, 0.1, 0.2, 0.3, 0.35, 0.4, 0.5, 0.7, 1.0):
+            language_detector.MIN_MARGIN = margin
+            ratio = accuracy(detector.detect, EVAL_SAMPLES)
+            print(f"  {margin:.2f}: {sum(ratio[1].values())}/{len(EVAL_SAMPLES)}")
+        language_detector.MIN_MARGIN = original
+
+    changed = [(m, legacy_detect(m), detector.detect(m)) for m in log_messages if legacy_detect(m) != detector.detect(m)]
+    print(f"\n== chat_log.txt 메시지 {len(log_messages)}개 중 결과가 달라진 메시지: {len(changed)}개 ==")
+    for message, old, new in changed:
+        print(f"    {old} → {new}: {message}")
+
+    messages = [message for message, _ in EVAL_SAMPLES] + log_messages
+    groups = {
+        "전체": messages,
+        "ASCII": [m for m in messages if m.isascii()],
+        "라틴 확장": [m for m in messages if not m.isascii() and 'latin_ext' in detector.scripts(m)
+                  and detector.detect(m) in detector.latin_languages],
+        "비라틴": [m for m in messages if detector.detect(m) not in detector.latin_languages],
+    }
+    for name, group in groups.items():
+        print(f"\n== 처리량: {name} ({len(group)}개 메시지 × {args.rounds}회) ==")
+        throughput("re.search (기존)", legacy_detect, group, args.rounds)
+        throughput("LanguageDetector", detector.detect, group, args.rounds)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+# -*- coding: utf-8 -*-
+"""
+LINE 답장 전송 지연 비교: 호출마다 requests.post (기존) vs 공용 LineClient 세션.
+
+실행: python benchmarks/bench_line_client.py [--calls 200] [--threads 4] [--connect-delay-ms 60] [--latency-ms 10]
+가짜 LINE 서버(fake_line_server.py)를 띄우고, 새 연결마다 --connect-delay-ms 만큼
+지연을 주어 TLS 핸드셰이크 비용을 흉내 냅니다.
+"""
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from fake_line_server import start_fake_line_server  # noqa: E402
+from line_client import LineClient  # noqa: E402
+
+
+def percentile(samples, ratio):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(ratio * (len(ordered) - 1))))]
+
+
+def naive_reply(base_url: str, reply_token: str, text: str) -> bool:
+    """기존 send_line_message 와 같은 방식 (세션 없이 매번 새 연결)"""
+    response = requests.post(
+        f"{base_url}/v2/bot/message/reply",
+        headers={"Content-Type": "application/json", "Authorization": "Bearer test"},
+        json={"replyToken": reply_token, "messages": [{"type": "text", "text": text}]}, timeout=10
+    )
+    return response.status_code == 200
+
+
+def run(label, send, calls, threads):
+    latencies = []
+
+    def one(number):
+        started = time.perf_counter()
+        ok = send(f"token-{number}", f"message {number}")
+        latencies.append(time.perf_counter() - started)
+        return ok
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        results = list(pool.map(one, range(calls)))
+    elapsed = time.perf_counter() - started
+    print(f"{label:<22} ok={sum(results):>4}/{calls}  avg={sum(latencies) / len(latencies) * 1000:7.1f}ms  "
+          f"p50={percentile(latencies, 0.5) * 1000:7.1f}ms  p95={percentile(latencies, 0.95) * 1000:7.1f}ms  "
+          f"total={elapsed:6.2f}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="LINE client latency comparison")
+    parser.add_argument("--calls", type=int, default=200)
+    parser.add_argument("--threads", type=int, default=4)
+    parser.add_argument("--latency-ms", type=float, default=10.0)
+    parser.add_argument("--connect-delay-ms", type=float, default=60.0)
+    args = parser.parse_args()
+
+    server, state = start_fake_line_server(0, args.latency_ms, args.connect_delay_ms)
+    base_url = f"http://127.0.0.1:{server.server_port}"
+    print(f"fake LINE API {base_url} (요청 지연 {args.latency_ms}ms, 새 연결 지연 {args.connect_delay_ms}ms)\n")
+
+    before = state.counts["connections"]
+    run("requests.post (기존)", lambda token, text: naive_reply(base_url, token, text), args.calls, args.threads)
+    naive_connections = state.counts["connections"] - before
+
+    client = LineClient("test", base_url=base_url, pool_size=args.threads)
+    before = state.counts["connections"]
+    run("LineClient (세션 풀)", client.reply, args.calls, args.threads)
+    pooled_connections = state.counts["connections"] - before
+
+    print(f"\n새 연결 수: 기존 {naive_connections}개 → 세션 풀 {pooled_connections}개")
+    client.close()
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
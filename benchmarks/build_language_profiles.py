@@ -0,0 +1,58 @@
+# -*- coding: utf-8 -*-
+"""
+라틴 문자 언어 감지용 3-gram 프로필(language_profiles.json) 생성.
+
+실행: python benchmarks/build_language_profiles.py [--top 600]
+company_info/company_info_{en,fr,de,vi}.txt 와 language_samples.SEED_TEXTS 를 학습 텍스트로 사용합니다.
+(스페인어는 회사 정보 파일이 없어 SEED_TEXTS 만 사용)
+"""
+import argparse
+import json
+import os
+import re
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from language_detector import PROFILE_PATH, build_profiles  # noqa: E402
+from language_samples import SEED_TEXTS  # noqa: E402
+
+COMPANY_INFO_FILES = {
+    'english': 'company_info_en.txt',
+    'french': 'company_info_fr.txt',
+    'german': 'company_info_de.txt',
+    'vietnamese': 'company_info_vi.txt',
+}
+# 언어와 무관한 부분(링크, 브랜드명, 마크다운 표시)은 학습에서 제외
+NOISE_PATTERN = re.compile(r'https?://\S+|www\.\S+|\S+@\S+|saboo|thailand|\*\*|#+', re.IGNORECASE)
+
+
+def load_training_texts():
+    texts = {}
+    for language, seed in SEED_TEXTS.items():
+        parts = [seed]
+        filename = COMPANY_INFO_FILES.get(language)
+        if filename:
+            with open(os.path.join(ROOT, 'company_info', filename), 'r', encoding='utf-8') as f:
+                parts.append(f.read())
+        texts[language] = NOISE_PATTERN.sub(' ', '\n'.join(parts))
+    return texts
+
+
+def main():
+    parser = argparse.ArgumentParser(description="build Latin-script language profiles")
+    parser.add_argument("--top", type=int, default=600, help="언어별로 남길 3-gram 수")
+    parser.add_argument("--output", default=PROFILE_PATH)
+    args = parser.parse_args()
+
+    profiles = build_profiles(load_training_texts(), top=args.top)
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(profiles, f, ensure_ascii=False, sort_keys=True, separators=(',', ':'))
+    size = os.path.getsize(args.output)
+    counts = ', '.join(f"{language} {len(profile['grams'])}" for language, profile in profiles.items())
+    print(f"🗂️ {args.output}: {counts} ({size / 1024:.1f} KB)")
+
+
+if __name__ == "__main__":
+    main()
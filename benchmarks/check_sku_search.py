@@ -0,0 +1,54 @@
+# -*- coding: utf-8 -*-
+"""
+SKU 단위 제품 검색(get_product_info) 회귀 확인.
+
+실행: python benchmarks/check_sku_search.py
+질문마다 답변에 반드시 나와야 할 / 나오면 안 되는 문자열을 확인하고, 하나라도 틀리면 종료 코드 1.
+"""
+import logging
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+logging.disable(logging.CRITICAL)
+
+import flask_app  # noqa: E402
+
+# (질문, 답변에 있어야 할 문자열, 답변에 없어야 할 문자열). 답변이 None 이면 일반 GPT 응답으로 넘긴 것
+CASES = [
+    # 최상위 파일의 모든 줄에 'elephant' 가 있어도 그 파일이 빠지면 안 됨
+    ("elephant bath bomb", ["**Bubble Bathbomb Elephant 150g**", "STRAWBERRY BUBBLE BATH BOMB ELEPHANT 150G"], []),
+    # 'show', 'me', 'your' 같은 요청 표현이 MELON/MERMAID 같은 줄에 부분 일치하면 안 됨
+    ("show me your bath bomb list", [], ["MERMAID KISS", "MERCURY FIZZY"]),
+    ("mango soap price", ["MANGO SQUARE SOAP 100G"], ["MANGOSTEEN"]),
+    # 제품군만 묻는 질문도 일반 응답(가격 정보 없음)으로 넘기지 말고 그 제품군 파일의 줄을 일부 반환
+    ("perfume price", ["EAU DE PARFUM 25ML - Retail", "…and 10 more"], []),
+    ("비누 가격", ["Baht"], []),
+    ("bath bomb", ["BUBBLE BATH BOMB"], []),
+]
+
+
+def main():
+    flask_app.initialize_data()
+    failures = 0
+    for query, required, forbidden in CASES:
+        analysis = flask_app.analyze_message(query)
+        answer = flask_app.get_product_info(query, analysis.language, analysis=analysis) or ""
+        missing = [text for text in required if text not in answer]
+        unexpected = [text for text in forbidden if text in answer]
+        ok = not missing and not unexpected
+        failures += not ok
+        print(f"{'✅' if ok else '❌'} {query}")
+        for text in missing:
+            print(f"    빠짐: {text}")
+        for text in unexpected:
+            print(f"    있으면 안 됨: {text}")
+    print(f"\n{len(CASES) - failures}/{len(CASES)} 통과")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,190 @@
+# -*- coding: utf-8 -*-
+"""
+유사 질문 캐시(semantic_cache) 오프라인 평가.
+
+실행: python benchmarks/eval_semantic_cache.py [--log chat_log.txt] [--variants 3] [--sweep]
+
+1. chat_log.txt 의 사용자 질문을 순서대로 재생합니다. 캐시에 없으면 저장하고,
+   다른 질문의 답으로 적중하면 '다른 질문 적중'으로 집계해 목록을 출력합니다 (직접 확인용).
+2. 각 질문에 오타(글자 누락/중복/인접 교환) 변형을 만들어 조회합니다.
+   원래 질문의 답으로 적중하면 정답 적중, 다른 질문의 답이면 오답 적중(false hit)입니다.
+3. 샘플 FAQ 의 바꿔 말하기(적중해야 함)와 비슷하지만 다른 질문(적중하면 안 됨) 쌍을 평가합니다.
+"""
+import argparse
+import logging
+import os
+import random
+import sys
+from collections import defaultdict
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+logging.disable(logging.CRITICAL)
+
+from bench_keyword_matcher import load_log_messages  # noqa: E402
+import flask_app  # noqa: E402
+from semantic_cache import SemanticCache  # noqa: E402
+
+# (저장된 질문, 바꿔 말한 질문) - 같은 답을 재사용해도 되는 쌍
+PARAPHRASE_PAIRS = [
+    ("where is your shop?", "where is you shop"),
+    ("where is your shop?", "where's your shop located?"),
+    ("do you ship abroad?", "do you ship abroad"),
+    ("do you ship abroad?", "do u ship abroad?"),
+    ("what are your opening hours?", "what are your openning hours"),
+    ("매장 어디에 있어요?", "매장 어디 있어요?"),
+    ("매장 어디에 있어요?", "매장이 어디에 있어요"),
+    ("해외 배송 되나요?", "해외배송 되나요?"),
+    ("ร้านอยู่ที่ไหนคะ", "ร้านอยู่ที่ไหนครับ"),
+    ("ส่งต่างประเทศได้ไหม", "ส่งต่างประเทศได้มั้ย"),
+    ("お店はどこですか？", "お店はどこにありますか？"),
+    ("你们的店在哪里？", "你们店在哪里"),
+]
+
+# (저장된 질문, 비슷해 보이지만 다른 답이 필요한 질문) - 적중하면 오답
+NEGATIVE_PAIRS = [
+    ("do you ship to japan?", "do you ship to korea?"),
+    ("how much is shipping to the usa?", "how long is shipping to the usa?"),
+    ("is the mango soap good for dry skin?", "is the mango soap good for oily skin?"),
+    ("where is your shop?", "where is your factory?"),
+    ("매장 어디에 있어요?", "공장 어디에 있어요?"),
+    ("배송비 얼마예요?", "배송 기간 얼마나 걸려요?"),
+    ("ร้านอยู่ที่ไหนคะ", "โรงงานอยู่ที่ไหนคะ"),
+    ("ส่งไปญี่ปุ่นได้ไหม", "ส่งไปเกาหลีได้ไหม"),
+    ("送料はいくらですか？", "配送は何日かかりますか？"),
+    ("100 pieces price?", "500 pieces price?"),
+]
+
+
+def make_typos(text: str, count: int, rng: random.Random):
+    """글자 누락/중복/인접 교환 중 하나를 적용한 변형 (원문과 다른 것만)"""
+    variants = []
+    attempts = 0
+    while len(variants) < count and attempts < count * 10:
+        attempts += 1
+        if len(text) < 4:
+            break
+        position = rng.randrange(1, len(text) - 1)
+        kind = rng.choice(('drop', 'double', 'swap'))
+        if kind == 'drop':
+            variant = text[:position] + text[position + 1:]
+        elif kind == 'double':
+            variant = text[:position] + text[position] + text[position:]
+        else:
+            variant = text[:position - 1] + text[position] + text[position - 1] + text[position + 1:]
+        if variant != text and variant not in variants:
+            variants.append(variant)
+    return variants
+
+
+def evaluate(questions, args, thresholds=None, verbose=True):
+    cache = SemanticCache(max_entries=args.max_entries, ttl_seconds=3600, thresholds=thresholds)
+    rng = random.Random(args.seed)
+    source_of = {}
+    cross_hits = []
+
+    # 1. 로그 재생
+    for question in questions:
+        language = flask_app.detect_user_language(question)
+        match = cache.lookup(question, language)
+        if match is not None:
+            if match.question != question:
+                cross_hits.append((question, match.question, match.similarity))
+            continue
+        source_of[question] = cache.add(question, language, f"answer to: {question}")
+
+    # 2. 오타 변형
+    counts = defaultdict(lambda: {"lookups": 0, "hits": 0, "false_hits": 0})
+    false_examples = []
+    for question, source_id in source_of.items():
+        language = flask_app.detect_user_language(question)
+        for variant in make_typos(question, args.variants, rng):
+            row = counts[language]
+            row["lookups"] += 1
+            match = cache.lookup(variant, language)
+            if match is None:
+                continue
+            if match.source_id == source_id:
+                row["hits"] += 1
+            else:
+                row["false_hits"] += 1
+                false_examples.append((variant, match.question, match.similarity))
+
+    # 3. 바꿔 말하기 / 비슷하지만 다른 질문
+    pair_cache = SemanticCache(max_entries=args.max_entries, ttl_seconds=3600, thresholds=thresholds)
+    stored = {}
+    for original, _ in PARAPHRASE_PAIRS + NEGATIVE_PAIRS:
+        if original not in stored:
+            stored[original] = pair_cache.add(original, flask_app.detect_user_language(original), original)
+    paraphrase_hits = sum(
+        1 for original, variant in PARAPHRASE_PAIRS
+        if (m := pair_cache.lookup(variant, flask_app.detect_user_language(variant))) and m.source_id == stored[original]
+    )
+    negative_hits = []
+    for original, variant in NEGATIVE_PAIRS:
+        match = pair_cache.lookup(variant, flask_app.detect_user_language(variant))
+        if match is not None:
+            negative_hits.append((variant, match.question, match.similarity))
+
+    lookups = sum(row["lookups"] for row in counts.values())
+    hits = sum(row["hits"] for row in counts.values())
+    false_hits = sum(row["false_hits"] for row in counts.values()) + len(negative_hits)
+    total_lookups = lookups + len(PARAPHRASE_PAIRS) + len(NEGATIVE_PAIRS)
+    result = {
+        "log_questions": len(questions),
+        "cached_questions": len(source_of),
+        "cross_hits": len(cross_hits),
+        "typo_lookups": lookups,
+        "typo_hit_rate": hits / lookups if lookups else 0.0,
+        "paraphrase_hit_rate": paraphrase_hits / len(PARAPHRASE_PAIRS),
+        "negative_false_hits": len(negative_hits),
+        "false_hit_rate": false_hits / total_lookups if total_lookups else 0.0,
+    }
+
+    if verbose:
+        print(f"로그 질문 {len(questions)}개 (캐시 저장 {len(source_of)}개)")
+        print(f"\n[1] 로그 재생 중 다른 질문의 답으로 적중: {len(cross_hits)}건")
+        for question, matched, similarity in cross_hits:
+            print(f"    {similarity:.3f}  {question!r} → {matched!r}")
+        print(f"\n[2] 오타 변형 {lookups}건")
+        print(f"    {'language':<10} {'lookups':>8} {'hit':>8} {'false':>8}")
+        for language, row in sorted(counts.items()):
+            print(f"    {language:<10} {row['lookups']:>8} {row['hits']:>8} {row['false_hits']:>8}")
+        for variant, matched, similarity in false_examples:
+            print(f"    ✗ {similarity:.3f}  {variant!r} → {matched!r}")
+        print(f"\n[3] 바꿔 말하기 적중 {paraphrase_hits}/{len(PARAPHRASE_PAIRS)}, "
+              f"다른 질문 오답 적중 {len(negative_hits)}/{len(NEGATIVE_PAIRS)}")
+        for variant, matched, similarity in negative_hits:
+            print(f"    ✗ {similarity:.3f}  {variant!r} → {matched!r}")
+        print(f"\n적중률(오타 변형): {result['typo_hit_rate']:.1%}  "
+              f"적중률(바꿔 말하기): {result['paraphrase_hit_rate']:.1%}  "
+              f"오답 적중률: {result['false_hit_rate']:.1%}")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="semantic cache offline evaluation")
+    parser.add_argument("--log", default=os.path.join(ROOT, "chat_log.txt"))
+    parser.add_argument("--variants", type=int, default=3, help="질문당 오타 변형 수")
+    parser.add_argument("--max-entries", type=int, default=256)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--sweep", action="store_true", help="임계값별 적중률/오답 적중률 표 출력")
+    args = parser.parse_args()
+
+    questions = list(dict.fromkeys(load_log_messages(args.log)))
+    evaluate(questions, args)
+
+    if args.sweep:
+        print(f"\n{'threshold':>9} {'typo_hit':>9} {'para_hit':>9} {'false':>7}")
+        for step in range(60, 100, 4):
+            threshold = step / 100
+            languages = set(flask_app.detect_user_language(q) for q in questions) | {
+                'english', 'korean', 'thai', 'japanese', 'chinese'}
+            result = evaluate(questions, args, {language: threshold for language in languages}, verbose=False)
+            print(f"{threshold:>9.2f} {result['typo_hit_rate']:>9.1%} "
+                  f"{result['paraphrase_hit_rate']:>9.1%} {result['false_hit_rate']:>7.1%}")
+
+
+if __name__ == "__main__":
+    main()
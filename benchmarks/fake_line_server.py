@@ -0,0 +1,144 @@
+# -*- coding: utf-8 -*-
+"""
+로컬 테스트용 가짜 LINE Messaging API 서버.
+
+실행: python benchmarks/fake_line_server.py [--port 8099] [--latency-ms 20] [--connect-delay-ms 60] [--fail-rate 0.1]
+앱은 LINE_API_BASE=http://127.0.0.1:8099 로 실행하면 실제 LINE 대신 이 서버로 답장을 보냅니다.
+
+- POST /v2/bot/message/reply, /v2/bot/message/push 만 지원 (Authorization 헤더, 메시지 1~5개 검증)
+- --latency-ms: 요청마다 추가 지연
+- --connect-delay-ms: 새 연결마다 추가 지연 (TLS 핸드셰이크 비용 흉내)
+- --fail-rate: 이 비율만큼 500 응답 (재시도 동작 확인용)
+- GET /stats: 받은 요청 수, 새 연결 수, 메시지 수
+"""
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional
+
+MAX_MESSAGES_PER_CALL = 5
+
+
+class FakeLineState:
+    def __init__(self, latency_ms: float = 0.0, connect_delay_ms: float = 0.0, fail_rate: float = 0.0, seed: int = 0):
+        self.latency = latency_ms / 1000
+        self.connect_delay = connect_delay_ms / 1000
+        self.fail_rate = fail_rate
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.counts: Dict[str, int] = {"connections": 0, "requests": 0, "messages": 0, "errors": 0, "rejected": 0}
+        self.retry_keys = set()
+
+    def count(self, key: str, amount: int = 1) -> None:
+        with self.lock:
+            self.counts[key] += amount
+
+    def should_fail(self) -> bool:
+        with self.lock:
+            return self.fail_rate > 0 and self.random.random() < self.fail_rate
+
+
+def make_handler(state: FakeLineState):
+    class FakeLineHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        disable_nagle_algorithm = True
+
+        def setup(self):
+            super().setup()
+            state.count("connections")
+            if state.connect_delay:
+                time.sleep(state.connect_delay)
+
+        def log_message(self, format, *args):
+            pass
+
+        def _send(self, status: int, body: dict) -> None:
+            data = json.dumps(body).encode('utf-8')
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_GET(self):
+            if self.path == "/stats":
+                with state.lock:
+                    self._send(200, dict(state.counts))
+            else:
+                self._send(404, {"message": "Not found"})
+
+        def do_POST(self):
+            length = int(self.headers.get("Content-Length") or 0)
+            raw = self.rfile.read(length)
+            state.count("requests")
+            if state.latency:
+                time.sleep(state.latency)
+
+            if self.path not in ("/v2/bot/message/reply", "/v2/bot/message/push"):
+                self._send(404, {"message": "Not found"})
+                return
+            if not self.headers.get("Authorization", "").startswith("Bearer "):
+                state.count("rejected")
+                self._send(401, {"message": "Authentication failed"})
+                return
+            try:
+                payload = json.loads(raw or b"{}")
+            except ValueError:
+                state.count("rejected")
+                self._send(400, {"message": "The request body has 1 error(s)"})
+                return
+            messages = payload.get("messages") or []
+            if not 1 <= len(messages) <= MAX_MESSAGES_PER_CALL:
+                state.count("rejected")
+                self._send(400, {"message": "Size must be between 1 and 5"})
+                return
+            if state.should_fail():
+                state.count("errors")
+                self._send(500, {"message": "Internal server error"})
+                return
+
+            retry_key = self.headers.get("X-Line-Retry-Key")
+            if retry_key:
+                with state.lock:
+                    if retry_key in state.retry_keys:
+                        self._send(409, {"message": "The retry key is already accepted"})
+                        return
+                    state.retry_keys.add(retry_key)
+            state.count("messages", len(messages))
+            self._send(200, {})
+
+    return FakeLineHandler
+
+
+def start_fake_line_server(port: int = 0, latency_ms: float = 0.0, connect_delay_ms: float = 0.0,
+                           fail_rate: float = 0.0, state: Optional[FakeLineState] = None):
+    """백그라운드 스레드로 서버 시작. (server, state) 반환, base URL 은 http://127.0.0.1:<server.server_port>"""
+    state = state or FakeLineState(latency_ms, connect_delay_ms, fail_rate)
+    server = ThreadingHTTPServer(("127.0.0.1", port), make_handler(state))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="fake-line-server", daemon=True).start()
+    return server, state
+
+
+def main():
+    parser = argparse.ArgumentParser(description="fake LINE Messaging API server")
+    parser.add_argument("--port", type=int, default=8099)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--connect-delay-ms", type=float, default=0.0)
+    parser.add_argument("--fail-rate", type=float, default=0.0)
+    args = parser.parse_args()
+
+    server, _ = start_fake_line_server(args.port, args.latency_ms, args.connect_delay_ms, args.fail_rate)
+    print(f"🧪 fake LINE API: http://127.0.0.1:{server.server_port} (Ctrl+C 로 종료)")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,300 @@
+# -*- coding: utf-8 -*-
+"""
+로컬 테스트용 가짜 OpenAI chat.completions 서버.
+
+실행: python benchmarks/fake_openai_server.py [--port 8098] [--latency-ms 400] [--latency-dist lognormal]
+                                              [--tokens-per-sec 60] [--rate-limit-rate 0.05] [--error-rate 0.02]
+앱은 OPENAI_BASE_URL=http://127.0.0.1:8098/v1 로 실행하면 실제 gpt-4o 대신 이 서버를 호출합니다.
+(부하 테스트에서 토큰 비용 없이 지연/실패 상황 재현)
+
+- POST /v1/chat/completions: 일반 응답과 stream=True (SSE, stream_options.include_usage 지원)
+- --latency-ms / --latency-dist / --latency-spread-ms: 첫 토큰까지의 지연 분포
+  (fixed, uniform: ±spread, normal: 표준편차 spread, lognormal: 중앙값 latency, 퍼짐 spread/latency)
+- --tokens-per-sec: 토큰 생성 속도 (스트리밍은 토큰마다, 일반 응답은 전체 토큰 시간만큼 대기)
+- --completion-tokens: 응답 토큰 수 (요청의 max_tokens 를 넘지 않음, 넘으면 finish_reason=length)
+- --rate-limit-rate: 이 비율만큼 429 (Retry-After 포함), --error-rate: 이 비율만큼 500
+- --hang-rate / --hang-ms: 이 비율만큼 응답 전에 hang-ms 동안 멈춤 (클라이언트 timeout 확인용)
+- --stream-abort-rate: 이 비율만큼 스트리밍 도중 연결 끊기 (chunked 응답이 끝나지 않아 클라이언트에서 오류)
+- GET /stats: 요청 수, 결과별 건수, 생성한 토큰 수 (disconnected: 클라이언트가 먼저 끊은 응답)
+"""
+import argparse
+import json
+import math
+import random
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+
+LATENCY_DISTRIBUTIONS = ('fixed', 'uniform', 'normal', 'lognormal')
+FILLER_WORDS = ("Thank you for contacting SABOO THAILAND 😊 Our natural fruit-shaped soaps are handmade "
+                "with essential oils and are gentle on the skin. Please visit our store at Mixt Chatuchak "
+                "or contact us for more details about prices, shipping and gift sets.").split()
+
+
+class FakeOpenAIState:
+    def __init__(self, latency_ms: float = 0.0, latency_dist: str = 'fixed', latency_spread_ms: float = 0.0,
+                 tokens_per_sec: float = 0.0, completion_tokens: int = 120, rate_limit_rate: float = 0.0,
+                 error_rate: float = 0.0, hang_rate: float = 0.0, hang_ms: float = 60000.0,
+                 stream_abort_rate: float = 0.0, retry_after_ms: float = 500.0, seed: int = 0):
+        if latency_dist not in LATENCY_DISTRIBUTIONS:
+            raise ValueError(f"latency_dist 는 {LATENCY_DISTRIBUTIONS} 중 하나여야 합니다: {latency_dist}")
+        self.latency_ms = latency_ms
+        self.latency_dist = latency_dist
+        self.latency_spread_ms = latency_spread_ms
+        self.tokens_per_sec = tokens_per_sec
+        self.completion_tokens = completion_tokens
+        self.rate_limit_rate = rate_limit_rate
+        self.error_rate = error_rate
+        self.hang_rate = hang_rate
+        self.hang_ms = hang_ms
+        self.stream_abort_rate = stream_abort_rate
+        self.retry_after_ms = retry_after_ms
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.counts: Dict[str, int] = {"requests": 0, "streams": 0, "ok": 0, "rate_limited": 0, "errors": 0,
+                                       "hangs": 0, "aborted": 0, "disconnected": 0, "rejected": 0,
+                                       "completion_tokens": 0}
+
+    def count(self, key: str, amount: int = 1) -> None:
+        with self.lock:
+            self.counts[key] += amount
+
+    def roll(self, rate: float) -> bool:
+        with self.lock:
+            return rate > 0 and self.random.random() < rate
+
+    def sample_latency(self) -> float:
+        """첫 토큰까지의 지연 (초)"""
+        mean, spread = self.latency_ms, self.latency_spread_ms
+        with self.lock:
+            if self.latency_dist == 'uniform':
+                value = self.random.uniform(mean - spread, mean + spread)
+            elif self.latency_dist == 'normal':
+                value = self.random.gauss(mean, spread)
+            elif self.latency_dist == 'lognormal' and mean > 0:
+                value = self.random.lognormvariate(math.log(mean), spread / mean if spread else 0.0)
+            else:
+                value = mean
+        return max(0.0, value) / 1000
+
+    def token_delay(self) -> float:
+        return 1.0 / self.tokens_per_sec if self.tokens_per_sec > 0 else 0.0
+
+
+def completion_tokens_for(state: FakeOpenAIState, payload: dict) -> Tuple[List[str], str]:
+    """(응답 토큰 목록, finish_reason)"""
+    wanted = state.completion_tokens
+    limit = payload.get("max_tokens") or payload.get("max_completion_tokens")
+    finish_reason = "stop"
+    if limit and wanted > limit:
+        wanted, finish_reason = limit, "length"
+    tokens = [FILLER_WORDS[i % len(FILLER_WORDS)] + " " for i in range(wanted)]
+    return tokens, finish_reason
+
+
+def prompt_tokens_for(payload: dict) -> int:
+    """대략적인 입력 토큰 수 (4글자당 1토큰)"""
+    return sum(len(str(message.get("content") or "")) for message in payload.get("messages") or []) // 4 + 1
+
+
+def make_handler(state: FakeOpenAIState):
+    class FakeOpenAIHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        disable_nagle_algorithm = True
+
+        def log_message(self, format, *args):
+            pass
+
+        def _send(self, status: int, body: dict, headers: Optional[Dict[str, str]] = None) -> bool:
+            data = json.dumps(body).encode('utf-8')
+            try:
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(data)
+                return True
+            except (BrokenPipeError, ConnectionResetError):
+                # 클라이언트가 timeout 으로 먼저 끊은 경우
+                state.count("disconnected")
+                self.close_connection = True
+                return False
+
+        def _error(self, status: int, error_type: str, message: str, headers: Optional[Dict[str, str]] = None):
+            self._send(status, {"error": {"message": message, "type": error_type, "param": None, "code": None}},
+                       headers)
+
+        def do_GET(self):
+            if self.path == "/stats":
+                with state.lock:
+                    counts = dict(state.counts)
+                self._send(200, counts)
+            else:
+                self._error(404, "invalid_request_error", "Not found")
+
+        def do_POST(self):
+            length = int(self.headers.get("Content-Length") or 0)
+            raw = self.rfile.read(length)
+            state.count("requests")
+
+            if self.path.rstrip("/") not in ("/v1/chat/completions", "/chat/completions"):
+                self._error(404, "invalid_request_error", f"Unknown path {self.path}")
+                return
+            if not self.headers.get("Authorization", "").startswith("Bearer "):
+                state.count("rejected")
+                self._error(401, "invalid_request_error", "You didn't provide an API key.")
+                return
+            try:
+                payload = json.loads(raw or b"{}")
+            except ValueError:
+                state.count("rejected")
+                self._error(400, "invalid_request_error", "We could not parse the JSON body of your request.")
+                return
+            if not payload.get("messages"):
+                state.count("rejected")
+                self._error(400, "invalid_request_error", "'messages' is a required property")
+                return
+
+            if state.roll(state.rate_limit_rate):
+                state.count("rate_limited")
+                self._error(429, "rate_limit_error", "Rate limit reached for requests (fake)", {
+                    "retry-after-ms": str(int(state.retry_after_ms)),
+                    "retry-after": str(max(1, math.ceil(state.retry_after_ms / 1000))),
+                })
+                return
+            if state.roll(state.error_rate):
+                state.count("errors")
+                self._error(500, "server_error", "The server had an error while processing your request (fake)")
+                return
+            if state.roll(state.hang_rate):
+                state.count("hangs")
+                time.sleep(state.hang_ms / 1000)
+
+            time.sleep(state.sample_latency())
+            tokens, finish_reason = completion_tokens_for(state, payload)
+            model = payload.get("model") or "gpt-4o"
+            completion_id = f"chatcmpl-fake-{uuid.uuid4().hex[:12]}"
+            usage = {"prompt_tokens": prompt_tokens_for(payload), "completion_tokens": len(tokens),
+                     "total_tokens": prompt_tokens_for(payload) + len(tokens)}
+
+            if payload.get("stream"):
+                self._stream(payload, tokens, finish_reason, model, completion_id, usage)
+                return
+
+            if state.token_delay():
+                time.sleep(state.token_delay() * len(tokens))
+            if self._send(200, {
+                "id": completion_id, "object": "chat.completion", "created": int(time.time()), "model": model,
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": "".join(tokens).strip()},
+                             "finish_reason": finish_reason}],
+                "usage": usage,
+            }):
+                state.count("ok")
+                state.count("completion_tokens", len(tokens))
+
+        def _stream(self, payload: dict, tokens: List[str], finish_reason: str, model: str,
+                    completion_id: str, usage: dict) -> None:
+            state.count("streams")
+            created = int(time.time())
+            abort_at = self.random_abort_point(len(tokens))
+
+            def write_chunked(data: bytes) -> None:
+                self.wfile.write(f"{len(data):x}\r\n".encode('ascii') + data + b"\r\n")
+                self.wfile.flush()
+
+            def chunk(delta: dict, reason: Optional[str] = None, chunk_usage: Optional[dict] = None,
+                      choices: bool = True) -> None:
+                body = {"id": completion_id, "object": "chat.completion.chunk", "created": created, "model": model,
+                        "choices": [{"index": 0, "delta": delta, "finish_reason": reason}] if choices else []}
+                if chunk_usage is not None:
+                    body["usage"] = chunk_usage
+                write_chunked(f"data: {json.dumps(body, ensure_ascii=False)}\n\n".encode('utf-8'))
+
+            try:
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.send_header("Cache-Control", "no-cache")
+                self.send_header("Transfer-Encoding", "chunked")
+                self.end_headers()
+                chunk({"role": "assistant", "content": ""})
+                for position, token in enumerate(tokens):
+                    if position == abort_at:
+                        # 마지막 0 크기 청크 없이 연결을 닫아 응답이 중간에 끊긴 것처럼 만듦
+                        state.count("aborted")
+                        self.close_connection = True
+                        return
+                    if position and state.token_delay():
+                        time.sleep(state.token_delay())
+                    chunk({"content": token})
+                chunk({}, finish_reason)
+                if (payload.get("stream_options") or {}).get("include_usage"):
+                    chunk({}, chunk_usage=usage, choices=False)
+                write_chunked(b"data: [DONE]\n\n")
+                self.wfile.write(b"0\r\n\r\n")
+                self.wfile.flush()
+                state.count("ok")
+                state.count("completion_tokens", len(tokens))
+            except (BrokenPipeError, ConnectionResetError):
+                # 클라이언트가 먼저 끊은 경우 (축약 후 stream.close(), timeout 등)
+                state.count("disconnected")
+                self.close_connection = True
+
+        def random_abort_point(self, token_count: int) -> Optional[int]:
+            if token_count < 2 or not state.roll(state.stream_abort_rate):
+                return None
+            with state.lock:
+                return state.random.randint(1, token_count - 1)
+
+    return FakeOpenAIHandler
+
+
+def start_fake_openai_server(port: int = 0, state: Optional[FakeOpenAIState] = None, **options):
+    """
+    백그라운드 스레드로 서버 시작. (server, state) 반환.
+    OpenAI 클라이언트 base_url 은 http://127.0.0.1:<server.server_port>/v1
+    """
+    state = state or FakeOpenAIState(**options)
+    server = ThreadingHTTPServer(("127.0.0.1", port), make_handler(state))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="fake-openai-server", daemon=True).start()
+    return server, state
+
+
+def main():
+    parser = argparse.ArgumentParser(description="fake OpenAI chat.completions server")
+    parser.add_argument("--port", type=int, default=8098)
+    parser.add_argument("--latency-ms", type=float, default=400.0)
+    parser.add_argument("--latency-dist", choices=LATENCY_DISTRIBUTIONS, default='lognormal')
+    parser.add_argument("--latency-spread-ms", type=float, default=150.0)
+    parser.add_argument("--tokens-per-sec", type=float, default=60.0)
+    parser.add_argument("--completion-tokens", type=int, default=120)
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0)
+    parser.add_argument("--retry-after-ms", type=float, default=500.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--hang-rate", type=float, default=0.0)
+    parser.add_argument("--hang-ms", type=float, default=60000.0)
+    parser.add_argument("--stream-abort-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    server, _ = start_fake_openai_server(
+        args.port, latency_ms=args.latency_ms, latency_dist=args.latency_dist,
+        latency_spread_ms=args.latency_spread_ms, tokens_per_sec=args.tokens_per_sec,
+        completion_tokens=args.completion_tokens, rate_limit_rate=args.rate_limit_rate, error_rate=args.error_rate,
+        hang_rate=args.hang_rate, hang_ms=args.hang_ms, stream_abort_rate=args.stream_abort_rate,
+        retry_after_ms=args.retry_after_ms, seed=args.seed,
+    )
+    print(f"🧪 fake OpenAI API: http://127.0.0.1:{server.server_port}/v1 (Ctrl+C 로 종료)")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+# -*- coding: utf-8 -*-
+"""
+로컬 테스트용 가짜 Redis 서버 (RESP2).
+
+실행: python benchmarks/fake_redis_server.py [--port 6390] [--password secret]
+앱은 STATE_BACKEND=redis://127.0.0.1:6390/0 로 실행하면 실제 Redis 대신 이 서버를 공유 저장소로 씁니다.
+
+- GET, SET (EX/PX), DEL, INCR, PING, SELECT, AUTH, DBSIZE, FLUSHDB 만 지원
+- 데이터는 메모리에만 있고, DB 번호별로 따로 관리
+"""
+import argparse
+import socketserver
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+
+class FakeRedisState:
+    def __init__(self, password: Optional[str] = None):
+        self.password = password
+        self.lock = threading.Lock()
+        self.databases: Dict[int, Dict[bytes, Tuple[bytes, Optional[float]]]] = {}
+        self.commands = 0
+
+    def db(self, number: int) -> Dict[bytes, Tuple[bytes, Optional[float]]]:
+        return self.databases.setdefault(number, {})
+
+    def lookup(self, number: int, key: bytes) -> Optional[bytes]:
+        data = self.db(number)
+        entry = data.get(key)
+        if entry is None:
+            return None
+        value, expires_at = entry
+        if expires_at is not None and time.time() >= expires_at:
+            del data[key]
+            return None
+        return value
+
+
+def _bulk(value: Optional[bytes]) -> bytes:
+    if value is None:
+        return b'$-1\r\n'
+    return b'$%d\r\n%s\r\n' % (len(value), value)
+
+
+def _read_command(reader) -> Optional[List[bytes]]:
+    line = reader.readline()
+    if not line:
+        return None
+    if not line.startswith(b'*'):
+        # 인라인 명령 (redis-cli 없이 nc 로 테스트할 때)
+        return line.strip().split()
+    parts = []
+    for _ in range(int(line[1:-2])):
+        length = int(reader.readline()[1:-2])
+        parts.append(reader.read(length + 2)[:-2])
+    return parts
+
+
+def make_handler(state: FakeRedisState):
+    class FakeRedisHandler(socketserver.StreamRequestHandler):
+        def handle(self):
+            db = 0
+            authenticated = state.password is None
+            while True:
+                try:
+                    parts = _read_command(self.rfile)
+                except (ValueError, OSError):
+                    return
+                if parts is None:
+                    return
+                if not parts:
+                    continue
+                command = parts[0].upper()
+                args = parts[1:]
+                with state.lock:
+                    state.commands += 1
+                    if command == b'AUTH':
+                        authenticated = state.password is not None and args[-1].decode() == state.password
+                        reply = b'+OK\r\n' if authenticated else b'-WRONGPASS invalid password\r\n'
+                    elif not authenticated:
+                        reply = b'-NOAUTH Authentication required.\r\n'
+                    else:
+                        reply, db = self.execute(command, args, db)
+                try:
+                    self.wfile.write(reply)
+                except OSError:
+                    return
+
+        @staticmethod
+        def execute(command: bytes, args: List[bytes], db: int) -> Tuple[bytes, int]:
+            data = state.db(db)
+            if command == b'PING':
+                return b'+PONG\r\n', db
+            if command == b'SELECT':
+                return b'+OK\r\n', int(args[0])
+            if command == b'GET':
+                return _bulk(state.lookup(db, args[0])), db
+            if command == b'SET':
+                expires_at = None
+                options = [arg.upper() for arg in args[2:]]
+                if b'EX' in options:
+                    expires_at = time.time() + int(args[2 + options.index(b'EX') + 1])
+                elif b'PX' in options:
+                    expires_at = time.time() + int(args[2 + options.index(b'PX') + 1]) / 1000
+                data[args[0]] = (args[1], expires_at)
+                return b'+OK\r\n', db
+            if command == b'DEL':
+                removed = sum(1 for key in args if state.lookup(db, key) is not None and data.pop(key, None))
+                return b':%d\r\n' % removed, db
+            if command == b'INCR':
+                value = state.lookup(db, args[0])
+                try:
+                    number = int(value or b'0') + 1
+                except ValueError:
+                    return b'-ERR value is not an integer or out of range\r\n', db
+                expires_at = data[args[0]][1] if value is not None else None
+                data[args[0]] = (str(number).encode(), expires_at)
+                return b':%d\r\n' % number, db
+            if command == b'DBSIZE':
+                return b':%d\r\n' % len(data), db
+            if command == b'FLUSHDB':
+                data.clear()
+                return b'+OK\r\n', db
+            return b"-ERR unknown command '%s'\r\n" % command.lower(), db
+
+    return FakeRedisHandler
+
+
+class _ThreadingTCPServer(socketserver.ThreadingTCPServer):
+    allow_reuse_address = True
+    daemon_threads = True
+
+
+def start_fake_redis_server(port: int = 0, password: Optional[str] = None,
+                            state: Optional[FakeRedisState] = None):
+    """백그라운드 스레드로 서버 시작. (server, state) 반환, 주소는 redis://127.0.0.1:<server.server_address[1]>"""
+    state = state or FakeRedisState(password)
+    server = _ThreadingTCPServer(("127.0.0.1", port), make_handler(state))
+    threading.Thread(target=server.serve_forever, name="fake-redis-server", daemon=True).start()
+    return server, state
+
+
+def main():
+    parser = argparse.ArgumentParser(description="fake Redis server")
+    parser.add_argument("--port", type=int, default=6390)
+    parser.add_argument("--password", default=None)
+    args = parser.parse_args()
+
+    server, _ = start_fake_redis_server(args.port, args.password)
+    print(f"🧪 fake Redis: redis://127.0.0.1:{server.server_address[1]}/0 (Ctrl+C 로 종료)")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,185 @@
+# -*- coding: utf-8 -*-
+"""
+언어 감지기 학습용 보조 문장과 평가용 표본.
+
+- SEED_TEXTS: company_info_*.txt 와 함께 n-gram 프로필을 만들 때 쓰는 문장
+  (스페인어는 회사 정보 파일이 없어서 이 문장만 사용)
+- EVAL_SAMPLES: 정확도 평가용 (메시지, 기대 언어). 학습 문장과 겹치지 않게 따로 작성
+"""
+
+SEED_TEXTS = {
+    'english': """
+Hello, I would like to know the price of your mango soap.
+Do you have lavender bath bombs in stock right now?
+How long does shipping to Korea usually take?
+Can I order two hundred pieces for my hotel and get a discount?
+Where is your shop and what time do you open on the weekend?
+Thank you very much, that is very helpful.
+Is this soap made with natural ingredients and is it safe for sensitive skin?
+Please send me the catalogue and the wholesale price list.
+What is the difference between the oval soap and the fruit soap?
+I want to buy a gift set for my mother, which one do you recommend?
+We are looking for a supplier of handmade soap for our spa.
+Could you tell me the minimum order quantity for custom packaging?
+My order has not arrived yet, can you check the tracking number?
+The package was damaged when it was delivered, what should I do?
+Are your products certified and do they have an FDA number?
+""",
+    'french': """
+Bonjour, je voudrais connaître le prix de votre savon à la mangue.
+Avez-vous des bombes de bain à la lavande en stock en ce moment ?
+Combien de temps faut-il pour la livraison en France ?
+Est-ce que je peux commander deux cents pièces pour mon hôtel avec une remise ?
+Où se trouve votre boutique et à quelle heure ouvrez-vous le week-end ?
+Merci beaucoup, c'est très utile.
+Ce savon est-il fabriqué avec des ingrédients naturels et convient-il aux peaux sensibles ?
+Pouvez-vous m'envoyer le catalogue et la liste des prix de gros ?
+Quelle est la différence entre le savon ovale et le savon en forme de fruit ?
+Je cherche un coffret cadeau pour ma mère, lequel me conseillez-vous ?
+Nous cherchons un fournisseur de savon artisanal pour notre spa.
+Quelle est la quantité minimale de commande pour un emballage personnalisé ?
+Ma commande n'est pas encore arrivée, pouvez-vous vérifier le numéro de suivi ?
+""",
+    'spanish': """
+Hola, me gustaría saber el precio de su jabón de mango.
+¿Tienen bombas de baño de lavanda disponibles ahora mismo?
+¿Cuánto tiempo tarda normalmente el envío a España?
+¿Puedo pedir doscientas piezas para mi hotel y recibir un descuento?
+¿Dónde está su tienda y a qué hora abren el fin de semana?
+Muchas gracias, eso es muy útil.
+¿Este jabón está hecho con ingredientes naturales y es seguro para la piel sensible?
+Por favor, envíenme el catálogo y la lista de precios al por mayor.
+¿Cuál es la diferencia entre el jabón ovalado y el jabón con forma de fruta?
+Quiero comprar un set de regalo para mi madre, ¿cuál me recomiendan?
+Estamos buscando un proveedor de jabón artesanal para nuestro spa.
+¿Cuál es la cantidad mínima de pedido para un empaque personalizado?
+Mi pedido todavía no ha llegado, ¿pueden revisar el número de seguimiento?
+El paquete llegó dañado, ¿qué debo hacer?
+¿Sus productos están certificados y tienen número de registro sanitario?
+La empresa fue fundada en el año dos mil ocho y exporta a más de veinte países.
+Nuestros jabones tienen forma de frutas y están hechos a mano con aceites naturales.
+Los precios pueden cambiar según la cantidad y el tipo de producto.
+Si necesitan una factura, por favor indíquenos el nombre de la empresa y la dirección.
+También vendemos en tiendas de Bangkok y en nuestra página web oficial.
+Para pedidos grandes ofrecemos precios especiales y envío con seguimiento.
+¿Aceptan pagos con tarjeta de crédito o transferencia bancaria?
+Me encanta el olor de este jabón, quiero comprar más para mis amigos.
+¿Hay alguna promoción este mes para clientes nuevos?
+Los productos se envían desde Tailandia por correo aéreo o por mensajería.
+El tiempo de entrega depende del país de destino y de la aduana.
+Nuestra fábrica está en las afueras de Bangkok y se puede visitar con cita previa.
+Cada jabón pesa aproximadamente cien gramos y viene en una caja de regalo.
+Si tienen alguna pregunta, pueden escribirnos por correo o llamarnos por teléfono.
+Gracias por elegir nuestros productos naturales hechos en Tailandia.
+""",
+    'german': """
+Hallo, ich möchte gerne den Preis Ihrer Mangoseife wissen.
+Haben Sie gerade Badebomben mit Lavendel auf Lager?
+Wie lange dauert der Versand nach Deutschland normalerweise?
+Kann ich zweihundert Stück für mein Hotel bestellen und einen Rabatt bekommen?
+Wo ist Ihr Geschäft und wann öffnen Sie am Wochenende?
+Vielen Dank, das ist sehr hilfreich.
+Ist diese Seife aus natürlichen Zutaten hergestellt und für empfindliche Haut geeignet?
+Bitte schicken Sie mir den Katalog und die Großhandelspreisliste.
+Was ist der Unterschied zwischen der ovalen Seife und der Fruchtseife?
+Ich suche ein Geschenkset für meine Mutter, welches empfehlen Sie?
+Wir suchen einen Lieferanten für handgemachte Seife für unser Spa.
+Meine Bestellung ist noch nicht angekommen, können Sie die Sendungsnummer prüfen?
+""",
+    'vietnamese': """
+Xin chào, tôi muốn biết giá xà phòng xoài của bạn.
+Bạn có bom tắm oải hương còn hàng không?
+Giao hàng đến Việt Nam thường mất bao lâu?
+Tôi có thể đặt hai trăm cái cho khách sạn và được giảm giá không?
+Cửa hàng của bạn ở đâu và cuối tuần mở cửa lúc mấy giờ?
+Cảm ơn bạn rất nhiều, thông tin rất hữu ích.
+Xà phòng này có làm từ nguyên liệu tự nhiên và an toàn cho da nhạy cảm không?
+Vui lòng gửi cho tôi danh mục sản phẩm và bảng giá sỉ.
+Tôi muốn mua một bộ quà tặng cho mẹ, bạn gợi ý loại nào?
+Đơn hàng của tôi vẫn chưa đến, bạn kiểm tra mã vận đơn giúp tôi được không?
+""",
+}
+
+# (메시지, 기대 언어)
+EVAL_SAMPLES = [
+    # English (짧은 질문, 제품명 위주 포함)
+    ("what is saboo", 'english'),
+    ("how much rose bath bomb", 'english'),
+    ("do you ship to japan?", 'english'),
+    ("Where can I buy your soap in Bangkok?", 'english'),
+    ("I need 500 mango soaps for a wedding, what is the price?", 'english'),
+    ("Is the coconut soap good for dry skin?", 'english'),
+    ("hi", 'english'),
+    ("thanks!", 'english'),
+    ("english please", 'english'),
+    ("Can you recommend a gift box under 500 baht?", 'english'),
+    ("what time does the store close today", 'english'),
+    ("do you have jasmine bath bomb", 'english'),
+    ("my parcel still hasn't arrived", 'english'),
+    ("Tell me more about the oval soap collection", 'english'),
+    ("bubble bath bomb duck price", 'english'),
+    ("saboo thailand good?", 'english'),
+    ("Are these vegan and cruelty free?", 'english'),
+    ("ok", 'english'),
+    ("I'd like to become a distributor in Europe", 'english'),
+    ("send me the price list please", 'english'),
+    # French
+    ("Bonjour, combien coûte le savon à la mangue ?", 'french'),
+    ("Est-ce que vous livrez en Belgique ?", 'french'),
+    ("Je voudrais acheter des bombes de bain pour un mariage", 'french'),
+    ("Où est votre magasin à Bangkok ?", 'french'),
+    ("Merci pour votre réponse rapide", 'french'),
+    ("Quels sont les ingrédients de ce savon ?", 'french'),
+    ("C'est possible d'avoir une réduction pour 300 pièces ?", 'french'),
+    ("Avez-vous des savons pour les peaux sèches ?", 'french'),
+    ("je cherche un cadeau pour ma sœur", 'french'),
+    ("Quel est le délai de livraison pour la Suisse ?", 'french'),
+    # Spanish
+    ("Hola, ¿cuánto cuesta el jabón de coco?", 'spanish'),
+    ("¿Hacen envíos a México?", 'spanish'),
+    ("Quiero comprar quinientos jabones para una boda", 'spanish'),
+    ("¿Dónde puedo comprar sus productos en Bangkok?", 'spanish'),
+    ("Gracias por la información", 'spanish'),
+    ("¿Qué ingredientes tiene este jabón?", 'spanish'),
+    ("hola, tienen bombas de baño de rosa?", 'spanish'),
+    ("Necesito un regalo para mi novia", 'spanish'),
+    ("¿Cuánto tarda en llegar a Argentina?", 'spanish'),
+    ("Me interesa ser distribuidor en Chile", 'spanish'),
+    # German
+    ("Hallo, was kostet die Kokosseife?", 'german'),
+    ("Liefern Sie auch nach Österreich?", 'german'),
+    ("Ich möchte 200 Badebomben für eine Hochzeit bestellen", 'german'),
+    ("Wo finde ich Ihren Laden in Bangkok?", 'german'),
+    ("Danke für die schnelle Antwort", 'german'),
+    ("Welche Inhaltsstoffe hat diese Seife?", 'german'),
+    ("Gibt es einen Rabatt für große Bestellungen?", 'german'),
+    ("Ist die Seife für trockene Haut geeignet?", 'german'),
+    ("Wie lange dauert die Lieferung in die Schweiz?", 'german'),
+    ("Ich suche ein Geschenk für meine Frau", 'german'),
+    # Vietnamese
+    ("Xin chào, xà phòng dừa giá bao nhiêu?", 'vietnamese'),
+    ("Bạn có giao hàng đến Hà Nội không?", 'vietnamese'),
+    ("Tôi muốn mua 300 bánh xà phòng cho đám cưới", 'vietnamese'),
+    ("Cửa hàng ở Bangkok nằm ở đâu?", 'vietnamese'),
+    ("Cảm ơn bạn nhé", 'vietnamese'),
+    ("Xà phòng này có thành phần gì?", 'vietnamese'),
+    ("Có giảm giá khi mua số lượng lớn không?", 'vietnamese'),
+    ("Tôi cần quà tặng cho bạn gái", 'vietnamese'),
+    ("Bao lâu thì hàng đến Sài Gòn?", 'vietnamese'),
+    ("Sản phẩm có phù hợp cho da khô không?", 'vietnamese'),
+    # 비라틴 문자
+    ("비누좋아?", 'korean'),
+    ("그린티 배쓰밤 있어?", 'korean'),
+    ("saboo thailand rose bath bomb의 barcode를 알려줘", 'korean'),
+    ("ㅋㅋ 감사합니다", 'korean'),
+    ("สบู่มะม่วงราคาเท่าไหร่", 'thai'),
+    ("บาร์โค้ดของ Saboo Thailand Rose Bath Bomb (150 กรัม) คือ", 'thai'),
+    ("ラベンダーのバスボムはありますか", 'japanese'),
+    ("石鹸の値段を教えてください", 'japanese'),
+    ("ｶﾀｶﾅ ok?", 'japanese'),
+    ("薰衣草香皂多少钱", 'chinese'),
+    ("你们发货到上海吗", 'chinese'),
+    ("كم سعر صابون المانجو؟", 'arabic'),
+    ("Сколько стоит мыло?", 'russian'),
+    ("Xin chào", 'vietnamese'),
+]
@@ -0,0 +1,326 @@
+# -*- coding: utf-8 -*-
+"""
+대화 로그 재생 벤치마크.
+
+chat_log.txt 와 save_chat/*.txt 에서 사용자 메시지를 꺼내 가짜 OpenAI 클라이언트를 붙인 앱에
+그대로 다시 보내고, 대상(get_gpt_response 직접 호출, /chat, /line)과 동시성 단계별로
+응답 경로(route)마다 p50/p95/p99 지연 시간과 처리량을 측정합니다.
+결과는 JSON 으로 저장하고 --compare 로 이전 결과와 비교할 수 있습니다.
+
+실행: python benchmarks/replay_chat_logs.py [--targets function,chat,line] [--concurrency 1,4,16]
+                                            [--gpt-latency-ms 300] [--limit 200] [--output results.json]
+                                            [--compare previous.json] [--fake-openai] [--openai-base-url URL]
+- 기본은 프로세스 안의 가짜 클라이언트(StubCompletions). --fake-openai 는 fake_openai_server.py 를 띄워
+  실제 OpenAI SDK 로 HTTP 호출하고(--rate-limit-rate, --error-rate 로 재시도/폴백 경로 측정),
+  --openai-base-url 은 이미 떠 있는 호환 서버를 사용합니다.
+- /line 은 웹훅 요청부터 답장 전송(send_line_message)까지를 한 건의 지연 시간으로 봅니다.
+- 재생 중에는 대화 로그를 파일에 쓰지 않고, 동시성 단계마다 응답 캐시를 비웁니다.
+"""
+import argparse
+import base64
+import glob
+import hashlib
+import hmac
+import json
+import logging
+import os
+import random
+import re
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from types import SimpleNamespace
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+logging.disable(logging.CRITICAL)
+
+import flask_app  # noqa: E402
+from fake_openai_server import start_fake_openai_server  # noqa: E402
+
+# "User: ...", "사용자: ...", "[시각] User (사용자 id) [언어]: ..." (ChatLogWriter 형식)
+USER_LINE_PATTERN = re.compile(r'^(?:\[[^\]]*\]\s*)?(?:User|사용자)(?: \([^)]*\))?(?: \[[^\]]*\])?:\s*(.+)$')
+TARGETS = ('function', 'chat', 'line')
+
+
+def load_replay_messages(paths):
+    """로그 파일들에서 사용자 메시지를 기록된 순서대로 추출"""
+    messages = []
+    for path in paths:
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                match = USER_LINE_PATTERN.match(line.strip())
+                if match and match.group(1).strip():
+                    messages.append(match.group(1).strip())
+    return messages
+
+
+def percentile(samples, ratio):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(ratio * (len(ordered) - 1))))]
+
+
+def summarize(latencies_ms):
+    return {
+        "count": len(latencies_ms),
+        "mean": round(sum(latencies_ms) / len(latencies_ms), 2),
+        "p50": round(percentile(latencies_ms, 0.50), 2),
+        "p95": round(percentile(latencies_ms, 0.95), 2),
+        "p99": round(percentile(latencies_ms, 0.99), 2),
+        "max": round(max(latencies_ms), 2),
+    }
+
+
+class StubCompletions:
+    """chat.completions.create 만 흉내 내는 가짜 OpenAI 클라이언트 (latency_ms ± jitter 만큼 대기)"""
+
+    def __init__(self, latency_ms, jitter_ms, seed=0):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.calls = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def create(self, **kwargs):
+        with self._lock:
+            self.calls += 1
+            delay = max(0.0, self.latency_ms + self._random.uniform(-self.jitter_ms, self.jitter_ms))
+        time.sleep(delay / 1000)
+        question = kwargs["messages"][-1]["content"].rsplit("Customer question:", 1)[-1].strip()
+        text = f"Thank you for your question about {question[:80]}. " * 4
+        usage = SimpleNamespace(prompt_tokens=len(kwargs["messages"][-1]["content"]) // 4,
+                                completion_tokens=len(text) // 4, total_tokens=0)
+        usage.total_tokens = usage.prompt_tokens + usage.completion_tokens
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=text))], usage=usage)
+
+
+class ReplayHarness:
+    """앱에 가짜 OpenAI 클라이언트를 붙이고, 로그 기록/LINE 전송을 가로채 응답 경로와 완료 시각을 수집"""
+
+    def __init__(self, openai_client):
+        self.routes = {}
+        self.line_done = {}
+        self._local = threading.local()
+        flask_app.client = openai_client
+        flask_app.chat_log_writer.write = self._record_chat
+        flask_app.send_line_message = self._record_line_reply
+        flask_app.initialize_once()
+
+    def _record_chat(self, user_msg, bot_msg, user_id="anonymous", language=None, meta=None):
+        self.routes[user_id] = (meta or {}).get("route") or "unknown"
+        return True
+
+    def _record_line_reply(self, reply_token, message):
+        event = self.line_done.get(reply_token)
+        if event is not None:
+            event.set()
+        return True
+
+    def reset(self):
+        """동시성 단계마다 같은 조건에서 시작하도록 캐시와 수집 결과를 비움"""
+        flask_app.response_cache.invalidate()
+        flask_app.semantic_cache.invalidate()
+        self.routes.clear()
+        self.line_done.clear()
+
+    def client(self):
+        if not hasattr(self._local, "client"):
+            self._local.client = flask_app.app.test_client()
+        return self._local.client
+
+    def call_function(self, message, user_id):
+        meta = {}
+        flask_app.get_gpt_response(message, user_id, meta)
+        self.routes[user_id] = meta.get("route") or "unknown"
+        return True
+
+    def call_chat(self, message, user_id):
+        response = self.client().post('/chat', json={"message": message, "user_id": user_id})
+        return response.status_code == 200
+
+    def call_line(self, message, user_id, timeout=60.0):
+        reply_token = f"reply-{user_id}"
+        done = self.line_done[reply_token] = threading.Event()
+        body = json.dumps({"events": [{
+            "type": "message", "replyToken": reply_token, "source": {"userId": user_id},
+            "message": {"type": "text", "text": message},
+        }]}, ensure_ascii=False).encode('utf-8')
+        headers = {"Content-Type": "application/json"}
+        if flask_app.LINE_SECRET:
+            digest = hmac.new(flask_app.LINE_SECRET.encode('utf-8'), body, hashlib.sha256).digest()
+            headers["X-Line-Signature"] = base64.b64encode(digest).decode('utf-8')
+        response = self.client().post('/line', data=body, headers=headers)
+        # 웹훅은 바로 200 을 돌려주므로 워커가 답장을 보낼 때까지 기다림
+        return response.status_code == 200 and done.wait(timeout)
+
+
+def run_level(harness, target, messages, concurrency, run_id):
+    harness.reset()
+    call = getattr(harness, f"call_{target}")
+    samples = []
+    errors = [0]
+
+    def one(numbered):
+        number, message = numbered
+        user_id = f"replay-{run_id}-{number}"
+        started = time.perf_counter()
+        try:
+            ok = call(message, user_id)
+        except Exception:
+            ok = False
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        if not ok:
+            errors[0] += 1
+        samples.append((user_id, elapsed_ms))
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(one, enumerate(messages)))
+    elapsed = time.perf_counter() - started
+
+    by_route = {}
+    for user_id, elapsed_ms in samples:
+        by_route.setdefault(harness.routes.get(user_id, "unknown"), []).append(elapsed_ms)
+    return {
+        "concurrency": concurrency,
+        "requests": len(messages),
+        "errors": errors[0],
+        "elapsed_s": round(elapsed, 3),
+        "throughput_rps": round(len(messages) / elapsed, 2),
+        "latency_ms": summarize([elapsed_ms for _, elapsed_ms in samples]),
+        "routes": {route: summarize(values) for route, values in sorted(by_route.items())},
+    }
+
+
+def print_level(target, result):
+    latency = result["latency_ms"]
+    print(f"{target:<9} c={result['concurrency']:<3} {result['throughput_rps']:>8.1f} req/s  "
+          f"p50={latency['p50']:>8.1f}ms  p95={latency['p95']:>8.1f}ms  p99={latency['p99']:>8.1f}ms  "
+          f"errors={result['errors']}")
+    for route, summary in result["routes"].items():
+        print(f"{'':<16}{route:<15} n={summary['count']:<4} p50={summary['p50']:>8.1f}ms  "
+              f"p95={summary['p95']:>8.1f}ms  p99={summary['p99']:>8.1f}ms")
+
+
+def compare(previous, current):
+    """두 결과 파일의 대상/동시성별 처리량과 p50/p95 변화"""
+    print(f"\n== 비교: {previous.get('git_commit')} ({previous.get('started_at')}) → "
+          f"{current.get('git_commit')} ({current.get('started_at')}) ==")
+    for target, levels in current["results"].items():
+        before_levels = {level["concurrency"]: level for level in previous.get("results", {}).get(target, [])}
+        for level in levels:
+            before = before_levels.get(level["concurrency"])
+            if not before:
+                continue
+            parts = []
+            for label, old, new in (
+                ("req/s", before["throughput_rps"], level["throughput_rps"]),
+                ("p50", before["latency_ms"]["p50"], level["latency_ms"]["p50"]),
+                ("p95", before["latency_ms"]["p95"], level["latency_ms"]["p95"]),
+            ):
+                change = (new - old) / old * 100 if old else 0.0
+                parts.append(f"{label} {old:.1f}→{new:.1f} ({change:+.1f}%)")
+            print(f"{target:<9} c={level['concurrency']:<3} " + "  ".join(parts))
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                              text=True, timeout=10).stdout.strip() or None
+    except Exception:
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="replay chat logs against a stub OpenAI client")
+    parser.add_argument("--logs", nargs="*", help="재생할 로그 파일 (기본: chat_log.txt + save_chat/*.txt)")
+    parser.add_argument("--targets", default=",".join(TARGETS))
+    parser.add_argument("--concurrency", default="1,4,16")
+    parser.add_argument("--gpt-latency-ms", type=float, default=300.0)
+    parser.add_argument("--gpt-jitter-ms", type=float, default=50.0)
+    parser.add_argument("--limit", type=int, default=0, help="메시지 수 제한 (0 이면 전체)")
+    parser.add_argument("--repeat", type=int, default=1, help="메시지 목록 반복 횟수")
+    parser.add_argument("--output", help="결과 JSON 경로")
+    parser.add_argument("--compare", help="비교할 이전 결과 JSON")
+    parser.add_argument("--fake-openai", action="store_true", help="가짜 OpenAI HTTP 서버를 띄워 SDK 로 호출")
+    parser.add_argument("--openai-base-url", help="이미 실행 중인 OpenAI 호환 서버 주소 (예: http://127.0.0.1:8098/v1)")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="--fake-openai: 429 비율")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="--fake-openai: 500 비율")
+    args = parser.parse_args()
+
+    paths = args.logs or [os.path.join(ROOT, "chat_log.txt")] + sorted(
+        glob.glob(os.path.join(ROOT, flask_app.CHAT_LOG_DIR, "*.txt")))
+    paths = [path for path in paths if os.path.exists(path)]
+    messages = load_replay_messages(paths) * max(1, args.repeat)
+    if args.limit:
+        messages = messages[:args.limit]
+    if not messages:
+        print("재생할 메시지가 없습니다.")
+        return 1
+
+    targets = [target.strip() for target in args.targets.split(",") if target.strip()]
+    unknown = [target for target in targets if target not in TARGETS]
+    if unknown:
+        parser.error(f"알 수 없는 대상: {unknown} (가능: {', '.join(TARGETS)})")
+    levels = [int(level) for level in args.concurrency.split(",") if level.strip()]
+
+    stub = fake_state = None
+    base_url = args.openai_base_url
+    if args.fake_openai and not base_url:
+        server, fake_state = start_fake_openai_server(
+            latency_ms=args.gpt_latency_ms, latency_dist='uniform', latency_spread_ms=args.gpt_jitter_ms,
+            rate_limit_rate=args.rate_limit_rate, error_rate=args.error_rate, retry_after_ms=100)
+        base_url = f"http://127.0.0.1:{server.server_port}/v1"
+    if base_url:
+        from openai import OpenAI
+        openai_client = OpenAI(api_key="benchmark", base_url=base_url, max_retries=flask_app.OPENAI_MAX_RETRIES)
+    else:
+        stub = StubCompletions(args.gpt_latency_ms, args.gpt_jitter_ms)
+        openai_client = SimpleNamespace(chat=SimpleNamespace(completions=stub))
+    harness = ReplayHarness(openai_client)
+    report = {
+        "started_at": datetime.now().isoformat(timespec='seconds'),
+        "git_commit": git_commit(),
+        "config": {
+            "logs": [os.path.relpath(path, ROOT) for path in paths],
+            "messages": len(messages),
+            "gpt_latency_ms": args.gpt_latency_ms,
+            "gpt_jitter_ms": args.gpt_jitter_ms,
+            "openai": base_url or "stub",
+            "rate_limit_rate": args.rate_limit_rate if fake_state else None,
+            "error_rate": args.error_rate if fake_state else None,
+            "openai_max_retries": flask_app.OPENAI_MAX_RETRIES,
+            "line_workers": flask_app.LINE_MAX_CONCURRENCY,
+            "state_backend": flask_app.state_backend.name,
+        },
+        "results": {},
+    }
+    print(f"메시지 {len(messages)}개 (로그 {len(paths)}개), 가짜 GPT 지연 {args.gpt_latency_ms:.0f}±{args.gpt_jitter_ms:.0f}ms")
+
+    for target in targets:
+        for level in levels:
+            result = run_level(harness, target, messages, level, f"{target}-{level}")
+            report["results"].setdefault(target, []).append(result)
+            print_level(target, result)
+    if stub:
+        report["config"]["gpt_calls"] = stub.calls
+    if fake_state:
+        report["fake_openai"] = dict(fake_state.counts)
+        print(f"\n가짜 OpenAI 서버: {report['fake_openai']}")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"\n💾 결과 저장: {args.output}")
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            compare(json.load(f), report)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,210 @@
+# -*- coding: utf-8 -*-
+"""
+모델 선택(model_router) 오프라인 재생 비교: 전부 gpt-4o vs 질문 난이도별 선택.
+
+chat_log.txt 와 save_chat/*.txt 의 사용자 메시지로 실제 앱과 같은 GPT 호출 계획(plan_gpt_response)을
+만든 뒤, GPT 를 호출하는 경로(general, more_info)만 골라 두 시나리오의 비용과 지연 시간을 비교합니다.
+- baseline: 모든 질문을 gpt-4o (max_tokens 원래 값)
+- routed: model_router 정책(--policy 로 다른 정책 시험 가능)이 고른 모델/max_tokens
+
+실행: python benchmarks/replay_model_router.py [--policy '{"simple_max_words": 10}'] [--limit 100]
+                                              [--live] [--show-answers] [--output results.json]
+- 기본(추정): prompt 토큰은 프롬프트 길이로 추정(estimate_tokens), completion 토큰은
+  save_chat/*.jsonl 에 기록된 평균(없으면 --completion-tokens)을 max_tokens 로 자른 값,
+  지연 시간은 모델별 --profile MODEL=첫토큰ms:초당토큰 으로 계산합니다. (기본값은 대략적인 값이므로
+  실측값으로 바꿔 쓰세요)
+- --live: OPENAI_API_KEY(또는 OPENAI_BASE_URL)로 두 모델을 실제 호출해 지연 시간과 usage 를 측정합니다.
+  --show-answers 로 작은 모델로 보낸 질문의 두 답변을 나란히 출력해 품질을 확인할 수 있습니다.
+비용은 flask_app.usage_tracker 의 가격표(OPENAI_PRICES 로 변경 가능)로 계산합니다.
+"""
+import argparse
+import glob
+import json
+import logging
+import os
+import sys
+import time
+from collections import Counter
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+logging.disable(logging.CRITICAL)
+
+import flask_app  # noqa: E402
+from company_info_index import estimate_tokens  # noqa: E402
+from model_router import ModelRouter  # noqa: E402
+from replay_chat_logs import git_commit, load_replay_messages, summarize  # noqa: E402
+
+# 모델별 (첫 토큰까지 ms, 초당 생성 토큰) - 대략적인 값
+DEFAULT_PROFILES = {
+    "gpt-4o": (450.0, 70.0),
+    "gpt-4o-mini": (350.0, 110.0),
+}
+# 메시지 하나당 role/구분 토큰
+MESSAGE_OVERHEAD_TOKENS = 4
+
+
+def parse_profiles(values):
+    profiles = dict(DEFAULT_PROFILES)
+    for value in values or []:
+        model, _, numbers = value.partition("=")
+        first_token_ms, _, tokens_per_sec = numbers.partition(":")
+        profiles[model.strip()] = (float(first_token_ms), float(tokens_per_sec))
+    return profiles
+
+
+def recorded_completion_tokens(directory):
+    """save_chat/*.jsonl 에 기록된 GPT 호출의 평균 completion 토큰 (기록이 없으면 None)"""
+    tokens = []
+    for path in glob.glob(os.path.join(directory, "*.jsonl")):
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    usage = json.loads(line).get("usage")
+                except ValueError:
+                    continue
+                if usage and usage.get("completion_tokens"):
+                    tokens.append(usage["completion_tokens"])
+    return round(sum(tokens) / len(tokens)) if tokens else None
+
+
+def build_plans(messages, baseline_router, candidate_router):
+    """GPT 를 호출하는 계획만 (메시지, 분석, baseline 계획, routed 결정) 으로 반환"""
+    flask_app.model_router = baseline_router
+    plans = []
+    for number, message in enumerate(messages):
+        analysis = flask_app.analyze_message(message)
+        plan = flask_app.plan_gpt_response(message, f"router-replay-{number}", analysis)
+        if plan.text is not None:
+            continue
+        plans.append((message, analysis, plan, candidate_router.decide(analysis, plan.route, plan.max_tokens)))
+    return plans
+
+
+def estimate_call(plan, model, max_tokens, completion_tokens, profiles):
+    prompt_tokens = sum(estimate_tokens(message["content"]) + MESSAGE_OVERHEAD_TOKENS for message in plan.messages)
+    completion = min(completion_tokens, max_tokens)
+    first_token_ms, tokens_per_sec = profiles.get(model, DEFAULT_PROFILES["gpt-4o"])
+    usage = {"prompt_tokens": prompt_tokens, "completion_tokens": completion, "cached_tokens": 0}
+    return first_token_ms + completion / tokens_per_sec * 1000, usage, None
+
+
+def live_call(plan, model, max_tokens):
+    started = time.perf_counter()
+    completion = flask_app.client.chat.completions.create(
+        model=model, messages=plan.messages, max_tokens=max_tokens, temperature=0.7,
+        timeout=flask_app.OPENAI_TIMEOUT)
+    latency_ms = (time.perf_counter() - started) * 1000
+    usage = flask_app.usage_to_dict(getattr(completion, "usage", None)) or {}
+    return latency_ms, usage, completion.choices[0].message.content.strip()
+
+
+def scenario_summary(calls):
+    costs = [call["cost_usd"] for call in calls]
+    return {
+        "calls": len(calls),
+        "models": dict(Counter(call["model"] for call in calls)),
+        "prompt_tokens": sum(call["usage"].get("prompt_tokens", 0) for call in calls),
+        "completion_tokens": sum(call["usage"].get("completion_tokens", 0) for call in calls),
+        "cost_usd": round(sum(costs), 6),
+        "cost_per_1k_messages_usd": round(sum(costs) / len(costs) * 1000, 4),
+        "latency_ms": summarize([call["latency_ms"] for call in calls]),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="compare all-gpt-4o against routed models on replayed chat logs")
+    parser.add_argument("--logs", nargs="*", help="재생할 로그 파일 (기본: chat_log.txt + save_chat/*.txt)")
+    parser.add_argument("--limit", type=int, default=0, help="메시지 수 제한 (0 이면 전체)")
+    parser.add_argument("--policy", help="시험할 모델 선택 정책 JSON (기본: MODEL_ROUTER_POLICY 또는 기본 정책)")
+    parser.add_argument("--live", action="store_true", help="두 모델을 실제로 호출해 측정")
+    parser.add_argument("--show-answers", action="store_true", help="--live: 작은 모델로 보낸 질문의 답변 비교 출력")
+    parser.add_argument("--completion-tokens", type=int, default=250, help="추정: 기록이 없을 때 completion 토큰")
+    parser.add_argument("--profile", action="append", help="추정: MODEL=첫토큰ms:초당토큰 (여러 번 지정 가능)")
+    parser.add_argument("--output", help="결과 JSON 경로")
+    args = parser.parse_args()
+
+    paths = args.logs or [os.path.join(ROOT, "chat_log.txt")] + sorted(
+        glob.glob(os.path.join(ROOT, flask_app.CHAT_LOG_DIR, "*.txt")))
+    messages = list(dict.fromkeys(load_replay_messages([path for path in paths if os.path.exists(path)])))
+    if args.limit:
+        messages = messages[:args.limit]
+
+    flask_app.initialize_data()
+    candidate = ModelRouter(json.loads(args.policy)) if args.policy else flask_app.model_router
+    baseline = ModelRouter({"mode": "default", "default_model": candidate.policy["default_model"]})
+    plans = build_plans(messages, baseline, candidate)
+    if not plans:
+        print("GPT 를 호출하는 메시지가 없습니다.")
+        return 1
+
+    profiles = parse_profiles(args.profile)
+    completion_tokens = recorded_completion_tokens(os.path.join(ROOT, flask_app.CHAT_LOG_DIR)) or args.completion_tokens
+    if args.live and not flask_app.client:
+        parser.error("--live 에는 OPENAI_API_KEY 가 필요합니다.")
+
+    def call(plan, model, max_tokens):
+        if args.live:
+            return live_call(plan, model, max_tokens)
+        return estimate_call(plan, model, max_tokens, completion_tokens, profiles)
+
+    scenarios = {"baseline": [], "routed": []}
+    reasons = Counter()
+    for message, analysis, plan, decision in plans:
+        reasons[(decision.model, decision.reason)] += 1
+        base_latency, base_usage, base_answer = call(plan, plan.model, plan.max_tokens)
+        if decision.model == plan.model and decision.max_tokens == plan.max_tokens:
+            routed_latency, routed_usage, routed_answer = base_latency, base_usage, base_answer
+        else:
+            routed_latency, routed_usage, routed_answer = call(plan, decision.model, decision.max_tokens)
+        for name, model, latency_ms, usage in (("baseline", plan.model, base_latency, base_usage),
+                                               ("routed", decision.model, routed_latency, routed_usage)):
+            scenarios[name].append({"model": model, "latency_ms": latency_ms, "usage": usage,
+                                    "cost_usd": flask_app.usage_tracker.cost(model, dict(
+                                        {"prompt_tokens": 0, "completion_tokens": 0, "cached_tokens": 0}, **usage))})
+        if args.show_answers and base_answer is not None and decision.model != plan.model:
+            print(f"\n❓ [{analysis.language}] {message}")
+            print(f"  {plan.model}: {base_answer[:300]}")
+            print(f"  {decision.model}: {routed_answer[:300]}")
+
+    summaries = {name: scenario_summary(calls) for name, calls in scenarios.items()}
+    mode = "live" if args.live else f"estimate (completion {completion_tokens} tokens)"
+    print(f"\n== {len(messages)}개 메시지 중 GPT 호출 {len(plans)}건, {mode} ==")
+    for (model, reason), count in sorted(reasons.items(), key=lambda item: -item[1]):
+        print(f"  {model:<14} {reason:<24} {count:>4}")
+    print(f"\n{'':<10} {'비용 USD':>10} {'1천건당':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}  모델")
+    for name, summary in summaries.items():
+        latency = summary["latency_ms"]
+        print(f"{name:<10} {summary['cost_usd']:>10.4f} {summary['cost_per_1k_messages_usd']:>9.3f} "
+              f"{latency['p50']:>8.0f} {latency['p95']:>8.0f} {latency['p99']:>8.0f}  {summary['models']}")
+    baseline_cost = summaries["baseline"]["cost_usd"]
+    if baseline_cost:
+        saved = 1 - summaries["routed"]["cost_usd"] / baseline_cost
+        print(f"\n비용 {saved:.0%} 절감, p50 지연 "
+              f"{summaries['routed']['latency_ms']['p50'] - summaries['baseline']['latency_ms']['p50']:+.0f}ms")
+
+    if args.output:
+        report = {
+            "started_at": datetime.now().isoformat(timespec='seconds'),
+            "git_commit": git_commit(),
+            "mode": "live" if args.live else "estimate",
+            "policy": {key: sorted(value) if isinstance(value, frozenset) else value
+                       for key, value in candidate.policy.items()},
+            "completion_tokens": None if args.live else completion_tokens,
+            "profiles": None if args.live else profiles,
+            "messages": len(messages),
+            "gpt_calls": len(plans),
+            "decisions": [{"model": model, "reason": reason, "count": count}
+                          for (model, reason), count in reasons.items()],
+            "results": summaries,
+        }
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"결과 저장: {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
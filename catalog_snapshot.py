@@ -0,0 +1,99 @@
+# -*- coding: utf-8 -*-
+"""
+제품/회사 정보 카탈로그의 불변 스냅샷.
+
+요청 스레드는 CatalogStore.current 로 현재 스냅샷 참조 하나만 읽고, 그 스냅샷은
+절대 바뀌지 않습니다. 다시 읽기(로더)는 옆에서 새 스냅샷을 완성한 뒤 참조 하나를
+바꾸는 것으로 게시하므로, 읽는 쪽은 잠금 없이도 항상 한 버전 전체만 보게 됩니다.
+"""
+import threading
+import time
+from datetime import datetime
+from types import MappingProxyType
+from typing import Any, Callable, Dict, Mapping, Optional
+
+from company_info_index import CompanyInfoIndex
+from price_catalog import PriceCatalog
+from product_index import ProductIndex
+
+_EMPTY: Mapping = MappingProxyType({})
+
+
+class CatalogSnapshot:
+    """
+    한 시점의 카탈로그 전체.
+
+    - products: {제품 파일명: 내용}
+    - product_index / price_catalog: products 로 만든 검색 색인과 가격 카탈로그
+    - company_info: {"company_info_<언어>": 내용}
+    - company_info_indexes: {"company_info_<언어>": 섹션 색인}
+    dict 항목은 읽기 전용 MappingProxyType 으로 감싸 두며, 변경은 replace() 로 새 스냅샷을 만듭니다.
+    """
+    __slots__ = ('version', 'published_at', 'products', 'product_index', 'price_catalog', 'product_last_update',
+                 'company_info', 'company_info_indexes')
+
+    def __init__(self, version: int = 0, products: Mapping[str, str] = _EMPTY,
+                 product_index: Optional[ProductIndex] = None, price_catalog: Optional[PriceCatalog] = None,
+                 product_last_update: Optional[datetime] = None, company_info: Mapping[str, str] = _EMPTY,
+                 company_info_indexes: Mapping[str, CompanyInfoIndex] = _EMPTY):
+        object.__setattr__(self, 'version', version)
+        object.__setattr__(self, 'published_at', time.time())
+        object.__setattr__(self, 'products', MappingProxyType(dict(products)))
+        object.__setattr__(self, 'product_index', product_index)
+        object.__setattr__(self, 'price_catalog', price_catalog)
+        object.__setattr__(self, 'product_last_update', product_last_update)
+        object.__setattr__(self, 'company_info', MappingProxyType(dict(company_info)))
+        object.__setattr__(self, 'company_info_indexes', MappingProxyType(dict(company_info_indexes)))
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        raise AttributeError("CatalogSnapshot 은 변경할 수 없습니다. replace() 로 새 스냅샷을 만드세요.")
+
+    def replace(self, **changes: Any) -> 'CatalogSnapshot':
+        """일부 항목만 바꾼 다음 버전 스냅샷"""
+        values = {name: getattr(self, name) for name in self.__slots__ if name not in ('version', 'published_at')}
+        values.update(changes)
+        return CatalogSnapshot(version=self.version + 1, **values)
+
+    def stats(self) -> Dict[str, object]:
+        return {
+            "version": self.version,
+            "published_at": datetime.fromtimestamp(self.published_at).isoformat(),
+            "product_files": len(self.products),
+            "company_info_languages": len(self.company_info),
+        }
+
+
+class CatalogStore:
+    """
+    현재 스냅샷 참조를 들고 있는 저장소.
+
+    - current: 읽기 (잠금 없음, 참조 하나 읽기는 원자적)
+    - update(fn): 쓰기. 게시 잠금 안에서 fn(현재 스냅샷) 이 바꿀 항목 dict 를 돌려주면
+      replace() 로 새 스냅샷을 만들어 참조를 바꿈 (None 을 돌려주면 게시하지 않음)
+    파일 읽기처럼 오래 걸리는 작업은 update() 밖에서 미리 해 두고, fn 은 조립만 하도록 합니다.
+    """
+
+    def __init__(self, snapshot: Optional[CatalogSnapshot] = None):
+        self._current = snapshot or CatalogSnapshot()
+        self._publish_lock = threading.Lock()
+        self.publishes = 0
+
+    @property
+    def current(self) -> CatalogSnapshot:
+        return self._current
+
+    def update(self, fn: Callable[[CatalogSnapshot], Optional[Dict[str, Any]]]) -> CatalogSnapshot:
+        with self._publish_lock:
+            base = self._current
+            changes = fn(base)
+            if not changes:
+                return base
+            snapshot = base.replace(**changes)
+            self._current = snapshot
+            self.publishes += 1
+            return snapshot
+
+    def stats(self) -> Dict[str, object]:
+        stats = self._current.stats()
+        stats["publishes"] = self.publishes
+        return stats
@@ -0,0 +1,226 @@
+# -*- coding: utf-8 -*-
+"""
+대화 로그 백그라운드 기록기.
+
+요청 스레드는 write() 로 기록할 내용을 큐에 넣기만 하고, 디스크 쓰기는
+전용 스레드가 모아서(batch) 처리합니다. 로그 파일은 날짜별로 나뉘며,
+하루 파일이 max_bytes 를 넘으면 save_chat_YYYY_MM_DD_1.txt, _2.txt ... 로 이어 씁니다.
+
+사람이 읽는 .txt 로그와 함께, 같은 이름의 .jsonl 파일에 한 줄에 한 건씩
+구조화된 기록(시각, 사용자, 언어, 응답 경로, 지연 시간, 토큰 사용량, 의도 키워드)을 남깁니다.
+(조회는 chatlog_query.py)
+"""
+import json
+import logging
+import os
+import queue
+import re
+import threading
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+HTML_TAG_PATTERN = re.compile(r'<[^>]+>')
+SEPARATOR = "-" * 50
+
+# (기록 시각, 사용자 id, 언어, 사용자 메시지, 봇 메시지, 응답 메타데이터)
+ChatRecord = Tuple[datetime, str, Optional[str], str, str, Optional[Dict[str, Any]]]
+
+# JSONL 기록에 그대로 옮기는 메타데이터 항목
+META_FIELDS = ('route', 'latency_ms', 'model', 'usage', 'truncated', 'intents', 'stages_ms')
+
+
+def build_json_record(created: datetime, user_id: str, language: str, user_msg: str, bot_msg: str,
+                      meta: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """JSONL 한 줄에 해당하는 dict"""
+    meta = meta or {}
+    record = {"ts": created.isoformat(timespec='seconds'), "user_id": user_id, "language": language}
+    for field in META_FIELDS:
+        record[field] = meta.get(field)
+    record["user_message"] = user_msg
+    record["bot_message"] = bot_msg
+    return record
+
+_STOP = object()
+
+
+class ChatLogWriter:
+    """
+    큐 기반 대화 로그 기록기.
+
+    - batch_size 개가 모이거나 flush_interval 초가 지나면 한 번에 파일에 씀
+    - 큐가 max_queue 개로 가득 차면 기다리지 않고 버림 (요청 지연에 영향 없도록)
+    - language 없이 들어온 기록은 기록 스레드에서 language_detector 로 감지
+    - 기록 스레드는 첫 write() 때 시작 (gunicorn fork 이후 프로세스에서 생성되도록)
+    - close() 는 남은 기록을 모두 쓰고 스레드를 종료 (atexit 에 등록해서 사용)
+    """
+
+    def __init__(self, directory: str, prefix: str = "save_chat", max_bytes: int = 10 * 1024 * 1024,
+                 batch_size: int = 50, flush_interval: float = 1.0, max_queue: int = 10000,
+                 language_detector: Optional[Callable[[str], str]] = None, jsonl: bool = True):
+        self.directory = directory
+        self.prefix = prefix
+        self.max_bytes = max_bytes
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = flush_interval
+        self.language_detector = language_detector
+        self.jsonl = jsonl
+        self._queue: 'queue.Queue' = queue.Queue(maxsize=max_queue)
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+        self._closed = False
+        # 확장자별 (날짜, 현재 이어 쓰는 파일 번호). 번호 0 이면 접미사 없음
+        self._parts: Dict[str, Tuple[str, int]] = {}
+        self.current_file: Optional[str] = None
+        self.current_jsonl_file: Optional[str] = None
+        self.queued = 0
+        self.written = 0
+        self.dropped = 0
+        self.batches = 0
+        self.rotations = 0
+        self.errors = 0
+        self._flush_seconds = 0.0
+
+    # --- 요청 스레드 ---
+    def write(self, user_msg: str, bot_msg: str, user_id: str = "anonymous", language: Optional[str] = None,
+              meta: Optional[Dict[str, Any]] = None) -> bool:
+        """기록을 큐에 넣음 (meta: route, latency_ms, model, usage, truncated). 큐가 가득 찼거나 닫혔으면 False"""
+        if self._closed:
+            return False
+        self._ensure_started()
+        try:
+            self._queue.put_nowait((datetime.now(), user_id, language, user_msg, bot_msg, meta))
+        except queue.Full:
+            self.dropped += 1
+            return False
+        self.queued += 1
+        return True
+
+    def _ensure_started(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._start_lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="chat-log-writer", daemon=True)
+                self._thread.start()
+
+    def close(self, timeout: float = 5.0) -> None:
+        """남은 기록을 모두 파일에 쓰고 기록 스레드 종료"""
+        if self._closed:
+            return
+        self._closed = True
+        if self._thread is None or not self._thread.is_alive():
+            return
+        self._queue.put(_STOP)
+        self._thread.join(timeout)
+
+    # --- 기록 스레드 ---
+    def _run(self) -> None:
+        batch: List[ChatRecord] = []
+        deadline = None
+        while True:
+            timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                item = None
+            if item is _STOP:
+                self._flush(batch)
+                return
+            if item is not None:
+                batch.append(item)
+                if deadline is None:
+                    deadline = time.monotonic() + self.flush_interval
+            if batch and (len(batch) >= self.batch_size or time.monotonic() >= deadline):
+                self._flush(batch)
+                batch = []
+                deadline = None
+
+    def _path_for(self, date_text: str, part: int, extension: str) -> str:
+        suffix = f"_{part}" if part else ""
+        return os.path.join(self.directory, f"{self.prefix}_{date_text}{suffix}.{extension}")
+
+    def _target_file(self, date_text: str, incoming: int, extension: str = "txt") -> str:
+        """오늘 날짜 파일 중 incoming 바이트를 더 써도 max_bytes 를 넘지 않는 파일"""
+        current_date, part = self._parts.get(extension, (None, 0))
+        if date_text != current_date:
+            part = 0
+        path = self._path_for(date_text, part, extension)
+        # 다른 워커가 같은 파일에 쓰므로 매번 실제 크기를 확인
+        while self.max_bytes and os.path.exists(path) and os.path.getsize(path) + incoming > self.max_bytes:
+            part += 1
+            self.rotations += 1
+            path = self._path_for(date_text, part, extension)
+        self._parts[extension] = (date_text, part)
+        return path
+
+    def _format(self, record: ChatRecord) -> Tuple[str, str]:
+        """(텍스트 로그, JSONL 한 줄)"""
+        created, user_id, language, user_msg, bot_msg, meta = record
+        if language is None:
+            language = self.language_detector(user_msg) if self.language_detector else "unknown"
+        timestamp = created.strftime("%Y-%m-%d %H:%M:%S")
+        clean_bot_msg = HTML_TAG_PATTERN.sub('', bot_msg)
+        text = (
+            f"[{timestamp}] User ({user_id}) [{language}]: {user_msg}\n"
+            f"[{timestamp}] Bot: {clean_bot_msg}\n"
+            f"{SEPARATOR}\n"
+        )
+        if not self.jsonl:
+            return text, ""
+        json_record = build_json_record(created, user_id, language, user_msg, clean_bot_msg, meta)
+        return text, json.dumps(json_record, ensure_ascii=False) + "\n"
+
+    def _append(self, date_text: str, data: str, extension: str) -> str:
+        path = self._target_file(date_text, len(data.encode('utf-8')), extension)
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(data)
+        return path
+
+    def _flush(self, batch: List[ChatRecord]) -> None:
+        if not batch:
+            return
+        started = time.perf_counter()
+        # 자정을 넘긴 배치는 날짜별로 나눠서 기록
+        by_date: Dict[str, Tuple[List[str], List[str]]] = {}
+        for record in batch:
+            try:
+                text, json_line = self._format(record)
+            except Exception as e:
+                self.errors += 1
+                logger.error(f"❌ 채팅 로그 변환 실패: {e}")
+                continue
+            texts, json_lines = by_date.setdefault(record[0].strftime("%Y_%m_%d"), ([], []))
+            texts.append(text)
+            json_lines.append(json_line)
+        for date_text, (texts, json_lines) in by_date.items():
+            try:
+                os.makedirs(self.directory, exist_ok=True)
+                self.current_file = self._append(date_text, "".join(texts), "txt")
+                if self.jsonl:
+                    self.current_jsonl_file = self._append(date_text, "".join(json_lines), "jsonl")
+                self.written += len(texts)
+            except Exception as e:
+                self.errors += 1
+                logger.error(f"❌ 채팅 로그 {len(texts)}건 저장 실패 ({self.directory}): {e}")
+        self.batches += 1
+        self._flush_seconds += time.perf_counter() - started
+        logger.info(f"💬 채팅 로그 {len(batch)}건을 '{self.current_file}' 파일에 저장했습니다.")
+
+    def stats(self) -> Dict[str, object]:
+        return {
+            "directory": self.directory,
+            "current_file": self.current_file,
+            "current_jsonl_file": self.current_jsonl_file,
+            "pending": self._queue.qsize(),
+            "queued": self.queued,
+            "written": self.written,
+            "dropped": self.dropped,
+            "batches": self.batches,
+            "rotations": self.rotations,
+            "errors": self.errors,
+            "avg_flush_ms": round(self._flush_seconds / self.batches * 1000, 2) if self.batches else 0.0,
+            "max_bytes": self.max_bytes,
+        }
@@ -0,0 +1,240 @@
+# -*- coding: utf-8 -*-
+"""
+JSONL 대화 로그(save_chat/save_chat_YYYY_MM_DD*.jsonl) 조회 도구.
+
+파일을 통째로 읽지 않고 한 줄씩 읽으며, 파일마다 옆에 작은 오프셋 인덱스
+(<파일>.idx, 사용자별 줄 시작 위치)를 만들어 --user 조회는 해당 줄만 바로 읽습니다.
+날짜 조건은 파일 이름으로 거르고, 파일이 커지면 인덱스는 늘어난 부분만 추가로 만듭니다.
+
+예:
+  python chatlog_query.py --since 2026-10-01 --until 2026-10-07 --route general
+  python chatlog_query.py --user U1234 --limit 20
+  python chatlog_query.py --date 2026-10-18 --min-latency 3000 --fields ts,user_id,latency_ms,user_message
+  python chatlog_query.py --since 2026-10-01 --summary
+"""
+import argparse
+import glob
+import json
+import os
+import re
+import sys
+from collections import Counter, defaultdict
+from datetime import date, datetime
+from typing import Any, Dict, Iterator, List, Optional
+
+DEFAULT_LOG_DIR = "save_chat"
+INDEX_SUFFIX = ".idx"
+INDEX_VERSION = 1
+FILE_DATE_PATTERN = re.compile(r'_(\d{4})_(\d{2})_(\d{2})(?:_\d+)?\.jsonl$')
+
+
+def file_date(path: str) -> Optional[date]:
+    match = FILE_DATE_PATTERN.search(path)
+    if not match:
+        return None
+    return date(int(match.group(1)), int(match.group(2)), int(match.group(3)))
+
+
+def _part_number(path: str) -> int:
+    match = re.search(r'_\d{4}_\d{2}_\d{2}_(\d+)\.jsonl$', path)
+    return int(match.group(1)) if match else 0
+
+
+def list_log_files(directory: str, since: Optional[date] = None, until: Optional[date] = None) -> List[str]:
+    """날짜 범위에 해당하는 JSONL 파일 (날짜, 파일 번호 순)"""
+    files = []
+    for path in glob.glob(os.path.join(directory, "*.jsonl")):
+        day = file_date(path)
+        if day is None or (since and day < since) or (until and day > until):
+            continue
+        files.append((day, _part_number(path), path))
+    return [path for _, _, path in sorted(files)]
+
+
+# --- 오프셋 인덱스 ---
+def _load_index(path: str) -> Dict[str, Any]:
+    try:
+        with open(path + INDEX_SUFFIX, 'r', encoding='utf-8') as f:
+            index = json.load(f)
+        if index.get("version") == INDEX_VERSION:
+            return index
+    except (OSError, ValueError):
+        pass
+    return {"version": INDEX_VERSION, "size": 0, "lines": 0, "users": {}}
+
+
+def build_index(path: str) -> Dict[str, Any]:
+    """
+    사용자별 줄 시작 오프셋 인덱스를 만들거나 늘어난 부분만 갱신.
+    쓰는 중인 마지막 줄(개행 없음)은 다음 갱신 때 포함됩니다.
+    """
+    index = _load_index(path)
+    size = os.path.getsize(path)
+    if size < index["size"]:
+        # 파일이 잘렸거나 교체됨: 처음부터 다시
+        index = {"version": INDEX_VERSION, "size": 0, "lines": 0, "users": {}}
+    if size == index["size"]:
+        return index
+
+    users = defaultdict(list, index["users"])
+    offset = index["size"]
+    with open(path, 'rb') as f:
+        f.seek(offset)
+        for line in f:
+            if not line.endswith(b'\n'):
+                break
+            try:
+                user_id = json.loads(line).get("user_id", "")
+            except ValueError:
+                user_id = None
+            if user_id is not None:
+                users[user_id].append(offset)
+                index["lines"] += 1
+            offset += len(line)
+    index["size"] = offset
+    index["users"] = dict(users)
+
+    temp_path = path + INDEX_SUFFIX + ".tmp"
+    try:
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(index, f, separators=(',', ':'))
+        os.replace(temp_path, path + INDEX_SUFFIX)
+    except OSError as e:
+        print(f"⚠️ 인덱스 저장 실패 ({path}): {e}", file=sys.stderr)
+    return index
+
+
+# --- 조회 ---
+def _read_all(path: str) -> Iterator[Dict[str, Any]]:
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            if not line.endswith('\n'):
+                break
+            try:
+                yield json.loads(line)
+            except ValueError:
+                continue
+
+
+def _read_offsets(path: str, offsets: List[int]) -> Iterator[Dict[str, Any]]:
+    with open(path, 'rb') as f:
+        for offset in offsets:
+            f.seek(offset)
+            try:
+                yield json.loads(f.readline())
+            except ValueError:
+                continue
+
+
+def iter_records(directory: str = DEFAULT_LOG_DIR, since: Optional[date] = None, until: Optional[date] = None,
+                 user_id: Optional[str] = None, use_index: bool = True) -> Iterator[Dict[str, Any]]:
+    """날짜 범위(및 사용자)의 기록을 시간순으로 하나씩 반환"""
+    for path in list_log_files(directory, since, until):
+        if user_id is None:
+            yield from _read_all(path)
+        elif use_index:
+            offsets = build_index(path)["users"].get(user_id)
+            if offsets:
+                yield from _read_offsets(path, offsets)
+        else:
+            yield from (record for record in _read_all(path) if record.get("user_id") == user_id)
+
+
+def matches(record: Dict[str, Any], args: argparse.Namespace) -> bool:
+    if args.route and record.get("route") not in args.route:
+        return False
+    if args.language and record.get("language") not in args.language:
+        return False
+    if args.min_latency is not None and (record.get("latency_ms") or 0) < args.min_latency:
+        return False
+    if args.contains:
+        needle = args.contains.lower()
+        text = f"{record.get('user_message', '')}\n{record.get('bot_message', '')}".lower()
+        if needle not in text:
+            return False
+    return True
+
+
+def summarize(records: Iterator[Dict[str, Any]]) -> Dict[str, Any]:
+    count = 0
+    routes, languages = Counter(), Counter()
+    latencies = []
+    tokens = Counter()
+    users = set()
+    for record in records:
+        count += 1
+        routes[record.get("route") or "unknown"] += 1
+        languages[record.get("language") or "unknown"] += 1
+        users.add(record.get("user_id"))
+        if record.get("latency_ms") is not None:
+            latencies.append(record["latency_ms"])
+        for key, value in (record.get("usage") or {}).items():
+            tokens[key] += value
+    latencies.sort()
+
+    def percentile(ratio):
+        return latencies[min(len(latencies) - 1, int(round(ratio * (len(latencies) - 1))))] if latencies else None
+
+    return {
+        "records": count,
+        "users": len(users),
+        "routes": dict(routes.most_common()),
+        "languages": dict(languages.most_common()),
+        "latency_ms": {"p50": percentile(0.5), "p95": percentile(0.95), "max": latencies[-1] if latencies else None},
+        "tokens": dict(tokens),
+    }
+
+
+def _parse_date(text: str) -> date:
+    return datetime.strptime(text, "%Y-%m-%d").date()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="JSONL chat log query")
+    parser.add_argument("--dir", default=DEFAULT_LOG_DIR, help="로그 디렉토리 (기본값: save_chat)")
+    parser.add_argument("--date", type=_parse_date, help="하루만 조회 (YYYY-MM-DD)")
+    parser.add_argument("--since", type=_parse_date, help="시작 날짜 (YYYY-MM-DD, 포함)")
+    parser.add_argument("--until", type=_parse_date, help="끝 날짜 (YYYY-MM-DD, 포함)")
+    parser.add_argument("--user", help="사용자 id (오프셋 인덱스 사용)")
+    parser.add_argument("--route", action="append", help="응답 경로 (여러 번 지정 가능)")
+    parser.add_argument("--language", action="append", help="언어 (여러 번 지정 가능)")
+    parser.add_argument("--min-latency", type=float, help="이 값(ms) 이상 걸린 기록만")
+    parser.add_argument("--contains", help="질문/답변에 포함된 문자열 (대소문자 무시)")
+    parser.add_argument("--limit", type=int, default=0, help="최대 출력 건수 (0 이면 제한 없음)")
+    parser.add_argument("--fields", help="출력할 항목 (쉼표 구분, 예: ts,user_id,route)")
+    parser.add_argument("--summary", action="store_true", help="기록 대신 요약 통계 출력")
+    parser.add_argument("--no-index", action="store_true", help="인덱스를 쓰지 않고 전체 스캔")
+    parser.add_argument("--reindex", action="store_true", help="인덱스만 만들거나 갱신하고 종료")
+    args = parser.parse_args(argv)
+
+    since = args.date or args.since
+    until = args.date or args.until
+    if args.reindex:
+        for path in list_log_files(args.dir, since, until):
+            index = build_index(path)
+            print(f"🗂️ {path}: {index['lines']} lines, {len(index['users'])} users")
+        return 0
+
+    records = iter_records(args.dir, since, until, args.user, use_index=not args.no_index)
+    records = (record for record in records if matches(record, args))
+
+    if args.summary:
+        print(json.dumps(summarize(records), ensure_ascii=False, indent=2))
+        return 0
+
+    fields = args.fields.split(",") if args.fields else None
+    for number, record in enumerate(records, 1):
+        if fields:
+            record = {field: record.get(field) for field in fields}
+        print(json.dumps(record, ensure_ascii=False))
+        if args.limit and number >= args.limit:
+            break
+    return 0
+
+
+if __name__ == "__main__":
+    try:
+        sys.exit(main())
+    except BrokenPipeError:
+        # `| head` 로 잘라 볼 때
+        sys.exit(0)
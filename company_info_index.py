@@ -0,0 +1,192 @@
+# -*- coding: utf-8 -*-
+"""
+company_info/company_info_<lang>.txt 섹션 색인.
+
+파일 전체(18~45KB)를 매번 GPT 프롬프트에 붙이는 대신, 로드 시점에
+'## 제목' + 질문/답변 문단 단위로 잘라 BM25 로 색인해 두고
+질문과 관련 있는 섹션만 토큰 예산 안에서 골라 프롬프트에 넣습니다.
+"""
+import math
+import re
+from typing import Dict, List, Optional
+
+TOKEN_PATTERN = re.compile(r'\w+')
+HEADING_PATTERN = re.compile(r'^(#{1,6})\s*(.+?)\s*$')
+
+# BM25 파라미터
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+# 최고 점수 대비 이 비율 미만인 섹션은 선택하지 않음
+MIN_SCORE_RATIO = 0.3
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    토큰 수 근사치 (tiktoken 없이 계산).
+    영문/숫자는 약 4자당 1토큰, 태국어·한중일 등 비ASCII 문자는 약 1.5자당 1토큰으로 봅니다.
+    """
+    ascii_chars = sum(1 for char in text if ord(char) < 128)
+    other_chars = len(text) - ascii_chars
+    return int(math.ceil(ascii_chars / 4 + other_chars / 1.5))
+
+
+def _is_latin(token: str) -> bool:
+    # 기본 라틴 + 라틴 확장 + 베트남어 확장 범위
+    return all(ord(char) < 0x250 or 0x1E00 <= ord(char) <= 0x1EFF for char in token)
+
+
+def retrieval_terms(text: str) -> List[str]:
+    """
+    검색용 단어 목록. 띄어쓰기가 없는 태국어/중국어/일본어 등은
+    문자 2-gram 으로 나누어 언어에 관계없이 같은 방식으로 비교합니다.
+    """
+    terms: List[str] = []
+    for token in TOKEN_PATTERN.findall(text.lower()):
+        if _is_latin(token):
+            terms.append(token)
+        elif len(token) == 1:
+            terms.append(token)
+        else:
+            terms.extend(token[i:i + 2] for i in range(len(token) - 1))
+    return terms
+
+
+class InfoSection:
+    """company_info 의 한 섹션 (제목 + 질문/답변 문단)"""
+    __slots__ = ('order', 'heading', 'text', 'tokens', 'term_freqs', 'length', 'pinned')
+
+    def __init__(self, order: int, heading: str, text: str, pinned: bool = False):
+        self.order = order
+        self.heading = heading
+        self.text = text
+        self.tokens = estimate_tokens(text)
+        terms = retrieval_terms(f"{heading}\n{text}")
+        self.length = len(terms)
+        self.term_freqs: Dict[str, int] = {}
+        for term in terms:
+            self.term_freqs[term] = self.term_freqs.get(term, 0) + 1
+        self.pinned = pinned
+
+
+def split_sections(content: str) -> List[InfoSection]:
+    """'##' 제목과 빈 줄을 기준으로 섹션 분리. 첫 번째 '##' 섹션(회사 기본 정보)은 항상 포함되도록 고정합니다."""
+    sections: List[InfoSection] = []
+    heading = ''
+    heading_count = 0
+    paragraph: List[str] = []
+
+    def flush():
+        text = "\n".join(paragraph).strip()
+        paragraph.clear()
+        if text:
+            pinned = heading_count <= 1 if heading else not sections
+            sections.append(InfoSection(len(sections), heading, text, pinned))
+
+    for line in content.splitlines():
+        match = HEADING_PATTERN.match(line.strip())
+        if match:
+            flush()
+            # '#' 하나짜리 문서 제목은 섹션 제목으로 쓰지 않음
+            if len(match.group(1)) >= 2:
+                heading = match.group(2)
+                heading_count += 1
+            continue
+        if not line.strip():
+            flush()
+            continue
+        paragraph.append(line.rstrip())
+    flush()
+    return sections
+
+
+class InfoSelection:
+    """질문 하나에 대해 선택된 섹션과 토큰 절약 보고"""
+    __slots__ = ('text', 'sections', 'total_sections', 'used_tokens', 'full_tokens')
+
+    def __init__(self, text: str, sections: List[InfoSection], total_sections: int, used_tokens: int, full_tokens: int):
+        self.text = text
+        self.sections = sections
+        self.total_sections = total_sections
+        self.used_tokens = used_tokens
+        self.full_tokens = full_tokens
+
+    @property
+    def saved_tokens(self) -> int:
+        return max(0, self.full_tokens - self.used_tokens)
+
+    def report(self) -> Dict[str, int]:
+        return {
+            "sections_used": len(self.sections),
+            "sections_total": self.total_sections,
+            "used_tokens": self.used_tokens,
+            "full_tokens": self.full_tokens,
+            "saved_tokens": self.saved_tokens,
+        }
+
+
+class CompanyInfoIndex:
+    """한 언어의 company_info 파일에 대한 BM25 섹션 색인"""
+
+    def __init__(self, content: str):
+        self.source = content
+        self.sections = split_sections(content)
+        self.full_tokens = estimate_tokens(content)
+        self.avg_length = (sum(s.length for s in self.sections) / len(self.sections)) if self.sections else 0.0
+        doc_freqs: Dict[str, int] = {}
+        for section in self.sections:
+            for term in section.term_freqs:
+                doc_freqs[term] = doc_freqs.get(term, 0) + 1
+        total = len(self.sections)
+        self.idf = {term: math.log(1 + (total - df + 0.5) / (df + 0.5)) for term, df in doc_freqs.items()}
+
+    def score(self, section: InfoSection, query_terms: List[str]) -> float:
+        score = 0.0
+        norm = BM25_K1 * (1 - BM25_B + BM25_B * section.length / (self.avg_length or 1))
+        for term in query_terms:
+            freq = section.term_freqs.get(term)
+            if freq:
+                score += self.idf.get(term, 0.0) * freq * (BM25_K1 + 1) / (freq + norm)
+        return score
+
+    def select(self, query: str, token_budget: int) -> InfoSelection:
+        """고정 섹션 + 질문과 관련도가 높은 섹션을 토큰 예산 안에서 선택 (원문 순서 유지)"""
+        if token_budget <= 0 or self.full_tokens <= token_budget:
+            return InfoSelection(self.source, self.sections, len(self.sections), self.full_tokens, self.full_tokens)
+
+        query_terms = list(dict.fromkeys(retrieval_terms(query)))
+        chosen: List[InfoSection] = []
+        used = 0
+        for section in self.sections:
+            if section.pinned and used + section.tokens <= token_budget:
+                chosen.append(section)
+                used += section.tokens
+
+        ranked = sorted(
+            ((self.score(section, query_terms), section) for section in self.sections if not section.pinned),
+            key=lambda item: (-item[0], item[1].order)
+        )
+        best = ranked[0][0] if ranked else 0.0
+        for score, section in ranked:
+            # 최고 점수 대비 관련도가 너무 낮은 섹션은 예산이 남아도 넣지 않음
+            if score <= 0 or score < best * MIN_SCORE_RATIO:
+                break
+            if used + section.tokens > token_budget:
+                continue
+            chosen.append(section)
+            used += section.tokens
+
+        chosen.sort(key=lambda section: section.order)
+        text = self.render(chosen)
+        return InfoSelection(text, chosen, len(self.sections), estimate_tokens(text), self.full_tokens)
+
+    @staticmethod
+    def render(sections: List[InfoSection]) -> str:
+        parts: List[str] = []
+        heading: Optional[str] = None
+        for section in sections:
+            if section.heading and section.heading != heading:
+                parts.append(f"## {section.heading}")
+                heading = section.heading
+            parts.append(section.text + "\n")
+        return "\n".join(parts).strip()
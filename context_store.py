@@ -0,0 +1,224 @@
+# -*- coding: utf-8 -*-
+"""
+사용자별 최근 대화 컨텍스트 저장소.
+
+LINE 사용자는 계속 늘어나므로, 사용자 수/메모리 상한을 넘으면 가장 오래
+대화하지 않은 사용자부터 지우고(LRU), 일정 시간 대화가 없는 사용자는 만료시킵니다.
+"""
+import json
+import logging
+import sys
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+from state_backend import StateBackend, generation_key
+
+logger = logging.getLogger(__name__)
+
+# GPT 프롬프트에는 이전 답변 앞부분만 쓰이므로 그만큼만 보관
+MAX_RESPONSE_CHARS = 200
+MAX_MESSAGE_CHARS = 500
+
+# 턴/사용자 한 건당 대략적인 고정 오버헤드 (객체, 리스트 슬롯, dict 항목)
+TURN_OVERHEAD_BYTES = 120
+USER_OVERHEAD_BYTES = 200
+
+
+class ContextTurn:
+    """대화 한 턴 (질문 + 답변 앞부분)"""
+    __slots__ = ('timestamp', 'user_message', 'bot_response', 'language')
+
+    def __init__(self, timestamp: float, user_message: str, bot_response: str, language: str):
+        self.timestamp = timestamp
+        self.user_message = user_message
+        self.bot_response = bot_response
+        self.language = language
+
+    def size(self) -> int:
+        """대략적인 메모리 사용량 (바이트)"""
+        return TURN_OVERHEAD_BYTES + sys.getsizeof(self.user_message) + sys.getsizeof(self.bot_response)
+
+
+class _UserContext:
+    __slots__ = ('turns', 'last_seen', 'size')
+
+    def __init__(self):
+        self.turns: List[ContextTurn] = []
+        self.last_seen = 0.0
+        self.size = USER_OVERHEAD_BYTES
+
+
+class ContextStore:
+    """
+    사용자 id → 최근 대화 턴 목록.
+
+    - max_turns: 사용자당 보관할 턴 수
+    - max_users / max_bytes: 넘으면 가장 오래 대화하지 않은 사용자부터 제거 (LRU)
+    - idle_ttl: 마지막 대화 후 이 시간(초)이 지나면 만료
+    """
+
+    def __init__(self, max_users: int = 5000, max_turns: int = 3, idle_ttl: float = 1800.0,
+                 max_bytes: int = 16 * 1024 * 1024):
+        self.max_users = max_users
+        self.max_turns = max_turns
+        self.idle_ttl = idle_ttl
+        self.max_bytes = max_bytes
+        self._users: 'OrderedDict[str, _UserContext]' = OrderedDict()
+        self._lock = threading.Lock()
+        self.total_bytes = 0
+        self.lru_evictions = 0
+        self.memory_evictions = 0
+        self.expirations = 0
+
+    def _remove(self, user_id: str) -> None:
+        context = self._users.pop(user_id)
+        self.total_bytes -= context.size
+
+    def _expire(self, now: float) -> None:
+        # OrderedDict 는 마지막 대화 순서이므로 앞쪽부터 만료된 사용자만 확인
+        while self._users:
+            user_id, context = next(iter(self._users.items()))
+            if now - context.last_seen <= self.idle_ttl:
+                break
+            self._remove(user_id)
+            self.expirations += 1
+
+    def add(self, user_id: str, message: str, response: str, language: str) -> None:
+        """대화 한 턴 추가"""
+        now = time.time()
+        turn = ContextTurn(now, message[:MAX_MESSAGE_CHARS], response[:MAX_RESPONSE_CHARS], language)
+        with self._lock:
+            self._expire(now)
+            context = self._users.get(user_id)
+            if context is None:
+                context = self._users[user_id] = _UserContext()
+                self.total_bytes += context.size
+            else:
+                self._users.move_to_end(user_id)
+            context.last_seen = now
+
+            context.turns.append(turn)
+            added = turn.size()
+            removed = sum(old.size() for old in context.turns[:-self.max_turns])
+            del context.turns[:-self.max_turns]
+            context.size += added - removed
+            self.total_bytes += added - removed
+
+            while len(self._users) > self.max_users:
+                self._remove(next(iter(self._users)))
+                self.lru_evictions += 1
+            while self.total_bytes > self.max_bytes and len(self._users) > 1:
+                self._remove(next(iter(self._users)))
+                self.memory_evictions += 1
+
+    def recent(self, user_id: str, count: Optional[int] = None) -> List[ContextTurn]:
+        """최근 count 개 턴 (만료되었거나 없으면 빈 리스트)"""
+        with self._lock:
+            context = self._users.get(user_id)
+            if context is None:
+                return []
+            if time.time() - context.last_seen > self.idle_ttl:
+                self._remove(user_id)
+                self.expirations += 1
+                return []
+            turns = context.turns if count is None else context.turns[-count:]
+            return list(turns)
+
+    def clear(self) -> int:
+        """전체 삭제. 삭제된 사용자 수를 반환"""
+        with self._lock:
+            removed = len(self._users)
+            self._users.clear()
+            self.total_bytes = 0
+            return removed
+
+    def __len__(self) -> int:
+        return len(self._users)
+
+    def stats(self) -> Dict[str, object]:
+        with self._lock:
+            self._expire(time.time())
+            return {
+                "users": len(self._users),
+                "turns": sum(len(context.turns) for context in self._users.values()),
+                "approx_bytes": self.total_bytes,
+                "max_users": self.max_users,
+                "max_bytes": self.max_bytes,
+                "idle_ttl_seconds": self.idle_ttl,
+                "lru_evictions": self.lru_evictions,
+                "memory_evictions": self.memory_evictions,
+                "expirations": self.expirations,
+            }
+
+
+class SharedContextStore:
+    """
+    여러 워커가 공유하는 대화 컨텍스트 (SQLite/Redis StateBackend 사용).
+    사용자마다 키 하나에 최근 턴을 JSON 으로 저장하고, 유휴 만료는 저장소 TTL 로 처리합니다.
+    사용자 수 상한 대신 저장소 자체의 용량 정책(Redis maxmemory 등)에 맡깁니다.
+    """
+
+    def __init__(self, backend: StateBackend, max_turns: int = 3, idle_ttl: float = 1800.0):
+        self.backend = backend
+        self.max_turns = max_turns
+        self.idle_ttl = idle_ttl
+        self._generation_key = generation_key('context')
+        self.writes = 0
+        self.errors = 0
+
+    def _key(self, user_id: str) -> str:
+        return f"ctx:{self.backend.get_int(self._generation_key)}:{user_id}"
+
+    def _load(self, key: str) -> List[ContextTurn]:
+        raw = self.backend.get(key)
+        if not raw:
+            return []
+        return [ContextTurn(*row) for row in json.loads(raw)]
+
+    def add(self, user_id: str, message: str, response: str, language: str) -> None:
+        turn = ContextTurn(time.time(), message[:MAX_MESSAGE_CHARS], response[:MAX_RESPONSE_CHARS], language)
+        try:
+            key = self._key(user_id)
+            turns = (self._load(key) + [turn])[-self.max_turns:]
+            payload = json.dumps([[t.timestamp, t.user_message, t.bot_response, t.language] for t in turns],
+                                 ensure_ascii=False)
+            self.backend.set(key, payload, ttl=self.idle_ttl)
+            self.writes += 1
+        except Exception as e:
+            self.errors += 1
+            logger.warning(f"⚠️ 공유 대화 컨텍스트 저장 실패: {e}")
+
+    def recent(self, user_id: str, count: Optional[int] = None) -> List[ContextTurn]:
+        try:
+            turns = self._load(self._key(user_id))
+        except Exception as e:
+            self.errors += 1
+            logger.warning(f"⚠️ 공유 대화 컨텍스트 조회 실패: {e}")
+            return []
+        return turns if count is None else turns[-count:]
+
+    def clear(self) -> int:
+        """공유 세대 번호를 올려 모든 사용자 컨텍스트를 무효화 (삭제 수는 알 수 없으므로 0 반환)"""
+        try:
+            self.backend.incr(self._generation_key)
+        except Exception as e:
+            self.errors += 1
+            logger.warning(f"⚠️ 공유 대화 컨텍스트 초기화 실패: {e}")
+        return 0
+
+    def stats(self) -> Dict[str, object]:
+        try:
+            generation: Optional[int] = self.backend.get_int(self._generation_key)
+        except Exception as e:
+            self.errors += 1
+            logger.warning(f"⚠️ 공유 대화 컨텍스트 세대 번호 조회 실패: {e}")
+            generation = None
+        return {
+            "backend": self.backend.name,
+            "generation": generation,
+            "idle_ttl_seconds": self.idle_ttl,
+            "writes": self.writes,
+            "errors": self.errors,
+        }
@@ -3,8 +3,8 @@
 # ==============================================================================
 # 1. 모듈 임포트 (Imports)
 # ==============================================================================
+import atexit
 import base64
-import glob
 import hashlib
 import hmac
 import json
@@ -12,14 +12,34 @@ import logging
 import os
 import re
 import threading
+import time
 from datetime import datetime
-from typing import Dict, List, Optional, Tuple, Any
+from typing import Dict, Iterator, List, Optional, Tuple, Any
 
-import requests
 from dotenv import load_dotenv
-from flask import Flask, jsonify, render_template, request
+from flask import Flask, Response, jsonify, render_template, request, stream_with_context
 from openai import OpenAI
 
+from catalog_snapshot import CatalogSnapshot, CatalogStore
+from chat_log_writer import ChatLogWriter
+from company_info_index import CompanyInfoIndex, InfoSelection, estimate_tokens
+from context_store import ContextStore, SharedContextStore
+from keyword_matcher import AhoCorasickMatcher, KeywordHits
+from language_detector import detect_language
+from message_analysis import MessageAnalysis, MessageAnalyzer
+from metrics import MetricsRegistry, StageTracer
+from model_router import ModelRouter
+from line_client import DEFAULT_API_BASE, LineClient
+from line_worker import LineWorkQueue
+from price_catalog import PriceCatalog
+from price_list_loader import PriceListLoader, PriceListWatcher, ReloadReport
+from quote_engine import build_quote, extract_quantity, format_quote
+from product_index import ProductIndex
+from response_cache import ResponseCache, SharedResponseCache
+from semantic_cache import SemanticCache
+from state_backend import create_backend, generation_key
+from usage_tracker import UsageTracker
+
 # ==============================================================================
 # 2. 기본 설정 (Initial Setup)
 # ==============================================================================
@@ -45,21 +65,42 @@ app = Flask(__name__)
 # 4. 전역 변수 및 상수 정의 (Globals & Constants)
 # ==============================================================================
 CHAT_LOG_DIR = "save_chat"
+# 채팅 로그 파일 하나의 최대 크기, 한 번에 쓰는 건수, 최대 대기 시간 (초)
+CHAT_LOG_MAX_BYTES = int(os.getenv("CHAT_LOG_MAX_BYTES", str(10 * 1024 * 1024)))
+CHAT_LOG_BATCH_SIZE = int(os.getenv("CHAT_LOG_BATCH_SIZE", "50"))
+CHAT_LOG_FLUSH_INTERVAL = float(os.getenv("CHAT_LOG_FLUSH_INTERVAL", "1"))
+# OpenAI 토큰 사용량 기록 폴더와 파일에 쓰는 주기 (초)
+# OPENAI_PRICES 로 모델 가격 지정 가능: {"gpt-4o": [input, cached input, output]} (100만 토큰당 USD)
+USAGE_LOG_DIR = os.getenv("USAGE_LOG_DIR", "usage_log")
+USAGE_FLUSH_INTERVAL = float(os.getenv("USAGE_FLUSH_INTERVAL", "60"))
 
 # 전역 변수 초기화
-product_data_cache: Dict[str, str] = {}
-product_last_update: Optional[datetime] = None
-language_data_cache: Dict[str, str] = {}
-user_context_cache: Dict[str, List[Dict[str, Any]]] = {}
+# 제품 파일/색인/가격 카탈로그/회사 정보는 불변 스냅샷으로 관리 (다시 읽으면 새 스냅샷으로 교체)
+catalog_store = CatalogStore()
+company_info_token_stats = {"requests": 0, "full_tokens": 0, "used_tokens": 0, "saved_tokens": 0}
+# 웹 요청 스레드와 LINE 워커 스레드가 함께 갱신하므로 잠금 안에서만 더함
+company_info_token_stats_lock = threading.Lock()
 app_initialized = False
+app_init_lock = threading.Lock()
 
 # OpenAI, LINE, Admin 설정
+# OPENAI_BASE_URL 을 지정하면 해당 주소로 호출 (부하 테스트: benchmarks/fake_openai_server.py)
+OPENAI_BASE_URL = os.getenv("OPENAI_BASE_URL") or None
+OPENAI_TIMEOUT = float(os.getenv("OPENAI_TIMEOUT", "25"))
+# 429/5xx/연결 오류 시 SDK 자동 재시도 횟수
+OPENAI_MAX_RETRIES = int(os.getenv("OPENAI_MAX_RETRIES", "2"))
+# 간단한 질문은 gpt-4o-mini 로 보내는 모델 선택 정책 (JSON, model_router.DEFAULT_POLICY 항목을 덮어씀)
+# 예: {"mode": "default"} 이면 항상 gpt-4o
+MODEL_ROUTER_POLICY = os.getenv("MODEL_ROUTER_POLICY")
 try:
     openai_api_key = os.getenv("OPENAI_API_KEY")
     if not openai_api_key:
         raise ValueError("OPENAI_API_KEY가 .env 파일에 없습니다.")
-    client = OpenAI(api_key=openai_api_key)
-    logger.info("✅ OpenAI 클라이언트가 성공적으로 초기화되었습니다.")
+    client = OpenAI(api_key=openai_api_key, base_url=OPENAI_BASE_URL, max_retries=OPENAI_MAX_RETRIES)
+    if OPENAI_BASE_URL:
+        logger.info(f"✅ OpenAI 클라이언트가 성공적으로 초기화되었습니다. (base URL: {OPENAI_BASE_URL})")
+    else:
+        logger.info("✅ OpenAI 클라이언트가 성공적으로 초기화되었습니다.")
 except Exception as e:
     logger.error(f"❌ OpenAI 클라이언트 초기화 실패: {e}")
     client = None
@@ -68,6 +109,97 @@ LINE_TOKEN = os.getenv("LINE_TOKEN") or os.getenv("LINE_CHANNEL_ACCESS_TOKEN")
 LINE_SECRET = os.getenv("LINE_CHANNEL_SECRET") or os.getenv("LINE_SECRET")
 ADMIN_API_KEY = os.getenv("ADMIN_API_KEY")
 
+# GPT 프롬프트에 넣을 회사 정보 섹션의 토큰 예산 (0 이면 파일 전체 사용)
+COMPANY_INFO_TOKEN_BUDGET = int(os.getenv("COMPANY_INFO_TOKEN_BUDGET", "1500"))
+
+# 워커 간 공유 상태 저장소 (memory / sqlite:///state.db / redis://host:6379/0)
+state_backend = create_backend(os.getenv("STATE_BACKEND"))
+# 다른 워커의 데이터 다시 읽기를 확인하는 간격 (초)
+STATE_SYNC_INTERVAL = float(os.getenv("STATE_SYNC_INTERVAL", "1"))
+DATA_GENERATION_KEY = generation_key("data")
+data_generation = 0
+data_generation_checked_at = 0.0
+if not state_backend.shared and int(os.getenv("WEB_CONCURRENCY", "1")) > 1:
+    logger.warning("⚠️ WEB_CONCURRENCY > 1 이지만 STATE_BACKEND 가 memory 입니다. 워커마다 대화 컨텍스트/캐시가 따로 관리됩니다.")
+logger.info(f"🗄️ 상태 저장소: {state_backend.name}")
+
+# 일반 질문 GPT 응답 캐시 (크기 또는 TTL 이 0 이면 비활성화)
+RESPONSE_CACHE_SIZE = int(os.getenv("RESPONSE_CACHE_SIZE", "512"))
+RESPONSE_CACHE_TTL = int(os.getenv("RESPONSE_CACHE_TTL", "3600"))
+if state_backend.shared:
+    response_cache = SharedResponseCache(state_backend, RESPONSE_CACHE_TTL, RESPONSE_CACHE_SIZE)
+else:
+    response_cache = ResponseCache(RESPONSE_CACHE_SIZE, RESPONSE_CACHE_TTL)
+
+# price_list 증분 로더 (수정 시각/크기가 바뀐 파일만 다시 읽음)
+price_list_loader = PriceListLoader("price_list")
+product_reload_lock = threading.Lock()
+# price_list 폴더 자동 감시 간격 (초, 0 이면 끔. /reload-products 로만 다시 읽음)
+PRICE_LIST_WATCH_INTERVAL = float(os.getenv("PRICE_LIST_WATCH_INTERVAL", "0"))
+
+# 오타/바꿔 말하기 등 유사 질문 캐시 (언어당 항목 수, 0 이면 비활성화)
+SEMANTIC_CACHE_SIZE = int(os.getenv("SEMANTIC_CACHE_SIZE", "256"))
+semantic_cache = SemanticCache(SEMANTIC_CACHE_SIZE, RESPONSE_CACHE_TTL)
+
+# 사용자별 대화 컨텍스트 (사용자 수/메모리 상한 LRU + 유휴 만료, 공유 저장소면 저장소 TTL 로 만료)
+if state_backend.shared:
+    user_context_store = SharedContextStore(
+        state_backend, max_turns=3, idle_ttl=int(os.getenv("CONTEXT_IDLE_TTL", "1800"))
+    )
+else:
+    user_context_store = ContextStore(
+        max_users=int(os.getenv("CONTEXT_MAX_USERS", "5000")),
+        max_turns=3,
+        idle_ttl=int(os.getenv("CONTEXT_IDLE_TTL", "1800")),
+        max_bytes=int(os.getenv("CONTEXT_MAX_BYTES", str(16 * 1024 * 1024)))
+    )
+
+# 처리 단계별 지연 시간과 요청/캐시/폴백/오류 지표 (/metrics, Prometheus 텍스트 형식)
+metrics = MetricsRegistry()
+request_seconds = metrics.histogram(
+    "saboo_request_duration_seconds", "End-to-end request latency by endpoint and response route", ("endpoint", "route"))
+stage_seconds = metrics.histogram(
+    "saboo_stage_duration_seconds", "Latency of each processing stage", ("stage",))
+requests_total = metrics.counter(
+    "saboo_requests_total", "Handled messages by endpoint and response route", ("endpoint", "route"))
+cache_lookups_total = metrics.counter(
+    "saboo_cache_lookups_total", "Response cache lookups by cache and result", ("cache", "result"))
+fallbacks_total = metrics.counter(
+    "saboo_fallbacks_total", "English fallback responses by reason", ("reason",))
+errors_total = metrics.counter(
+    "saboo_errors_total", "Errors by stage", ("stage",))
+openai_requests_total = metrics.counter(
+    "saboo_openai_requests_total", "OpenAI chat completion calls by model, mode and outcome", ("model", "mode", "outcome"))
+model_decisions_total = metrics.counter(
+    "saboo_model_decisions_total", "Model router decisions by model and reason", ("model", "reason"))
+line_queue_wait_seconds = metrics.histogram(
+    "saboo_line_queue_wait_seconds", "Time LINE events wait in the work queue before a worker picks them up")
+metrics.gauge_function("saboo_line_queue_depth", "LINE events waiting in the work queue",
+                       lambda: line_work_queue.stats()["depth"])
+metrics.gauge_function("saboo_chat_log_queue_size", "Chat log records waiting to be written",
+                       lambda: chat_log_writer.stats()["pending"])
+tracer = StageTracer(stage_seconds)
+
+def finish_request_metrics(endpoint: str, route: str, started: float) -> Dict[str, float]:
+    """요청 하나의 전체 지연/경로를 기록하고 단계별 시간(ms)을 돌려줌"""
+    elapsed = time.perf_counter() - started
+    request_seconds.observe(elapsed, endpoint=endpoint, route=route)
+    requests_total.inc(endpoint=endpoint, route=route)
+    stages_ms = tracer.finish()
+    logger.info(f"⏱️ {endpoint} {route} {elapsed * 1000:.0f}ms: {StageTracer.summary(stages_ms)}")
+    return stages_ms
+
+# LINE 웹훅 이벤트 백그라운드 처리 (동시 처리 이벤트 수 상한, 대기 큐 크기)
+LINE_MAX_CONCURRENCY = int(os.getenv("LINE_MAX_CONCURRENCY") or os.getenv("LINE_WORKERS", "4"))
+LINE_QUEUE_SIZE = int(os.getenv("LINE_QUEUE_SIZE", "100"))
+
+# LINE API 공용 HTTP 클라이언트 (연결 풀 + keep-alive + 재시도)
+LINE_API_BASE = os.getenv("LINE_API_BASE", DEFAULT_API_BASE)
+line_client = LineClient(
+    LINE_TOKEN, base_url=LINE_API_BASE, pool_size=max(LINE_MAX_CONCURRENCY, 2),
+    retries=int(os.getenv("LINE_API_RETRIES", "3")), backoff=0.5, timeout=10
+)
+
 if not LINE_TOKEN:
     logger.error("❌ LINE_TOKEN 또는 LINE_CHANNEL_ACCESS_TOKEN을 찾을 수 없습니다!")
 if not LINE_SECRET:
@@ -148,9 +280,40 @@ INTENT_KEYWORDS = {
         'feature', 'how to', 'ingredient', 'difference', 'what is', 'why', 'benefit', 'use',
         'คุณสมบัติ', 'วิธีใช้', 'ส่วนผสม', 'ความแตกต่าง', 'ทำไม', 'ประโยชน์',
         '특성', '설명', '어떤', '무엇인', '구성', '장단점'
+    ],
+    # 회사 자료의 정확한 사실(연락처, 주소, 배송/환불 정책, 도매)이 필요한 질문 - 모델 선택에 사용
+    'company_facts': [
+        'phone', 'telephone', 'call', 'contact', 'line id', 'email', 'e-mail', 'website', 'address', 'location',
+        'located', 'where', 'branch', 'directions', 'shipping', 'ship to', 'delivery', 'deliver', 'refund',
+        'return policy', 'exchange', 'wholesale', 'distributor', 'dealer', 'barcode', 'fda',
+        '전화', '번호', '연락처', '주소', '위치', '어디', '매장', '지점', '배송', '환불', '교환', '도매', '대리점', '이메일', '홈페이지',
+        'เบอร์', 'โทร', 'ติดต่อ', 'ที่อยู่', 'ที่ไหน', 'สาขา', 'จัดส่ง', 'คืนเงิน', 'ขายส่ง', 'ตัวแทน',
+        '電話', '連絡', '住所', '場所', 'どこ', '店舗', '配送', '発送', '返品', '返金', '卸',
+        '电话', '联系', '地址', '位置', '哪里', '在哪', '门店', '分店', '发货', '快递', '退货', '退款', '批发', '代理',
+        'teléfono', 'telefono', 'contacto', 'dirección', 'direccion', 'ubicación', 'dónde', 'donde', 'tienda',
+        'envío', 'envio', 'reembolso', 'devolución', 'mayorista', 'distribuidor',
+        'telefon', 'kontakt', 'adresse', 'standort', 'wo', 'laden', 'versand', 'lieferung', 'rückerstattung',
+        'großhandel', 'händler',
+        'téléphone', 'magasin', 'boutique', 'livraison', 'remboursement', 'grossiste', 'distributeur', 'où',
+        'телефон', 'контакт', 'адрес', 'где', 'магазин', 'доставка', 'возврат', 'оптом'
     ]
 }
 
+# 검색 점수 계산용 키워드 집합 (요청마다 리스트를 훑지 않도록 미리 생성)
+PRODUCT_NAME_KEYWORDS = frozenset(INTENT_KEYWORDS['product_names'])
+SPECIFIC_PRODUCT_KEYWORDS = frozenset(['peppermint', 'mango', 'banana', 'jasmine', 'lavender', 'elephant', 'duck', 'bear', 'dinosaur'])
+GENERIC_PRODUCT_KEYWORDS = frozenset(['soap', '비누', 'fancy', '팬시'])
+
+# SKU 단위 제품 검색 결과로 보여줄 최대 줄 수
+MAX_SKU_LINES = 10
+# SKU 줄 점수화에서 뺄 단어: 요청 표현/가격·목록 의도 단어 ('me' 가 MELON 에 부분 일치하는 것 등 방지)
+SKU_STOPWORDS = frozenset([
+    'a', 'an', 'the', 'i', 'me', 'my', 'we', 'you', 'your', 'do', 'does', 'is', 'are', 'can', 'could', 'please',
+    'what', 'which', 'how', 'much', 'many', 'any', 'some', 'all', 'of', 'for', 'to', 'in', 'on', 'with', 'and',
+    'or', 'have', 'has', 'want', 'need', 'give', 'tell', 'about', 'show', 'list', 'there', 'it', 'this', 'that',
+]) | frozenset(keyword for category in ('purchase_intent', 'list_intent')
+                for keyword in INTENT_KEYWORDS[category] if ' ' not in keyword)
+
 # 🔥 포괄적인 다국어 제품명 매핑 테이블
 PRODUCT_NAME_MAPPING = {
     # 페퍼민트/민트 관련 (7개 언어)
@@ -304,6 +467,25 @@ MORE_INFO_KEYWORDS = {
     'russian': ['подробнее', 'расскажите больше', 'больше информации', 'подробное объяснение']
 }
 
+# 메시지 전체가 이 중 하나면 GPT 없이 환영 인사로 답함 (LINE)
+WELCOME_KEYWORDS = ["สวัสดี", "หวัดดี", "hello", "hi", "สวัสดีค่ะ", "สวัสดีครับ", "ดีจ้า", "เริ่ม", "안녕하세요", "안녕", "こんにちは", "你好", "नमस्ते"]
+
+def build_keyword_matcher() -> AhoCorasickMatcher:
+    """INTENT_KEYWORDS / MORE_INFO_KEYWORDS / PRODUCT_NAME_MAPPING 을 하나의 오토마톤으로 컴파일"""
+    matcher = AhoCorasickMatcher()
+    for category, keywords in INTENT_KEYWORDS.items():
+        for keyword in keywords:
+            matcher.add(keyword, category)
+    for lang, keywords in MORE_INFO_KEYWORDS.items():
+        for keyword in keywords:
+            matcher.add(keyword, 'more_info', lang)
+    for order, (local_name, english_name) in enumerate(PRODUCT_NAME_MAPPING.items()):
+        matcher.add(local_name, 'product_mapping', (order, english_name))
+    return matcher.build()
+
+# 앱 시작 시 한 번만 컴파일 (메시지당 한 번의 스캔으로 모든 키워드 검출)
+KEYWORD_MATCHER = build_keyword_matcher()
+
 # 🔥 개선된 시스템 메시지 - 정확한 정보 우선
 NATURAL_SYSTEM_MESSAGE = """You are a knowledgeable and friendly customer service representative for SABOO THAILAND, a natural soap and bath product company.
 
@@ -366,19 +548,19 @@ def process_response_length(text: str, language: str, max_length: int = 500) ->
         logger.error(f"❌ 응답 길이 처리 중 오류: {e}")
         return text, False
 
-def is_more_info_request(user_message: str, detected_language: str) -> bool:
+def scan_keywords(user_message: str) -> KeywordHits:
+    """메시지를 한 번 훑어서 의도/더보기/제품명 매핑 키워드를 모두 찾기"""
+    return KEYWORD_MATCHER.scan(user_message.lower())
+
+def analyze_message(user_message: str) -> MessageAnalysis:
+    """메시지 분석 단계: 언어/정규화/단어/키워드 스캔을 한 번에 (이후 단계는 결과를 재사용)"""
+    return message_analyzer.analyze(user_message)
+
+def is_more_info_request(user_message: str, detected_language: str, analysis: Optional[MessageAnalysis] = None) -> bool:
     """사용자가 더 자세한 정보를 요청하는지 확인"""
     try:
-        user_message_lower = user_message.lower().strip()
-        if detected_language in MORE_INFO_KEYWORDS:
-            for keyword in MORE_INFO_KEYWORDS[detected_language]:
-                if keyword.lower() in user_message_lower:
-                    return True
-        for lang_keywords in MORE_INFO_KEYWORDS.values():
-            for keyword in lang_keywords:
-                if keyword.lower() in user_message_lower:
-                    return True
-        return False
+        analysis = analysis or analyze_message(user_message)
+        return analysis.hits.has('more_info')
     except Exception as e:
         logger.error(f"❌ 더 자세한 정보 요청 감지 중 오류: {e}")
         return False
@@ -386,136 +568,136 @@ def is_more_info_request(user_message: str, detected_language: str) -> bool:
 def save_user_context(user_id: str, message: str, response: str, language: str):
     """사용자별 최근 대화 컨텍스트 저장"""
     try:
-        if user_id not in user_context_cache:
-            user_context_cache[user_id] = []
-        
         clean_response = re.sub(r'<[^>]+>', '', response)
-
-        user_context_cache[user_id].append({
-            'timestamp': datetime.now(),
-            'user_message': message,
-            'bot_response': clean_response,
-            'language': language
-        })
-        
-        if len(user_context_cache[user_id]) > 3:
-            user_context_cache[user_id] = user_context_cache[user_id][-3:]
+        user_context_store.add(user_id, message, clean_response, language)
     except Exception as e:
         logger.error(f"❌ 사용자 컨텍스트 저장 중 오류: {e}")
 
 def get_user_context(user_id: str) -> str:
     """사용자의 최근 대화 컨텍스트 가져오기"""
     try:
-        if user_id not in user_context_cache:
-            return ""
         context_parts = []
-        for ctx in user_context_cache[user_id][-2:]:
-            context_parts.append(f"Previous Q: {ctx['user_message']}")
-            context_parts.append(f"Previous A: {ctx['bot_response'][:200]}...")
+        for turn in user_context_store.recent(user_id, 2):
+            context_parts.append(f"Previous Q: {turn.user_message}")
+            context_parts.append(f"Previous A: {turn.bot_response[:200]}...")
         return "\n".join(context_parts) if context_parts else ""
     except Exception as e:
         logger.error(f"❌ 사용자 컨텍스트 가져오기 중 오류: {e}")
         return ""
 
-def load_product_files():
-    """price_list 폴더에서 모든 제품 파일을 로드하여 캐시에 저장"""
-    global product_data_cache, product_last_update
+def load_product_files(force: bool = False) -> Optional[ReloadReport]:
+    """
+    price_list 폴더의 제품 파일을 증분으로 다시 읽어 캐시와 색인을 교체합니다.
+    새로 생기거나 수정된 파일만 읽고, 바뀐 파일이 없으면 색인도 그대로 둡니다.
+    새 캐시/색인을 모두 만든 뒤 한 번에 바꾸므로, 읽는 동안 들어온 요청도 이전 카탈로그 전체를 봅니다.
+    이번 호출의 ReloadReport 를 반환합니다 (실패하면 None). price_list_loader.last_report 는
+    그 사이 다른 스레드의 다시 읽기로 바뀔 수 있으므로 캐시 무효화 여부는 반환값으로 판단하세요.
+    """
     try:
-        price_list_dir = "price_list"
+        price_list_dir = price_list_loader.directory
         if not os.path.exists(price_list_dir):
             logger.warning(f"⚠️ {price_list_dir} 폴더를 찾을 수 없습니다.")
-            return False
-        
-        product_data_cache.clear()
-        
-        txt_files = glob.glob(os.path.join(price_list_dir, "*.txt"))
-        logger.info(f"📂 {len(txt_files)}개의 제품 파일을 발견했습니다.")
-        
-        for file_path in txt_files:
-            try:
-                filename = os.path.basename(file_path)
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    content = f.read().strip()
-                    if content:
-                        product_data_cache[filename] = content
-                        logger.debug(f"✅ {filename} 로드 완료 ({len(content)} 문자)")
-            except Exception as e:
-                logger.error(f"❌ {file_path} 로드 실패: {e}")
-        
-        product_last_update = datetime.now()
-        logger.info(f"✅ 총 {len(product_data_cache)}개의 제품 파일이 캐시에 로드되었습니다.")
-        return True
+            return None
+
+        with product_reload_lock:
+            started = time.perf_counter()
+            previous_index = catalog_store.current.product_index
+            contents, report = price_list_loader.reload(force=force)
+            if report.has_changes or previous_index is None or force:
+                new_index = ProductIndex(contents, previous=previous_index)
+                new_catalog = PriceCatalog.from_files(contents, parsed=price_list_loader.parsed_prices)
+                snapshot = catalog_store.update(lambda base: {
+                    "products": contents,
+                    "product_index": new_index,
+                    "price_catalog": new_catalog,
+                    "product_last_update": datetime.now(),
+                })
+                logger.info(f"💰 가격 카탈로그 생성 완료: {new_catalog.stats()} (스냅샷 v{snapshot.version})")
+            report.elapsed_ms = (time.perf_counter() - started) * 1000
+
+        logger.info(f"📂 제품 파일 다시 읽기: {report.summary()}")
+        if report.added or report.changed or report.removed:
+            logger.info(f"📝 추가 {report.added}, 변경 {report.changed}, 삭제 {report.removed}")
+        snapshot = catalog_store.current
+        logger.info(f"✅ 총 {len(snapshot.products)}개의 제품 파일이 캐시에 로드되었습니다. (색인: {snapshot.product_index.stats()})")
+        return report
     except Exception as e:
         logger.error(f"❌ 제품 파일 로드 중 오류: {e}")
-        return False
+        return None
 
-def search_products_by_keywords(user_query: str) -> List[Dict[str, Any]]:
+def on_price_list_changed():
+    """폴더 감시기가 제품 파일 변경을 감지했을 때: 다시 읽고 캐시 무효화 후 다른 워커에 알림"""
+    report = load_product_files()
+    if report is not None and report.has_changes:
+        invalidate_answer_caches()
+
+price_list_watcher = PriceListWatcher(price_list_loader, on_price_list_changed, PRICE_LIST_WATCH_INTERVAL)
+
+def search_products_by_keywords(user_query: str, analysis: Optional[MessageAnalysis] = None,
+                                snapshot: Optional[CatalogSnapshot] = None) -> List[Dict[str, Any]]:
     """사용자 쿼리에서 키워드를 추출하여 관련 제품 찾기 (🔥 다국어 매핑 강화)"""
     try:
-        user_query_lower = user_query.lower()
+        snapshot = snapshot or catalog_store.current
         found_products = []
+        analysis = analysis or analyze_message(user_query)
+        hits = analysis.hits
         
         # 의도 분석
-        is_price_query = any(keyword in user_query_lower for keyword in INTENT_KEYWORDS['purchase_intent'])
-        is_list_query = any(keyword in user_query_lower for keyword in INTENT_KEYWORDS['list_intent'])
+        is_price_query = hits.has('purchase_intent')
+        is_list_query = hits.has('list_intent')
         
         if not is_price_query and not is_list_query:
             is_list_query = True
         
         logger.info(f"🎯 쿼리 의도 분석: 가격={is_price_query}, 목록={is_list_query}")
         
-        # 🔥 다국어 제품명을 영어로 변환
-        translated_query = user_query_lower
-        for local_name, english_name in PRODUCT_NAME_MAPPING.items():
-            if local_name.lower() in user_query_lower:
-                translated_query = translated_query.replace(local_name.lower(), english_name)
-                logger.info(f"🌐 제품명 변환: '{local_name}' → '{english_name}'")
-        
-        query_words = set(re.findall(r'\b\w+\b', translated_query))
-        original_words = set(re.findall(r'\b\w+\b', user_query_lower))
-        all_search_words = query_words.union(original_words)  # 원본과 번역본 모두 검색
+        # 🔥 다국어 제품명을 영어로 변환한 단어까지 포함 (메시지 분석 단계에서 계산)
+        all_search_words = analysis.search_words
         
         logger.info(f"🔍 검색 키워드: {all_search_words}")
 
-        for filename, content in product_data_cache.items():
-            relevance_score = 0
-            matched_keywords = []
-            filename_lower = filename.lower()
+        index = snapshot.product_index
+        if index is None:
+            logger.warning("⚠️ 제품 검색 색인이 아직 준비되지 않았습니다.")
+            return []
+
+        # 의도에 맞는 파일 타입만 후보로 사용
+        required_suffix = '_price.txt' if is_price_query else '_list.txt'
+        relevance_scores: Dict[str, int] = {}
+        matched_keywords: Dict[str, List[str]] = {}
+
+        # 🔥 색인에서 후보 파일만 꺼내 점수 계산 (파일 전체 스캔 없음)
+        for keyword in all_search_words:
+            for filename in index.filename_matches(keyword):
+                if not filename.endswith(required_suffix):
+                    continue
+                # 구체적인 제품명이 파일명에 있으면 매우 높은 점수
+                if keyword in SPECIFIC_PRODUCT_KEYWORDS:
+                    relevance_scores[filename] = relevance_scores.get(filename, 0) + 15
+                    matched_keywords.setdefault(filename, []).append(keyword)
+                    logger.info(f"🎯 구체적 제품명 매칭: '{keyword}' in '{filename}'")
+                elif keyword in PRODUCT_NAME_KEYWORDS:
+                    # 일반적인 단어는 낮은 점수
+                    bonus = 3 if keyword in GENERIC_PRODUCT_KEYWORDS else 10
+                    relevance_scores[filename] = relevance_scores.get(filename, 0) + bonus
+                    matched_keywords.setdefault(filename, []).append(keyword)
+                else:
+                    relevance_scores[filename] = relevance_scores.get(filename, 0) + 1
 
-            # 의도에 맞지 않는 파일 타입은 건너뛰기
-            if is_price_query and not filename.endswith('_price.txt'):
-                continue
-            elif is_list_query and not filename.endswith('_list.txt'):
-                continue
+            # 🔥 파일 내용에서도 검색 (추가 보완)
+            for filename in index.content_matches(keyword):
+                if not filename.endswith(required_suffix):
+                    continue
+                relevance_scores[filename] = relevance_scores.get(filename, 0) + 2
+                logger.info(f"📄 파일 내용에서 매칭: '{keyword}' in '{filename}' content")
 
-            # 🔥 개선된 점수 계산 로직
-            for keyword in all_search_words:
-                if keyword in filename_lower:
-                    # 구체적인 제품명이 파일명에 있으면 매우 높은 점수
-                    if keyword in ['peppermint', 'mango', 'banana', 'jasmine', 'lavender', 'elephant', 'duck', 'bear', 'dinosaur']:
-                        relevance_score += 15  # 구체적 제품명은 높은 점수
-                        matched_keywords.append(keyword)
-                        logger.info(f"🎯 구체적 제품명 매칭: '{keyword}' in '{filename}'")
-                    elif keyword in INTENT_KEYWORDS['product_names']:
-                        if keyword not in ['soap', '비누', 'fancy', '팬시']:  # 일반적인 단어가 아닌 경우
-                            relevance_score += 10
-                        else:
-                            relevance_score += 3
-                        matched_keywords.append(keyword)
-                    else:
-                        relevance_score += 1
-                
-                # 🔥 파일 내용에서도 검색 (추가 보완)
-                if keyword in content.lower():
-                    relevance_score += 2
-                    logger.info(f"📄 파일 내용에서 매칭: '{keyword}' in '{filename}' content")
-
-            if relevance_score > 0:
+        for filename in sorted(relevance_scores, key=index.sort_key):
+            if relevance_scores[filename] > 0:
                 found_products.append({
                     'filename': filename,
-                    'content': content,
-                    'relevance_score': relevance_score,
-                    'matched_keywords': list(set(matched_keywords)),
+                    'content': index.contents[filename],
+                    'relevance_score': relevance_scores[filename],
+                    'matched_keywords': list(set(matched_keywords.get(filename, []))),
                     'file_type': 'price' if filename.endswith('_price.txt') else 'list'
                 })
         
@@ -524,7 +706,7 @@ def search_products_by_keywords(user_query: str) -> List[Dict[str, Any]]:
         if found_products:
             logger.info(f"🏆 최고 점수 파일: {found_products[0]['filename']} (점수: {found_products[0]['relevance_score']})")
         else:
-            logger.warning(f"❌ '{user_query}'에 대한 제품을 찾지 못했습니다. 사용 가능한 파일: {list(product_data_cache.keys())}")
+            logger.warning(f"❌ '{user_query}'에 대한 제품을 찾지 못했습니다. 사용 가능한 파일: {list(snapshot.products.keys())}")
         
         file_type = 'price' if is_price_query else 'list'
         logger.info(f"🔍 '{user_query}'에 대해 {len(found_products)}개의 {file_type} 파일을 찾았습니다.")
@@ -533,10 +715,17 @@ def search_products_by_keywords(user_query: str) -> List[Dict[str, Any]]:
         logger.error(f"❌ 제품 검색 중 오류: {e}")
         return []
 
-def get_product_info(user_query: str, language: str = 'english', detailed: bool = False) -> str:
-    """사용자 쿼리에 맞는 제품 정보를 순수 텍스트로 생성"""
+def get_product_info(user_query: str, language: str = 'english', detailed: bool = False,
+                     analysis: Optional[MessageAnalysis] = None, snapshot: Optional[CatalogSnapshot] = None) -> str:
+    """
+    사용자 쿼리에 맞는 제품 정보를 순수 텍스트로 생성.
+    특정 SKU 를 가리키는 줄이 있으면 그 줄들을, 목록 요청이면 파일 전체를,
+    제품군만 묻는 질문이면 가장 관련 있는 파일의 제품 줄을 최대 MAX_SKU_LINES 개 반환합니다.
+    """
     try:
-        found_products = search_products_by_keywords(user_query)
+        snapshot = snapshot or catalog_store.current
+        analysis = analysis or analyze_message(user_query)
+        found_products = search_products_by_keywords(user_query, analysis, snapshot)
         if not found_products:
             return get_no_products_message(language)
         
@@ -564,18 +753,46 @@ def get_product_info(user_query: str, language: str = 'english', detailed: bool
         }
         response_parts.append(headers[file_type].get(language, headers[file_type]['english']))
         
-        filename = top_product['filename']
-        content = top_product['content']
-        
-        if filename.endswith('_list.txt'):
-            product_name = extract_product_name(filename.replace('_list.txt', ''))
-        elif filename.endswith('_price.txt'):
-            product_name = extract_product_name(filename.replace('_price.txt', ''))
+        # 🔥 SKU(제품 한 줄) 단위 검색: 질문에 해당하는 제품 줄만 반환
+        sku_results = []
+        if snapshot.product_index is not None:
+            sku_results = snapshot.product_index.rank_sku_lines(
+                [product['filename'] for product in found_products],
+                analysis.search_words - SKU_STOPWORDS
+            )
+
+        if not sku_results and not analysis.hits.has('list_intent') and snapshot.product_index is not None:
+            # "perfume price", "비누 가격" 처럼 제품군만 묻는 질문: 가장 관련 있는 파일의 제품 줄을 앞에서부터 반환
+            filename = top_product['filename']
+            sku_results = [(filename, line, 0.0) for line in snapshot.product_index.sku_lines.get(filename, [])]
+            if sku_results:
+                logger.info(f"🗂️ 특정 제품 줄이 없어 제품군 파일 '{filename}' 의 제품 줄을 반환합니다.")
+
+        if sku_results:
+            shown_results = sku_results[:MAX_SKU_LINES]
+            logger.info(f"🎯 SKU 단위 검색: {len(sku_results)}개 줄 중 {len(shown_results)}개 반환")
+            lines_by_file: Dict[str, List[str]] = {}
+            for filename, line, _ in shown_results:
+                lines_by_file.setdefault(filename, []).append(line)
+            for filename, lines in lines_by_file.items():
+                response_parts.append(f"\n**{extract_product_name(strip_product_file_suffix(filename))}**")
+                response_parts.extend(lines)
+            if len(sku_results) > len(shown_results):
+                more_text = {
+                    'thai': f"…และอีก {len(sku_results) - len(shown_results)} รายการ",
+                    'korean': f"…외 {len(sku_results) - len(shown_results)}개 제품",
+                    'japanese': f"…他 {len(sku_results) - len(shown_results)} 商品",
+                    'chinese': f"…另有 {len(sku_results) - len(shown_results)} 款产品",
+                    'english': f"…and {len(sku_results) - len(shown_results)} more"
+                }
+                response_parts.append(more_text.get(language, more_text['english']))
+            response_parts.append("")
         else:
-            product_name = extract_product_name(filename)
-        
-        response_parts.append(f"\n**{product_name}**")
-        response_parts.append(f"{content}\n")
+            # '목록' 요청이거나 제품 줄 형식이 아닌 파일: 파일 전체 반환
+            filename = top_product['filename']
+            content = top_product['content']
+            response_parts.append(f"\n**{extract_product_name(strip_product_file_suffix(filename))}**")
+            response_parts.append(f"{content}\n")
         
         contact_info = {
             'thai': "\n📞 สำหรับข้อมูลเพิ่มเติม โทร: 02-159-9880, 085-595-9565",
@@ -591,6 +808,43 @@ def get_product_info(user_query: str, language: str = 'english', detailed: bool
         logger.error(f"❌ 제품 정보 생성 중 오류: {e}")
         return get_error_message(language)
 
+def get_quote_response(user_message: str, language: str = 'english',
+                       analysis: Optional[MessageAnalysis] = None, snapshot: Optional[CatalogSnapshot] = None) -> Optional[str]:
+    """수량이 포함된 가격 문의면 가격 구간으로 견적을 계산 (해당 없으면 None)"""
+    try:
+        price_catalog = (snapshot or catalog_store.current).price_catalog
+        if price_catalog is None or not len(price_catalog):
+            return None
+        analysis = analysis or analyze_message(user_message)
+        hits = analysis.hits
+        if not hits.has('purchase_intent'):
+            return None
+
+        quantity = extract_quantity(user_message)
+        if not quantity:
+            return None
+
+        tokens = set(analysis.search_words)
+        tokens.update(hit.payload[1] for hit in hits.get('product_mapping'))
+
+        quote = build_quote(price_catalog, quantity, tokens)
+        if quote is None:
+            logger.info(f"🧮 수량({quantity})은 있지만 제품을 특정하지 못해 견적을 건너뜁니다.")
+            return None
+
+        logger.info(f"🧮 로컬 견적 생성: 수량={quantity}, 제품 {len(quote.records)}개")
+        return format_quote(quote, language)
+    except Exception as e:
+        logger.error(f"❌ 견적 생성 중 오류: {e}")
+        return None
+
+def strip_product_file_suffix(filename: str) -> str:
+    """'_list.txt' / '_price.txt' 접미사 제거"""
+    for suffix in ('_list.txt', '_price.txt'):
+        if filename.endswith(suffix):
+            return filename[:-len(suffix)]
+    return filename
+
 def extract_product_name(filename: str) -> str:
     """파일명에서 읽기 쉬운 제품명 추출"""
     try:
@@ -621,29 +875,29 @@ def get_error_message(language: str) -> str:
     }
     return messages.get(language, messages['english'])
 
-def is_product_search_query(user_message: str) -> bool:
+def is_product_search_query(user_message: str, analysis: Optional[MessageAnalysis] = None) -> bool:
     """사용자 메시지가 제품 검색 쿼리인지 판단 (개선됨)"""
     try:
-        msg_lower = user_message.lower()
+        analysis = analysis or analyze_message(user_message)
+        hits = analysis.hits
         
         # 제품명이 포함되어 있는지 확인
-        has_product = any(keyword in msg_lower for keyword in INTENT_KEYWORDS['product_names'])
+        has_product = hits.has('product_names')
         if not has_product:
             return False
         
         # 검색 의도가 있는지 확인
-        has_search_intent = any(keyword in msg_lower for keyword in 
-                               INTENT_KEYWORDS['purchase_intent'] + INTENT_KEYWORDS['list_intent'])
+        has_search_intent = hits.has('purchase_intent', 'list_intent')
         
         # 특징/설명 질문인지 확인
-        is_feature_q = any(keyword in msg_lower for keyword in INTENT_KEYWORDS['feature_intent'])
+        is_feature_q = hits.has('feature_intent')
         
         if is_feature_q:
             logger.info("🎯 의도 분석: 설명 질문 (Q&A 처리)")
             return False
         
         # '가격' 등 검색 의도가 있거나, '망고 비누'처럼 제품명만 짧게 말한 경우
-        if has_search_intent or len(msg_lower.split()) <= 3:
+        if has_search_intent or analysis.word_count <= 3:
             logger.info("🎯 의도 분석: 제품 검색")
             return True
             
@@ -679,15 +933,22 @@ def format_text_for_line(text: str) -> str:
         return text
 
 def fetch_company_info(user_language: str) -> str:
-    """언어별 company_info.txt 파일을 읽어오고, 결과를 캐시에 저장합니다."""
-    global language_data_cache
-    
+    """언어별 회사 정보를 현재 스냅샷에서 찾고, 없으면 파일에서 읽어 새 스냅샷으로 게시합니다."""
     # 캐시 키를 언어별로 구분
     cache_key = f"company_info_{user_language}"
-    if cache_key in language_data_cache:
+    cached = catalog_store.current.company_info.get(cache_key)
+    if cached is not None:
         logger.info(f"📋 캐시된 '{user_language}' 회사 정보를 사용합니다.")
-        return language_data_cache[cache_key]
+        return cached
+
+    content = read_company_info(user_language)
+    snapshot = catalog_store.update(lambda base: None if cache_key in base.company_info else {
+        "company_info": {**base.company_info, cache_key: content}
+    })
+    return snapshot.company_info.get(cache_key, content)
 
+def read_company_info(user_language: str) -> str:
+    """언어별 company_info.txt 파일을 읽습니다. (없으면 영어 파일, 그것도 없으면 기본 정보)"""
     lang_map = {
         'thai': 'th', 'english': 'en', 'korean': 'kr', 'japanese': 'ja', 
         'german': 'de', 'spanish': 'es', 'arabic': 'ar', 'chinese': 'zh_cn', 
@@ -703,7 +964,6 @@ def fetch_company_info(user_language: str) -> str:
                 content = f.read().strip()
                 if len(content) > 20:
                     logger.info(f"✅ '{user_language}' 회사 정보를 {filepath} 파일에서 성공적으로 로드했습니다.")
-                    language_data_cache[cache_key] = content
                     return content
     except Exception as e:
         logger.error(f"❌ {filepath} 파일 로드 중 오류 발생: {e}")
@@ -716,7 +976,6 @@ def fetch_company_info(user_language: str) -> str:
                 content = f.read().strip()
                 if len(content) > 20:
                     logger.info(f"✅ 영어 버전({fallback_filepath})을 폴백으로 사용합니다.")
-                    language_data_cache[cache_key] = content
                     return content
     except Exception as e:
         logger.error(f"❌ {fallback_filepath} 파일 로드 중 오류 발생: {e}")
@@ -760,48 +1019,80 @@ Exports to over 20 countries, Website: www.saboothailand.com
 """
     }
     
-    default_info = default_info_by_lang.get(user_language, default_info_by_lang['english'])
-    language_data_cache[cache_key] = default_info
-    return default_info
+    return default_info_by_lang.get(user_language, default_info_by_lang['english'])
+
+def load_company_info(languages: List[str]) -> CatalogSnapshot:
+    """자주 쓰는 언어의 회사 정보를 모두 새로 읽은 뒤 한 번에 교체 (섹션 색인은 다시 만들도록 비움)"""
+    company_info = {}
+    for lang in languages:
+        try:
+            company_info[f"company_info_{lang}"] = read_company_info(lang)
+        except Exception as e:
+            logger.warning(f"⚠️ {lang} 언어 정보 미리 로드 실패: {e}")
+    return catalog_store.update(lambda base: {"company_info": company_info, "company_info_indexes": {}})
+
+def select_company_info(user_language: str, user_message: str, company_info: str) -> InfoSelection:
+    """회사 정보 중 질문과 관련 있는 섹션만 토큰 예산 안에서 선택하고 절약량을 기록"""
+    cache_key = f"company_info_{user_language}"
+    index = catalog_store.current.company_info_indexes.get(cache_key)
+    if index is None or index.source != company_info:
+        index = CompanyInfoIndex(company_info)
+        catalog_store.update(lambda base: None if base.company_info.get(cache_key) != company_info else {
+            "company_info_indexes": {**base.company_info_indexes, cache_key: index}
+        })
+        logger.info(f"📚 '{user_language}' 회사 정보 섹션 색인 생성: {len(index.sections)}개 섹션, 약 {index.full_tokens} 토큰")
+
+    selection = index.select(user_message, COMPANY_INFO_TOKEN_BUDGET)
+    with company_info_token_stats_lock:
+        company_info_token_stats["requests"] += 1
+        company_info_token_stats["full_tokens"] += selection.full_tokens
+        company_info_token_stats["used_tokens"] += selection.used_tokens
+        company_info_token_stats["saved_tokens"] += selection.saved_tokens
+    logger.info(f"✂️ 회사 정보 섹션 선택: {selection.report()}")
+    return selection
 
 def initialize_data():
     """앱 시작 시 필요한 언어별 데이터와 제품 데이터를 미리 로드합니다."""
     logger.info("🚀 앱 초기화를 시작합니다...")
-    if load_product_files():
-        logger.info(f"✅ 제품 데이터 로드 완료: {len(product_data_cache)}개 파일")
+    if load_product_files() is not None:
+        logger.info(f"✅ 제품 데이터 로드 완료: {len(catalog_store.current.products)}개 파일")
     else:
         logger.warning("⚠️ 제품 데이터 로드 실패")
     
     common_languages = ['english', 'korean', 'thai', 'japanese', 'chinese', 'spanish', 'german']
-    for lang in common_languages:
-        try:
-            fetch_company_info(lang)
-        except Exception as e:
-            logger.warning(f"⚠️ {lang} 언어 정보 미리 로드 실패: {e}")
-    logger.info(f"✅ 캐시된 언어: {list(language_data_cache.keys())}")
+    snapshot = load_company_info(common_languages)
+    logger.info(f"✅ 캐시된 언어: {list(snapshot.company_info.keys())} (스냅샷 v{snapshot.version})")
 
 def detect_user_language(message: str) -> str:
-    """사용자 메시지에서 언어를 감지합니다."""
+    """사용자 메시지에서 언어를 감지합니다. (language_detector: 문자 체계 표 + 라틴 문자 3-gram)"""
     try:
-        if re.search(r'[\u0e00-\u0e7f]+', message): return 'thai'
-        elif re.search(r'[\uac00-\ud7af]+', message): return 'korean'
-        elif re.search(r'[\u3040-\u309f\u30a0-\u30ff]+', message): return 'japanese'
-        elif re.search(r'[\u4e00-\u9fff]+', message):
-            return 'japanese' if re.search(r'[\u3040-\u309f\u30a0-\u30ff]', message) else 'chinese'
-        elif re.search(r'[\u0600-\u06ff]+', message): return 'arabic'
-        elif re.search(r'[\u0401\u0451\u0410-\u044f]+', message): return 'russian'
-        elif re.search(r'[àâäéèêëïîôùûüÿç]+', message.lower()): return 'french'
-        elif re.search(r'[àáâãçéêíóôõú]+', message.lower()): return 'spanish'
-        elif re.search(r'[äöüß]+', message.lower()): return 'german'
-        elif re.search(r'[ăâđêôơưàáảãạèéẻẽẹìíỉĩịòóỏõọùúủũụ]+', message.lower()): return 'vietnamese'
-        return 'english'
+        return detect_language(message)
     except Exception as e:
         logger.error(f"❌ 언어 감지 중 오류 발생: {e}")
         return 'english'
 
-def get_english_fallback_response(user_message, error_context=""):
-    """문제 발생 시 영어로 된 기본 응답을 생성합니다."""
+message_analyzer = MessageAnalyzer(KEYWORD_MATCHER, detect_user_language, WELCOME_KEYWORDS)
+
+def create_model_router() -> ModelRouter:
+    """MODEL_ROUTER_POLICY 환경 변수(JSON)로 모델 선택기 생성. 잘못된 정책이면 기본 정책 사용"""
+    if MODEL_ROUTER_POLICY:
+        try:
+            router = ModelRouter(json.loads(MODEL_ROUTER_POLICY))
+            logger.info(f"🧭 모델 선택 정책: {MODEL_ROUTER_POLICY}")
+            return router
+        except Exception as e:
+            logger.warning(f"⚠️ MODEL_ROUTER_POLICY 형식이 잘못되어 기본 정책을 사용합니다: {e}")
+    return ModelRouter()
+
+model_router = create_model_router()
+
+def get_english_fallback_response(user_message, error_context="", reason="other", language=None):
+    """
+    문제 발생 시 영어로 된 기본 응답을 생성합니다.
+    reason: 지표용 짧은 원인 이름, language: 토큰 사용량 기록용 사용자 언어
+    """
     logger.warning(f"⚠️ 폴백 응답을 활성화합니다. 원인: {error_context}")
+    fallbacks_total.inc(reason=reason)
     
     base_info = """I apologize, but we're experiencing technical difficulties at the moment. 
 
@@ -830,6 +1121,7 @@ Please provide a helpful response in English using basic company information."""
             ],
             max_tokens=600, temperature=0.7, timeout=20
         )
+        usage_tracker.record("gpt-4o-mini", "fallback", language, usage_to_dict(getattr(completion, "usage", None)))
         response_text = completion.choices[0].message.content.strip()
         
         if error_context:
@@ -857,64 +1149,119 @@ def add_hyperlinks(text: str) -> str:
         logger.error(f"❌ 하이퍼링크 변환 중 오류 발생: {e}")
         return text
 
-# 🔥 핵심 개선: 자연스러운 GPT 응답 생성 함수
-def get_gpt_response(user_message, user_id="anonymous"):
+class GptPlan:
     """
-    핵심 응답 생성 함수.
-    언어 감지, 제품 검색, GPT 호출을 통해 순수 '텍스트' 응답을 생성합니다.
+    메시지 하나를 어떻게 답할지 결정한 결과.
+    text 가 있으면 GPT 호출 없이 바로 답하고, 없으면 messages 로 model 을 호출합니다.
+    cache_versions 는 캐시를 조회할 때의 (응답 캐시, 유사 질문 캐시) 버전으로, 답변을 캐시에 저장할 때 비교합니다.
+    None 이면 답변을 캐시에 저장하지 않습니다. (이전 대화가 프롬프트에 들어가 다른 사용자와 공유하면 안 되는 답변)
     """
-    user_language = detect_user_language(user_message)
-    logger.info(f"🌐 감지된 사용자 언어: {user_language}")
-
-    try:
-        if not client:
-            logger.error("❌ OpenAI client가 없습니다.")
-            return get_english_fallback_response(user_message, "OpenAI service unavailable")
-
-        # 1. 제품 검색 쿼리인지 먼저 확인
-        if is_product_search_query(user_message):
+    __slots__ = ('route', 'language', 'text', 'messages', 'max_tokens', 'model', 'cache_versions')
+
+    def __init__(self, route: str, language: str, text: Optional[str] = None,
+                 messages: Optional[List[Dict[str, str]]] = None, max_tokens: int = 800, model: str = "gpt-4o",
+                 cache_versions: Optional[Tuple[int, int]] = None):
+        self.route = route
+        self.language = language
+        self.text = text
+        self.messages = messages
+        self.max_tokens = max_tokens
+        self.model = model
+        self.cache_versions = cache_versions
+
+def route_model(plan: GptPlan, analysis: MessageAnalysis) -> GptPlan:
+    """GPT 를 호출하는 계획의 모델/max_tokens 를 질문 난이도에 맞게 선택"""
+    decision = model_router.decide(analysis, plan.route, plan.max_tokens)
+    model_decisions_total.inc(model=decision.model, reason=decision.reason)
+    plan.model = decision.model
+    plan.max_tokens = decision.max_tokens
+    return plan
+
+def plan_gpt_response(user_message: str, user_id: str, analysis: MessageAnalysis) -> GptPlan:
+    """
+    견적 → 제품 검색 → '더 자세한 정보' → 응답 캐시 → 일반 대화 순서로 답변 방법을 결정하고,
+    GPT 가 필요한 경우 프롬프트까지 만듭니다. (/chat, /chat/stream, LINE 공용)
+    analysis(메시지 분석 결과)는 이후 모든 단계에서 그대로 재사용합니다.
+    """
+    user_language = analysis.language
+    # 요청 하나는 처음 읽은 카탈로그 스냅샷 하나만 사용 (도중에 다시 읽어도 섞이지 않음)
+    snapshot = catalog_store.current
+
+    # 🔥 0. 수량이 포함된 도매 가격 문의는 로컬 견적으로 바로 응답
+    with tracer.span('quote'):
+        quote_response = get_quote_response(user_message, user_language, analysis, snapshot)
+    if quote_response:
+        logger.info("🧮 대량 구매 견적 문의로 감지되었습니다.")
+        return GptPlan('quote', user_language, text=quote_response)
+
+    # 1. 제품 검색 쿼리인지 먼저 확인
+    with tracer.span('product_search'):
+        product_info = None
+        if is_product_search_query(user_message, analysis):
             logger.info("🔍 제품 검색 쿼리로 감지되었습니다.")
-            product_info = get_product_info(user_message, user_language)
-            # 제품 정보는 길이 제한 없이 그대로 반환
-            save_user_context(user_id, user_message, product_info, user_language)
-            return product_info
-
-        # 2. '더 자세한 정보' 요청 처리
-        if is_more_info_request(user_message, user_language):
-            logger.info("📋 더 자세한 정보 요청으로 감지되었습니다.")
-            user_context = get_user_context(user_id)
-            if user_context:
-                prompt = f"""[Previous Conversation Context]
+            product_info = get_product_info(user_message, user_language, analysis=analysis, snapshot=snapshot)
+    if product_info is not None:
+        # 제품 정보는 길이 제한 없이 그대로 반환
+        return GptPlan('product', user_language, text=product_info)
+
+    # 2. '더 자세한 정보' 요청 처리
+    if is_more_info_request(user_message, user_language, analysis):
+        logger.info("📋 더 자세한 정보 요청으로 감지되었습니다.")
+        user_context = get_user_context(user_id)
+        if user_context:
+            prompt = f"""[Previous Conversation Context]
 {user_context}
 
 [Current Request]
 The user is asking for more details with the phrase: "{user_message}"
 
 Based on the previous context, please provide a more detailed and specific explanation in the user's language ({user_language})."""
-                
-                completion = client.chat.completions.create(
-                    model="gpt-4o",
-                    messages=[
-                        {"role": "system", "content": NATURAL_SYSTEM_MESSAGE},
-                        {"role": "user", "content": prompt}
-                    ],
-                    max_tokens=1000, temperature=0.7, timeout=25
-                )
-                detailed_response = completion.choices[0].message.content.strip()
-                save_user_context(user_id, user_message, detailed_response, user_language)
-                return detailed_response
-
-        # 🔥 3. 일반적인 대화 처리 - 언어별 정확한 정보 사용
+            return route_model(GptPlan('more_info', user_language, messages=[
+                {"role": "system", "content": NATURAL_SYSTEM_MESSAGE},
+                {"role": "user", "content": prompt}
+            ], max_tokens=1000), analysis)
+
+    # 🔥 3. 일반적인 대화 처리 - 같은 질문에 대한 캐시된 답변이 있으면 바로 사용
+    # 이전 대화가 있으면 답변이 그 사용자의 대화에 맞춰지므로 캐시를 조회하지도, 저장하지도 않음
+    user_context = get_user_context(user_id)
+    cache_versions = None
+    cached_response = None
+    similar = None
+    if not user_context:
+        with tracer.span('cache_lookup'):
+            # 답변을 만드는 사이 데이터가 다시 로드되면(invalidate) 이전 데이터로 만든 답변은 저장하지 않도록 버전 기록
+            cache_versions = (response_cache.version, semantic_cache.version)
+            cached_response = response_cache.get(user_message, user_language)
+            cache_lookups_total.inc(cache='response', result='hit' if cached_response else 'miss')
+            if not cached_response:
+                similar = semantic_cache.lookup(user_message, user_language)
+                cache_lookups_total.inc(cache='semantic', result='hit' if similar else 'miss')
+    if cached_response:
+        logger.info(f"⚡ 응답 캐시 적중 ('{user_language}')")
+        return GptPlan('cache', user_language, text=cached_response)
+    if similar:
+        logger.info(f"⚡ 유사 질문 캐시 적중 ('{user_language}', 유사도 {similar.similarity:.2f}): '{similar.question}'")
+        return GptPlan('semantic_cache', user_language, text=similar.response)
+
+    # 언어별 정확한 정보 사용
+    with tracer.span('company_info'):
         company_info = fetch_company_info(user_language)
-        if not company_info or len(company_info.strip()) < 50:
-            logger.warning("⚠️ 회사 정보가 불충분합니다. 폴백을 사용합니다.")
-            return get_english_fallback_response(user_message, "Company data temporarily unavailable")
-        
-        user_context = get_user_context(user_id)
-        context_section = f"\n\n[Previous Conversation Context]\n{user_context}" if user_context else ""
-        
-        # 🔥 개선된 프롬프트 - 언어별 정확한 정보 우선, 일반 지식 보완
-        prompt = f"""You are a friendly and professional customer service agent for SABOO THAILAND.
+        if company_info and len(company_info.strip()) >= 50:
+            # 🔥 질문과 관련 있는 회사 정보 섹션만 토큰 예산 안에서 사용
+            company_info = select_company_info(user_language, user_message, company_info).text
+        else:
+            company_info = None
+    if company_info is None:
+        logger.warning("⚠️ 회사 정보가 불충분합니다. 폴백을 사용합니다.")
+        return GptPlan('fallback', user_language,
+                       text=get_english_fallback_response(user_message, "Company data temporarily unavailable",
+                                                          "company_info_missing", user_language))
+
+    prompt_started = time.perf_counter()
+    context_section = f"\n\n[Previous Conversation Context]\n{user_context}" if user_context else ""
+
+    # 🔥 개선된 프롬프트 - 언어별 정확한 정보 우선, 일반 지식 보완
+    prompt = f"""You are a friendly and professional customer service agent for SABOO THAILAND.
 
 [COMPANY INFORMATION FOR {user_language.upper()} - THIS IS YOUR PRIMARY SOURCE OF TRUTH]
 {company_info}
@@ -946,59 +1293,319 @@ IMPORTANT RULES:
 
 Customer question: {user_message}"""
 
-        logger.info(f"🌐 '{user_language}' 언어용 회사 정보를 사용하여 GPT 프롬프트 생성 완료")
-        
-        completion = client.chat.completions.create(
-            model="gpt-4o",
-            messages=[
-                {"role": "system", "content": NATURAL_SYSTEM_MESSAGE},
-                {"role": "user", "content": prompt}
-            ],
-            max_tokens=800, 
-            temperature=0.7,  # 더 자연스러운 응답을 위해 0.3 → 0.7로 증가
-            timeout=25
-        )
-        response_text = completion.choices[0].message.content.strip()
+    tracer.observe('prompt_build', time.perf_counter() - prompt_started)
+    logger.info(f"🌐 '{user_language}' 언어용 회사 정보를 사용하여 GPT 프롬프트 생성 완료")
+    return route_model(GptPlan('general', user_language, messages=[
+        {"role": "system", "content": NATURAL_SYSTEM_MESSAGE},
+        {"role": "user", "content": prompt}
+    ], max_tokens=800, cache_versions=cache_versions), analysis)
+
+def finish_gpt_response(plan: GptPlan, user_message: str, user_id: str, response_text: str,
+                        is_truncated: Optional[bool] = None) -> str:
+    """
+    GPT 응답 후처리: 일반 대화는 길이 축약 + 응답 캐시 저장(이전 대화 없이 만든 답변만), 모든 경로에서 대화 컨텍스트 저장.
+    is_truncated 가 주어지면(스트리밍) 이미 축약된 텍스트로 봅니다.
+    """
+    user_language = plan.language
+    if plan.route != 'general':
+        save_user_context(user_id, user_message, response_text, user_language)
+        return response_text
 
-        if not response_text or len(response_text.strip()) < 10:
-            logger.warning("⚠️ 생성된 응답이 너무 짧습니다. 폴백을 사용합니다.")
-            return get_english_fallback_response(user_message, "Response generation issue")
+    if is_unusable_response(response_text):
+        logger.warning("⚠️ 생성된 응답이 너무 짧습니다. 폴백을 사용합니다.")
+        return get_english_fallback_response(user_message, "Response generation issue", "short_response",
+                                             user_language)
 
+    if is_truncated is None:
         processed_response, is_truncated = process_response_length(response_text, user_language)
-        save_user_context(user_id, user_message, response_text, user_language)
-        
-        logger.info(f"✅ '{user_language}' 언어로 GPT 응답을 성공적으로 생성했습니다. (축약됨: {is_truncated})")
-        return processed_response
+    else:
+        processed_response = response_text
+    save_user_context(user_id, user_message, response_text, user_language)
+    if plan.cache_versions is not None:
+        response_version, semantic_version = plan.cache_versions
+        response_cache.put(user_message, user_language, processed_response, version=response_version)
+        semantic_cache.add(user_message, user_language, processed_response, version=semantic_version)
+
+    logger.info(f"✅ '{user_language}' 언어로 GPT 응답을 성공적으로 생성했습니다. (축약됨: {is_truncated})")
+    return processed_response
+
+class StreamingHtmlFormatter:
+    """
+    [웹 전용] GPT 스트리밍 조각을 받아 format_text_for_messenger + add_hyperlinks 를 점진적으로 적용합니다.
+    URL/전화번호가 잘리지 않도록 공백 경계까지만, 같은 줄의 **굵게**/*기울임* 표시가 닫힌 경우에만 내보내며,
+    max_length 가 있으면 process_response_length 와 같은 규칙으로 축약하고 멈춥니다.
+    """
+    WHITESPACE = re.compile(r'\s')
+
+    def __init__(self, max_length: Optional[int] = None):
+        self.max_length = max_length
+        self.text = ''
+        self.truncated = False
+        self._pending = ''
+
+    @staticmethod
+    def _markdown_closed(text: str) -> bool:
+        line = text[text.rfind('\n') + 1:]
+        return line.count('**') % 2 == 0 and line.replace('**', '').count('*') % 2 == 0
+
+    def _safe_cut(self) -> int:
+        # 공백 직전까지만 잘라 내보낸 텍스트가 공백으로 끝나지 않도록 함 (축약 시 '...' 위치 일치)
+        positions = [m.start() for m in self.WHITESPACE.finditer(self._pending) if m.start()]
+        for cut in reversed(positions):
+            if self._markdown_closed(self.text + self._pending[:cut]):
+                return cut
+        return 0
+
+    def _emit(self, segment: str) -> str:
+        if self.max_length is not None and len(self.text) + len(segment) > self.max_length:
+            truncated_text = (self.text + segment)[:self.max_length]
+            last_space = truncated_text.rfind(' ')
+            if last_space > 0:
+                truncated_text = truncated_text[:last_space]
+            final_text = truncated_text.strip() + "..."
+            segment = final_text[len(self.text):] if final_text.startswith(self.text) else "..."
+            self.truncated = True
+        self.text += segment
+        return add_hyperlinks(format_text_for_messenger(segment)) if segment else ''
+
+    def feed(self, delta: str) -> str:
+        """새 조각 추가. 지금 내보낼 수 있는 HTML 을 반환"""
+        if self.truncated:
+            return ''
+        self._pending += delta
+        cut = self._safe_cut()
+        if not cut:
+            return ''
+        segment, self._pending = self._pending[:cut], self._pending[cut:]
+        return self._emit(segment)
+
+    def flush(self) -> str:
+        """남은 조각을 모두 내보냄"""
+        if self.truncated or not self._pending:
+            return ''
+        segment, self._pending = self._pending, ''
+        return self._emit(segment)
+
+# 🔥 핵심 개선: 자연스러운 GPT 응답 생성 함수
+def usage_to_dict(usage) -> Optional[Dict[str, int]]:
+    """OpenAI 응답의 usage 객체를 로그용 dict 로 변환"""
+    if usage is None:
+        return None
+    details = getattr(usage, "prompt_tokens_details", None)
+    return {
+        "prompt_tokens": getattr(usage, "prompt_tokens", 0) or 0,
+        "completion_tokens": getattr(usage, "completion_tokens", 0) or 0,
+        "total_tokens": getattr(usage, "total_tokens", 0) or 0,
+        "cached_tokens": getattr(details, "cached_tokens", 0) or 0,
+    }
+
+def estimate_usage(messages: List[Dict[str, str]], completion_text: str) -> Dict[str, int]:
+    """
+    스트림을 중간에 닫아 usage 청크를 받지 못했을 때의 추정 사용량 (estimate_tokens 기준, 메시지당 4토큰 추가).
+    닫은 뒤에는 생성이 멈추므로 completion 은 받은 만큼으로 봅니다.
+    """
+    prompt_tokens = sum(estimate_tokens(message["content"]) + 4 for message in messages)
+    completion_tokens = estimate_tokens(completion_text)
+    return {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens, "cached_tokens": 0}
+
+def is_unusable_response(response_text: str) -> bool:
+    """GPT 응답이 비었거나 너무 짧아 폴백으로 바꿔야 하는지"""
+    return not response_text or len(response_text.strip()) < 10
+
+def get_gpt_response(user_message, user_id="anonymous", chat_meta=None, analysis=None):
+    """
+    핵심 응답 생성 함수.
+    메시지 분석, 제품 검색, GPT 호출을 통해 순수 '텍스트' 응답을 생성합니다.
+    analysis 를 넘기면(LINE) 메시지를 다시 분석하지 않습니다.
+    chat_meta 에 dict 를 넘기면 대화 로그용 정보(route, language, intents, model, usage)를 채웁니다.
+    """
+    if analysis is None:
+        with tracer.span('analysis'):
+            analysis = analyze_message(user_message)
+    user_language = analysis.language
+    logger.info(f"🌐 감지된 사용자 언어: {user_language}")
+    meta = chat_meta if chat_meta is not None else {}
+    meta.update({"route": "fallback", "model": None, "usage": None, **analysis.log_fields()})
+
+    try:
+        if not client:
+            logger.error("❌ OpenAI client가 없습니다.")
+            return get_english_fallback_response(user_message, "OpenAI service unavailable", "openai_unavailable",
+                                                 user_language)
+
+        plan = plan_gpt_response(user_message, user_id, analysis)
+        meta["route"] = plan.route
+        if plan.text is not None:
+            if plan.route != 'fallback':
+                save_user_context(user_id, user_message, plan.text, user_language)
+            return plan.text
+
+        try:
+            with tracer.span('openai'):
+                completion = client.chat.completions.create(
+                    model=plan.model,
+                    messages=plan.messages,
+                    max_tokens=plan.max_tokens,
+                    temperature=0.7,  # 더 자연스러운 응답을 위해 0.3 → 0.7로 증가
+                    timeout=OPENAI_TIMEOUT
+                )
+        except Exception:
+            openai_requests_total.inc(model=plan.model, mode="sync", outcome="error")
+            raise
+        openai_requests_total.inc(model=plan.model, mode="sync", outcome="ok")
+        meta["model"] = plan.model
+        meta["usage"] = usage_to_dict(getattr(completion, "usage", None))
+        response_text = completion.choices[0].message.content.strip()
+        if plan.route == 'general' and is_unusable_response(response_text):
+            meta["route"] = "fallback"
+        usage_tracker.record(plan.model, meta["route"], user_language, meta["usage"])
+        with tracer.span('postprocess'):
+            return finish_gpt_response(plan, user_message, user_id, response_text)
     except Exception as e:
         logger.error(f"❌ GPT 응답 생성 중 오류 발생: {e}")
-        return get_english_fallback_response(user_message, f"GPT API error: {str(e)[:100]}")
+        errors_total.inc(stage="gpt_response")
+        meta["route"] = "fallback"
+        return get_english_fallback_response(user_message, f"GPT API error: {str(e)[:100]}", "openai_error",
+                                             user_language)
 
-def save_chat(user_msg, bot_msg, user_id="anonymous"):
-    """대화 내용을 날짜별 텍스트 파일로 저장합니다. (HTML 태그 없이)"""
-    now = datetime.now()
-    timestamp = now.strftime("%Y-%m-%d %H:%M:%S")
-    datestamp = now.strftime("%Y_%m_%d")
-    
+def stream_gpt_response(user_message: str, user_id: str = "anonymous",
+                        analysis: Optional[MessageAnalysis] = None) -> Iterator[Tuple[str, Any]]:
+    """
+    get_gpt_response 의 스트리밍 버전.
+    ('delta', HTML 조각) 이벤트를 내보내고, 마지막에 ('done', {route, truncated, text, language, intents, model, usage}) 를 내보냅니다.
+    GPT 가 필요 없는 경로(견적, 제품 검색, 캐시)는 완성된 답변을 한 번에 내보냅니다.
+    """
+    if analysis is None:
+        with tracer.span('analysis'):
+            analysis = analyze_message(user_message)
+    user_language = analysis.language
+    logger.info(f"🌐 감지된 사용자 언어: {user_language}")
+
+    plan = None
+    if client:
+        try:
+            plan = plan_gpt_response(user_message, user_id, analysis)
+        except Exception as e:
+            logger.error(f"❌ GPT 응답 준비 중 오류 발생: {e}")
+            errors_total.inc(stage="gpt_plan")
+
+    if plan is None or plan.text is not None:
+        if plan is None:
+            text = get_english_fallback_response(user_message, "OpenAI service unavailable", "openai_unavailable",
+                                                 user_language)
+            route = 'fallback'
+        else:
+            text, route = plan.text, plan.route
+            if route != 'fallback':
+                save_user_context(user_id, user_message, text, user_language)
+        yield 'delta', add_hyperlinks(format_text_for_messenger(text))
+        yield 'done', {"route": route, "truncated": False, "text": text, **analysis.log_fields(),
+                       "model": None, "usage": None}
+        return
+
+    formatter = StreamingHtmlFormatter(max_length=500 if plan.route == 'general' else None)
+    stream = None
+    usage = None
+    received: List[str] = []
+    openai_started = time.perf_counter()
+    first_token = True
     try:
-        os.makedirs(CHAT_LOG_DIR, exist_ok=True)
+        stream = client.chat.completions.create(
+            model=plan.model,
+            messages=plan.messages,
+            max_tokens=plan.max_tokens,
+            temperature=0.7,
+            timeout=OPENAI_TIMEOUT,
+            stream=True,
+            stream_options={"include_usage": True}
+        )
+        for chunk in stream:
+            # 토큰 사용량은 choices 가 비어 있는 마지막 청크에 담겨 옴
+            if getattr(chunk, "usage", None) is not None:
+                usage = usage_to_dict(chunk.usage)
+            if not chunk.choices:
+                continue
+            if first_token:
+                tracer.observe('openai_first_token', time.perf_counter() - openai_started)
+                first_token = False
+            content = chunk.choices[0].delta.content or ''
+            received.append(content)
+            html = formatter.feed(content)
+            if html:
+                yield 'delta', html
+            if formatter.truncated:
+                # 더 받아도 버릴 내용이므로 닫아서 생성을 멈춤 (usage 청크는 오지 않으므로 아래에서 추정)
+                break
+        html = formatter.flush()
+        if html:
+            yield 'delta', html
+        openai_requests_total.inc(model=plan.model, mode="stream", outcome="ok")
     except Exception as e:
-        logger.error(f"❌ 로그 디렉토리 '{CHAT_LOG_DIR}' 생성 실패: {e}")
-        return
-        
-    filename = f"save_chat_{datestamp}.txt"
-    full_path = os.path.join(CHAT_LOG_DIR, filename)
-    detected_lang = detect_user_language(user_msg)
-    
+        logger.error(f"❌ GPT 스트리밍 중 오류 발생: {e}")
+        openai_requests_total.inc(model=plan.model, mode="stream", outcome="error")
+        errors_total.inc(stage="gpt_stream")
+        if not formatter.text.strip():
+            # 실패한 호출 대신 폴백 호출이 자기 사용량을 기록함
+            text = get_english_fallback_response(user_message, f"GPT API error: {str(e)[:100]}", "openai_error",
+                                                 user_language)
+            yield 'delta', add_hyperlinks(format_text_for_messenger(text))
+            yield 'done', {"route": 'fallback', "truncated": False, "text": text, **analysis.log_fields(),
+                           "model": plan.model, "usage": usage}
+            return
+    finally:
+        if stream is not None and hasattr(stream, 'close'):
+            stream.close()
+        tracer.observe('openai', time.perf_counter() - openai_started)
+
+    route = plan.route
+    if route == 'general' and is_unusable_response(formatter.text):
+        route = 'fallback'
+    if usage is None:
+        # 축약해서 일찍 닫았거나 도중에 끊긴 스트림: 보고서에서 빠지지 않도록 추정치로 기록
+        usage_tracker.record(plan.model, route, user_language, estimate_usage(plan.messages, ''.join(received)),
+                             estimated=True)
+    else:
+        usage_tracker.record(plan.model, route, user_language, usage)
+    with tracer.span('postprocess'):
+        text = finish_gpt_response(plan, user_message, user_id, formatter.text.strip(), formatter.truncated)
+    if text != formatter.text.strip():
+        # 응답이 너무 짧아 폴백으로 바뀐 경우 등: 화면의 내용을 최종 텍스트로 교체
+        yield 'replace', add_hyperlinks(format_text_for_messenger(text))
+    yield 'done', {"route": route, "truncated": formatter.truncated, "text": text, **analysis.log_fields(),
+                   "model": plan.model, "usage": usage}
+
+chat_log_writer = ChatLogWriter(
+    CHAT_LOG_DIR,
+    max_bytes=CHAT_LOG_MAX_BYTES,
+    batch_size=CHAT_LOG_BATCH_SIZE,
+    flush_interval=CHAT_LOG_FLUSH_INTERVAL,
+    language_detector=detect_user_language
+)
+atexit.register(chat_log_writer.close)
+
+def load_openai_prices() -> Optional[Dict[str, Tuple[float, float, float]]]:
+    """OPENAI_PRICES 환경 변수(JSON)의 모델 가격. 없거나 잘못되면 None (기본 가격 사용)"""
+    raw = os.getenv("OPENAI_PRICES")
+    if not raw:
+        return None
     try:
-        clean_bot_msg = re.sub(r'<[^>]+>', '', bot_msg)
-        
-        with open(full_path, "a", encoding="utf-8") as f:
-            f.write(f"[{timestamp}] User ({user_id}) [{detected_lang}]: {user_msg}\n")
-            f.write(f"[{timestamp}] Bot: {clean_bot_msg}\n")
-            f.write("-" * 50 + "\n")
-        logger.info(f"💬 채팅 로그를 '{full_path}' 파일에 저장했습니다.")
+        return {model: tuple(float(value) for value in prices) for model, prices in json.loads(raw).items()}
     except Exception as e:
-        logger.error(f"❌ 로그 파일 '{full_path}' 저장 실패: {e}")
+        logger.warning(f"⚠️ OPENAI_PRICES 형식이 잘못되어 기본 가격을 사용합니다: {e}")
+        return None
+
+usage_tracker = UsageTracker(USAGE_LOG_DIR, flush_interval=USAGE_FLUSH_INTERVAL, prices=load_openai_prices())
+atexit.register(usage_tracker.close)
+
+def save_chat(user_msg, bot_msg, user_id="anonymous", language=None, chat_meta=None):
+    """
+    대화 내용을 날짜별 텍스트 파일과 JSONL 파일로 저장합니다. (HTML 태그 없이, 백그라운드 스레드에서 기록)
+    chat_meta: route, latency_ms, model, usage, truncated, intents (메시지 분석 결과의 키워드 카테고리),
+               stages_ms (처리 단계별 시간)
+    """
+    if not chat_log_writer.write(user_msg, bot_msg, user_id, language, chat_meta):
+        logger.warning("⚠️ 채팅 로그 큐가 가득 차 로그 한 건을 버렸습니다.")
 
 def verify_line_signature(body, signature):
     """LINE Webhook 서명 검증"""
@@ -1014,40 +1621,137 @@ def verify_line_signature(body, signature):
         return False
 
 def send_line_message(reply_token, message):
-    """LINE API로 메시지 전송"""
+    """LINE API로 답장 전송 (문자열 또는 최대 5개의 메시지 목록)"""
     try:
-        if not LINE_TOKEN:
-            logger.error("❌ LINE_TOKEN이 없습니다.")
-            return False
-        
-        headers = {"Content-Type": "application/json", "Authorization": f"Bearer {LINE_TOKEN}"}
-        payload = {"replyToken": reply_token, "messages": [{"type": "text", "text": message}]}
-        
-        response = requests.post(
-            "https://api.line.me/v2/bot/message/reply",
-            headers=headers, json=payload, timeout=10
-        )
-        
-        if response.status_code == 200:
+        if line_client.reply(reply_token, message):
             logger.info("✅ LINE 메시지를 성공적으로 전송했습니다.")
             return True
-        else:
-            logger.error(f"❌ LINE API 오류: {response.status_code} - {response.text}")
-            return False
+        return False
     except Exception as e:
         logger.error(f"❌ LINE 메시지 전송 중 오류 발생: {e}")
         return False
 
+def push_line_message(user_id, message):
+    """reply 토큰 없이 사용자에게 push 메시지 전송"""
+    try:
+        if line_client.push(user_id, message):
+            logger.info(f"✅ LINE push 메시지를 {user_id[:8]} 사용자에게 전송했습니다.")
+            return True
+        return False
+    except Exception as e:
+        logger.error(f"❌ LINE push 메시지 전송 중 오류 발생: {e}")
+        return False
+
+def handle_line_event(event):
+    """LINE 텍스트 메시지 이벤트 하나를 처리 (작업 큐 워커 스레드에서 실행)"""
+    user_text = event["message"]["text"].strip()
+    reply_token = event["replyToken"]
+    user_id = event.get("source", {}).get("userId", "unknown")
+    started = time.perf_counter()
+    tracer.start()
+    
+    # 메시지 분석은 여기서 한 번만 하고 응답 생성/로그 기록에 그대로 넘김
+    with tracer.span('analysis'):
+        analysis = analyze_message(user_text)
+    detected_language = analysis.language
+    logger.info(f"👤 LINE 사용자 {user_id[:8]} ({detected_language}): {user_text}")
+    
+    if analysis.is_welcome:
+        responses = {
+            'thai': "สวัสดีค่ะ! 💕 ยินดีต้อนรับสู่ SABOO THAILAND ค่ะ\n\nมีอะไรให้ดิฉันช่วยเหลือคะ? 😊",
+            'korean': "안녕하세요! 💕 SABOO THAILAND에 오신 것을 환영합니다!\n\n무엇을 도와드릴까요? 😊",
+            'japanese': "こんにちは！💕 SABOO THAILANDへようこそ！\n\n何かお手伝いできることはありますか？😊",
+            'chinese': "您好！💕 欢迎来到 SABOO THAILAND！\n\n有什么可以帮您的吗？😊",
+            'english': "Hello! 💕 Welcome to SABOO THAILAND!\n\nHow can I help you today? 😊"
+        }
+        response_text = responses.get(detected_language, responses['english'])
+        chat_meta = {"route": "welcome", **analysis.log_fields()}
+    else:
+        chat_meta = {}
+        response_text = get_gpt_response(user_text, user_id, chat_meta, analysis)
+
+    with tracer.span('format'):
+        formatted_for_line = format_text_for_line(response_text)
+
+    with tracer.span('line_reply'):
+        sent = send_line_message(reply_token, formatted_for_line)
+    if not sent:
+        errors_total.inc(stage="line_reply")
+    stages_ms = finish_request_metrics('line', chat_meta.get("route", "unknown"), started)
+    if sent:
+        chat_meta["latency_ms"] = round((time.perf_counter() - started) * 1000, 1)
+        chat_meta["stages_ms"] = stages_ms
+        save_chat(user_text, formatted_for_line, user_id, detected_language, chat_meta)
+
+def observe_line_work(wait_seconds: float, handle_seconds: float, failed: bool):
+    """LINE 작업 큐 대기 시간/처리 실패 지표 기록 (워커 스레드에서 호출)"""
+    line_queue_wait_seconds.observe(wait_seconds)
+    if failed:
+        errors_total.inc(stage="line_handler")
+
+line_work_queue = LineWorkQueue(handle_line_event, workers=LINE_MAX_CONCURRENCY, max_size=LINE_QUEUE_SIZE,
+                                observer=observe_line_work)
+
 def initialize_once():
     """첫 번째 요청이 들어왔을 때 딱 한 번만 앱 초기화를 실행합니다."""
     global app_initialized
     if not app_initialized:
-        with threading.Lock():
+        with app_init_lock:
             if not app_initialized:
                 logger.info("🎯 첫 요청 감지, 앱 초기화를 진행합니다...")
                 initialize_data()
+                remember_data_generation()
+                price_list_watcher.start()
                 app_initialized = True
 
+def remember_data_generation():
+    """시작 시점의 공유 세대 번호 기록 (이미 최신 데이터를 읽었으므로 다시 로드하지 않음)"""
+    global data_generation
+    if state_backend.shared:
+        try:
+            data_generation = state_backend.get_int(DATA_GENERATION_KEY)
+        except Exception as e:
+            logger.warning(f"⚠️ 데이터 세대 번호 조회 실패: {e}")
+
+def publish_data_reload():
+    """이 워커에서 데이터를 다시 읽었음을 다른 워커에 알림 (공유 세대 번호 증가)"""
+    global data_generation
+    if state_backend.shared:
+        try:
+            data_generation = state_backend.incr(DATA_GENERATION_KEY)
+        except Exception as e:
+            logger.warning(f"⚠️ 데이터 세대 번호 갱신 실패: {e}")
+
+def invalidate_answer_caches():
+    """
+    데이터가 바뀌었을 때 응답 캐시/유사 질문 캐시를 비우고 다른 워커에 알림.
+    각 단계는 저장소 오류를 스스로 기록하고 넘어가므로 중간에 멈춰 일부 캐시만 비워지는 일이 없습니다.
+    """
+    response_cache.invalidate()
+    semantic_cache.invalidate()
+    publish_data_reload()
+
+def sync_shared_state():
+    """다른 워커가 데이터를 다시 읽었으면 이 워커의 파일 기반 캐시도 다시 로드"""
+    global data_generation, data_generation_checked_at
+    if not state_backend.shared:
+        return
+    now = time.monotonic()
+    if now - data_generation_checked_at < STATE_SYNC_INTERVAL:
+        return
+    data_generation_checked_at = now
+    try:
+        current = state_backend.get_int(DATA_GENERATION_KEY)
+    except Exception as e:
+        logger.warning(f"⚠️ 데이터 세대 번호 조회 실패: {e}")
+        return
+    if current == data_generation:
+        return
+    logger.info(f"🔄 다른 워커의 데이터 갱신 감지 (세대 {data_generation} → {current}), 다시 로드합니다.")
+    data_generation = current
+    semantic_cache.invalidate()
+    initialize_data()
+
 def check_admin_access():
     """관리자 엔드포인트 접근 권한 확인"""
     if not ADMIN_API_KEY:
@@ -1060,7 +1764,7 @@ def check_admin_access():
 @app.before_request
 def before_request():
     """요청 전 처리 - 관리자 엔드포인트 보안 및 초기화"""
-    admin_endpoints = ['/reload-products', '/reload-language-data', '/clear-language-cache']
+    admin_endpoints = ['/reload-products', '/reload-language-data', '/clear-language-cache', '/usage-report']
     if request.path in admin_endpoints:
         if not check_admin_access():
             return jsonify({
@@ -1068,6 +1772,7 @@ def before_request():
                 "message": "X-Admin-API-Key header required"
             }), 403
     initialize_once()
+    sync_shared_state()
 
 @app.route('/')
 def index():
@@ -1077,6 +1782,10 @@ def index():
 @app.route('/health')
 def health():
     """서버의 현재 상태를 확인하는 헬스 체크 엔드포인트입니다."""
+    snapshot = catalog_store.current
+    context_stats = user_context_store.stats()
+    with company_info_token_stats_lock:
+        token_stats = dict(company_info_token_stats)
     return jsonify({
         "status": "healthy",
         "timestamp": datetime.now().isoformat(),
@@ -1084,20 +1793,43 @@ def health():
         "line_token": "configured" if LINE_TOKEN else "missing",
         "line_secret": "configured" if LINE_SECRET else "missing",
         "admin_security": "enabled" if ADMIN_API_KEY else "disabled",
-        "cached_languages": list(language_data_cache.keys()),
-        "product_files_loaded": len(product_data_cache),
-        "product_last_update": product_last_update.isoformat() if product_last_update else None,
-        "user_context_cache_size": len(user_context_cache)
+        "cached_languages": list(snapshot.company_info.keys()),
+        "company_info_token_budget": COMPANY_INFO_TOKEN_BUDGET,
+        "company_info_token_stats": token_stats,
+        "response_cache": response_cache.stats(),
+        "semantic_cache": semantic_cache.stats(),
+        "line_queue": line_work_queue.stats(),
+        "line_api": line_client.stats(),
+        "chat_log": chat_log_writer.stats(),
+        "message_analysis": message_analyzer.stats(),
+        "model_router": model_router.stats(),
+        "openai_usage": usage_tracker.stats(),
+        "product_files_loaded": len(snapshot.products),
+        "product_last_update": snapshot.product_last_update.isoformat() if snapshot.product_last_update else None,
+        "catalog": catalog_store.stats(),
+        "state_backend": state_backend.stats(),
+        "user_context_cache_size": context_stats.get("users"),
+        "user_context_store": context_stats
     })
 
+@app.route('/metrics')
+def metrics_endpoint():
+    """Prometheus 수집용 지표 (텍스트 형식)"""
+    return Response(metrics.render(), content_type=MetricsRegistry.CONTENT_TYPE)
+
 @app.route('/products')
 def products_status():
     """제품 데이터 상태 확인"""
+    snapshot = catalog_store.current
     return jsonify({
-        "total_product_files": len(product_data_cache),
-        "product_files": list(product_data_cache.keys()),
-        "last_update": product_last_update.isoformat() if product_last_update else None,
+        "total_product_files": len(snapshot.products),
+        "product_files": list(snapshot.products.keys()),
+        "last_update": snapshot.product_last_update.isoformat() if snapshot.product_last_update else None,
+        "catalog_version": snapshot.version,
         "price_list_folder_exists": os.path.exists("price_list"),
+        "price_catalog": snapshot.price_catalog.stats() if snapshot.price_catalog else None,
+        "last_reload": price_list_loader.last_report.to_dict() if price_list_loader.last_report else None,
+        "watcher": price_list_watcher.stats(),
         "sample_keywords": dict(list(INTENT_KEYWORDS.items())[:3]),
         "more_info_keywords_count": {lang: len(keywords) for lang, keywords in MORE_INFO_KEYWORDS.items()}
     })
@@ -1126,12 +1858,18 @@ def search_products_endpoint():
 
 @app.route('/reload-products')
 def reload_products():
-    """제품 데이터 다시 로드"""
-    if load_product_files():
+    """제품 데이터 다시 로드 (바뀐 파일만, ?force=1 이면 전체)"""
+    force = request.args.get('force', '').lower() in ('1', 'true', 'yes')
+    report = load_product_files(force=force)
+    if report is not None:
+        if report.has_changes or force:
+            invalidate_answer_caches()
         return jsonify({
             "status": "success", 
             "message": "제품 데이터가 성공적으로 다시 로드되었습니다.", 
-            "loaded_files": len(product_data_cache), 
+            "loaded_files": len(catalog_store.current.products), 
+            "catalog_version": catalog_store.current.version,
+            "reload": report.to_dict(),
             "timestamp": datetime.now().isoformat()
         })
     else:
@@ -1140,11 +1878,10 @@ def reload_products():
 @app.route('/clear-language-cache')
 def clear_language_cache():
     """언어별 캐시 및 사용자 컨텍스트 초기화"""
-    global language_data_cache, user_context_cache
-    old_cache_size = len(language_data_cache)
-    old_context_size = len(user_context_cache)
-    language_data_cache.clear()
-    user_context_cache.clear()
+    old_cache_size = len(catalog_store.current.company_info)
+    catalog_store.update(lambda base: {"company_info": {}, "company_info_indexes": {}})
+    old_context_size = user_context_store.clear()
+    invalidate_answer_caches()
     return jsonify({
         "status": "success",
         "message": f"Caches cleared. Removed {old_cache_size} language entries and {old_context_size} user contexts.",
@@ -1153,18 +1890,30 @@ def clear_language_cache():
 
 @app.route('/reload-language-data')
 def reload_language_data():
-    """언어별 데이터 다시 로드 (초기화 함수 호출)"""
-    global language_data_cache
-    language_data_cache.clear()
+    """언어별 데이터 다시 로드 (초기화 함수 호출, 새 스냅샷을 만든 뒤 교체)"""
     initialize_data()
+    invalidate_answer_caches()
+    snapshot = catalog_store.current
     return jsonify({
         "status": "success",
         "message": "All data reloaded successfully.",
-        "cached_languages": list(language_data_cache.keys()),
-        "product_files": len(product_data_cache),
+        "cached_languages": list(snapshot.company_info.keys()),
+        "product_files": len(snapshot.products),
+        "catalog_version": snapshot.version,
         "timestamp": datetime.now().isoformat()
     })
 
+@app.route('/usage-report')
+def usage_report():
+    """OpenAI 토큰 사용량과 비용 보고서 (경로별/언어별/모델별, ?days=7 이면 최근 7일)"""
+    try:
+        days = int(request.args.get('days', '1'))
+    except ValueError:
+        return jsonify({"error": "days 는 정수여야 합니다."}), 400
+    report = usage_tracker.report(days)
+    report["timestamp"] = datetime.now().isoformat()
+    return jsonify(report)
+
 @app.route('/chat', methods=['POST'])
 def chat():
     """
@@ -1176,68 +1925,114 @@ def chat():
         if not user_message:
             return jsonify({"error": "Empty message."}), 400
 
-        bot_response = get_gpt_response(user_message, user_id)
-        
-        save_chat(user_message, bot_response, user_id)
+        started = time.perf_counter()
+        tracer.start()
+        chat_meta = {}
+        bot_response = get_gpt_response(user_message, user_id, chat_meta)
+
+        with tracer.span('format'):
+            formatted_html = format_text_for_messenger(bot_response)
+            response_with_links = add_hyperlinks(formatted_html)
 
-        formatted_html = format_text_for_messenger(bot_response)
-        response_with_links = add_hyperlinks(formatted_html)
+        chat_meta["stages_ms"] = finish_request_metrics('chat', chat_meta.get("route", "unknown"), started)
+        chat_meta["latency_ms"] = round((time.perf_counter() - started) * 1000, 1)
+        save_chat(user_message, bot_response, user_id, chat_meta.get("language"), chat_meta)
         
         return jsonify({"reply": response_with_links, "is_html": True})
 
     except Exception as e:
         logger.error(f"❌ /chat 엔드포인트에서 오류 발생: {e}")
-        fallback_text = get_english_fallback_response("general inquiry", f"Web chat system error: {str(e)[:100]}")
+        errors_total.inc(stage="chat")
+        fallback_text = get_english_fallback_response("general inquiry", f"Web chat system error: {str(e)[:100]}",
+                                                      "chat_error")
         
         formatted_fallback = format_text_for_messenger(fallback_text)
         final_fallback_html = add_hyperlinks(formatted_fallback)
         
         return jsonify({"reply": final_fallback_html, "is_html": True, "error": "fallback_mode"})
 
+def sse_event(event: str, data: Any) -> str:
+    """Server-Sent Events 형식의 이벤트 한 개"""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+@app.route('/chat/stream', methods=['POST'])
+def chat_stream():
+    """
+    [웹 UI 전용] /chat 의 스트리밍 버전.
+    GPT 토큰이 도착하는 대로 HTML 조각을 SSE 'delta' 이벤트로 보내고, 끝나면 'done' 이벤트를 보냅니다.
+    """
+    payload = request.get_json(silent=True) or {}
+    user_message = (payload.get('message') or '').strip()
+    user_id = payload.get('user_id', 'web_user')
+    if not user_message:
+        return jsonify({"error": "Empty message."}), 400
+
+    def generate():
+        # 첫 바이트를 바로 보내 프록시/브라우저가 연결을 열어두도록 함
+        yield ": stream-start\n\n"
+        started = time.perf_counter()
+        tracer.start()
+        try:
+            for event, data in stream_gpt_response(user_message, user_id):
+                if event == 'done':
+                    chat_meta = {
+                        "route": data["route"],
+                        "latency_ms": round((time.perf_counter() - started) * 1000, 1),
+                        "model": data["model"],
+                        "usage": data["usage"],
+                        "truncated": data["truncated"],
+                        "intents": data["intents"],
+                        "stages_ms": finish_request_metrics('chat_stream', data["route"], started),
+                    }
+                    save_chat(user_message, data["text"], user_id, data["language"], chat_meta)
+                    yield sse_event('done', {"route": data["route"], "truncated": data["truncated"]})
+                else:
+                    yield sse_event(event, {"html": data})
+        except Exception as e:
+            logger.error(f"❌ /chat/stream 엔드포인트에서 오류 발생: {e}")
+            errors_total.inc(stage="chat_stream")
+            tracer.finish()
+            fallback_text = get_english_fallback_response("general inquiry", f"Web chat system error: {str(e)[:100]}",
+                                                          "chat_error")
+            yield sse_event('replace', {"html": add_hyperlinks(format_text_for_messenger(fallback_text))})
+            yield sse_event('done', {"route": "fallback", "truncated": False, "error": "fallback_mode"})
+
+    return Response(stream_with_context(generate()), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no',
+    })
+
 @app.route('/line', methods=['POST'])
 def line_webhook():
     """
-    [LINE 플랫폼 전용] 웹훅 이벤트를 처리합니다.
+    [LINE 플랫폼 전용] 웹훅 이벤트를 받습니다.
+    서명 검증 후 텍스트 메시지 이벤트를 작업 큐에 넣고 바로 200 을 반환하며,
+    답변 생성과 전송은 line_work_queue 의 워커가 사용자별 순서를 지키며 병렬로 처리합니다.
     """
+    started = time.perf_counter()
     try:
         body = request.get_data(as_text=True)
         signature = request.headers.get('X-Line-Signature', '')
         
-        if not verify_line_signature(body.encode('utf-8'), signature):
+        with tracer.span('line_verify'):
+            verified = verify_line_signature(body.encode('utf-8'), signature)
+        if not verified:
             logger.warning("⚠️ 잘못된 서명입니다.")
+            request_seconds.observe(time.perf_counter() - started, endpoint='line_webhook', route='invalid_signature')
             return "OK", 200
 
         webhook_data = json.loads(body)
         for event in webhook_data.get("events", []):
             if event.get("type") == "message" and event.get("message", {}).get("type") == "text":
-                user_text = event["message"]["text"].strip()
-                reply_token = event["replyToken"]
-                user_id = event.get("source", {}).get("userId", "unknown")
-                
-                detected_language = detect_user_language(user_text)
-                logger.info(f"👤 LINE 사용자 {user_id[:8]} ({detected_language}): {user_text}")
-                
-                welcome_keywords = ["สวัสดี", "หวัดดี", "hello", "hi", "สวัสดีค่ะ", "สวัสดีครับ", "ดีจ้า", "เริ่ม", "안녕하세요", "안녕", "こんにちは", "你好", "नमस्ते"]
-                
-                if user_text.lower() in [k.lower() for k in welcome_keywords]:
-                    responses = {
-                        'thai': "สวัสดีค่ะ! 💕 ยินดีต้อนรับสู่ SABOO THAILAND ค่ะ\n\nมีอะไรให้ดิฉันช่วยเหลือคะ? 😊",
-                        'korean': "안녕하세요! 💕 SABOO THAILAND에 오신 것을 환영합니다!\n\n무엇을 도와드릴까요? 😊",
-                        'japanese': "こんにちは！💕 SABOO THAILANDへようこそ！\n\n何かお手伝いできることはありますか？😊",
-                        'chinese': "您好！💕 欢迎来到 SABOO THAILAND！\n\n有什么可以帮您的吗？😊",
-                        'english': "Hello! 💕 Welcome to SABOO THAILAND!\n\nHow can I help you today? 😊"
-                    }
-                    response_text = responses.get(detected_language, responses['english'])
-                else:
-                    response_text = get_gpt_response(user_text, user_id)
-
-                formatted_for_line = format_text_for_line(response_text)
-
-                if send_line_message(reply_token, formatted_for_line):
-                    save_chat(user_text, formatted_for_line, user_id)
+                # 같은 사용자의 이벤트는 순서대로, 다른 사용자끼리는 병렬로 처리
+                user_id = event.get("source", {}).get("userId")
+                if not line_work_queue.submit(event, key=user_id):
+                    errors_total.inc(stage="line_queue_full")
+        request_seconds.observe(time.perf_counter() - started, endpoint='line_webhook', route='enqueued')
         return "OK", 200
     except Exception as e:
         logger.error(f"❌ LINE 웹훅 처리 중 심각한 오류 발생: {e}")
+        errors_total.inc(stage="line_webhook")
         import traceback
         logger.error(f"❌ 전체 트레이스백: {traceback.format_exc()}")
         return "Error", 500
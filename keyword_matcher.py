@@ -0,0 +1,168 @@
+# -*- coding: utf-8 -*-
+"""
+Aho-Corasick 다중 패턴 매칭기.
+
+의도 키워드, '더 자세한 정보' 키워드, 다국어 제품명 매핑처럼 수백 개의
+키워드를 메시지 한 번 훑는 것으로 모두 찾아냅니다.
+(키워드마다 `keyword in message` 를 반복하던 방식 대체)
+"""
+from collections import deque
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+
+def _is_spaced_word_char(char: str) -> bool:
+    """띄어쓰기로 단어를 나누는 문자 체계(라틴/키릴/아랍 등)의 글자나 숫자인지 (태국어, 한중일 제외)"""
+    return char.isalnum() and ord(char) < 0x0E00
+
+
+class KeywordHit:
+    """메시지에서 찾은 키워드 하나"""
+    __slots__ = ('keyword', 'category', 'payload', 'start', 'end')
+
+    def __init__(self, keyword: str, category: str, payload: Any, start: int, end: int):
+        self.keyword = keyword
+        self.category = category
+        self.payload = payload
+        self.start = start
+        self.end = end
+
+    def __repr__(self) -> str:
+        return f"KeywordHit({self.keyword!r}, {self.category!r}, {self.start}:{self.end})"
+
+    def is_whole_word(self, text: str) -> bool:
+        """
+        단어 일부가 아닌 매칭인지 ('located' 안의 'cat' 은 False).
+        띄어쓰기가 없는 문자 체계(태국어, 한중일)는 경계를 알 수 없으므로 항상 True
+        """
+        if self.start > 0 and _is_spaced_word_char(text[self.start - 1]) and _is_spaced_word_char(self.keyword[0]):
+            return False
+        if self.end < len(text) and _is_spaced_word_char(text[self.end]) and _is_spaced_word_char(self.keyword[-1]):
+            return False
+        return True
+
+
+class KeywordHits:
+    """한 메시지에 대한 전체 매칭 결과 (카테고리별 조회용)"""
+    __slots__ = ('hits', '_by_category')
+
+    def __init__(self, hits: List[KeywordHit]):
+        self.hits = hits
+        self._by_category: Dict[str, List[KeywordHit]] = {}
+        for hit in hits:
+            self._by_category.setdefault(hit.category, []).append(hit)
+
+    def has(self, *categories: str) -> bool:
+        """주어진 카테고리 중 하나라도 매칭되었는지"""
+        return any(category in self._by_category for category in categories)
+
+    def get(self, category: str) -> List[KeywordHit]:
+        return self._by_category.get(category, [])
+
+    def keywords(self, category: str) -> Set[str]:
+        return {hit.keyword for hit in self.get(category)}
+
+    def categories(self) -> Dict[str, Set[str]]:
+        return {category: {hit.keyword for hit in hits} for category, hits in self._by_category.items()}
+
+    def whole_word_categories(self, text: str) -> Set[str]:
+        """단어 단위로 매칭된 키워드가 하나라도 있는 카테고리 (text: 스캔한 문자열)"""
+        return {hit.category for hit in self.hits if hit.is_whole_word(text)}
+
+    def __len__(self) -> int:
+        return len(self.hits)
+
+
+class AhoCorasickMatcher:
+    """
+    키워드 → (카테고리, payload) 를 등록한 뒤 build() 로 오토마톤을 만들고,
+    find_all() 로 겹치는 매칭까지 포함한 모든 결과를 한 번에 반환합니다.
+    """
+
+    def __init__(self, case_insensitive: bool = True):
+        self.case_insensitive = case_insensitive
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._output: List[List[int]] = [[]]
+        self._entries: List[Tuple[str, str, Any]] = []
+        self._seen: Set[Tuple[str, str]] = set()
+        self._built = False
+
+    def add(self, keyword: str, category: str, payload: Any = None) -> None:
+        """키워드 등록 (같은 키워드/카테고리 쌍은 한 번만 등록)"""
+        if self.case_insensitive:
+            keyword = keyword.lower()
+        if not keyword or (keyword, category) in self._seen:
+            return
+        self._seen.add((keyword, category))
+
+        node = 0
+        for char in keyword:
+            next_node = self._goto[node].get(char)
+            if next_node is None:
+                next_node = len(self._goto)
+                self._goto[node][char] = next_node
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append([])
+            node = next_node
+        self._output[node].append(len(self._entries))
+        self._entries.append((keyword, category, payload))
+        self._built = False
+
+    def build(self) -> 'AhoCorasickMatcher':
+        """실패 링크 계산 (BFS)"""
+        queue = deque()
+        for next_node in self._goto[0].values():
+            self._fail[next_node] = 0
+            queue.append(next_node)
+
+        while queue:
+            node = queue.popleft()
+            for char, next_node in self._goto[node].items():
+                queue.append(next_node)
+                fail = self._fail[node]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                candidate = self._goto[fail].get(char, 0)
+                self._fail[next_node] = candidate if candidate != next_node else 0
+                self._output[next_node] = self._output[next_node] + self._output[self._fail[next_node]]
+
+        self._built = True
+        return self
+
+    def find_all(self, text: str) -> List[KeywordHit]:
+        """text 를 한 번 훑어서 모든 키워드 매칭을 반환"""
+        if not self._built:
+            self.build()
+        if self.case_insensitive:
+            text = text.lower()
+
+        goto, fail, output, entries = self._goto, self._fail, self._output, self._entries
+        hits: List[KeywordHit] = []
+        node = 0
+        for position, char in enumerate(text):
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+            if output[node]:
+                for entry_id in output[node]:
+                    keyword, category, payload = entries[entry_id]
+                    hits.append(KeywordHit(keyword, category, payload, position - len(keyword) + 1, position + 1))
+        return hits
+
+    def scan(self, text: str) -> KeywordHits:
+        return KeywordHits(self.find_all(text))
+
+    def stats(self) -> Dict[str, int]:
+        return {"patterns": len(self._entries), "states": len(self._goto)}
+
+
+def build_matcher(keyword_groups: Dict[str, List[str]], extra: Optional[List[Tuple[str, str, Any]]] = None) -> AhoCorasickMatcher:
+    """{카테고리: [키워드...]} 와 (키워드, 카테고리, payload) 목록으로 매칭기 생성"""
+    matcher = AhoCorasickMatcher()
+    for category, keywords in keyword_groups.items():
+        for keyword in keywords:
+            matcher.add(keyword, category)
+    for keyword, category, payload in extra or []:
+        matcher.add(keyword, category, payload)
+    return matcher.build()
@@ -0,0 +1,263 @@
+# -*- coding: utf-8 -*-
+"""
+사용자 메시지 언어 감지.
+
+1) 문자 체계(script): 메시지의 서로 다른 문자들을 한 번만 훑어 코드포인트 범위 표로
+   태국어/한국어/일본어/중국어/아랍어/러시아어 등을 판별합니다. (기존 re.search 10번 대체)
+2) 라틴 문자: 함께 배포하는 문자 3-gram 프로필(language_profiles.json)로
+   영어/프랑스어/스페인어/독일어/베트남어를 구분합니다. 근거가 약하면 영어로 둡니다.
+   빠른 경로: ASCII 메시지에 영어에만 쓰는 단어(the, you, price ...)가 있으면 영어,
+   악센트 문자들이 한 언어만 가리키면(ñ → 스페인어, ß → 독일어, ơ → 베트남어) 그 언어로 바로 정하고
+   3-gram 점수는 계산하지 않습니다.
+
+프로필 다시 만들기: python benchmarks/build_language_profiles.py
+"""
+import bisect
+import json
+import logging
+import math
+import os
+import re
+from typing import Dict, FrozenSet, Iterable, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+PROFILE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "language_profiles.json")
+DEFAULT_LANGUAGE = 'english'
+
+# (시작, 끝, 문자 체계) - 시작 코드포인트 순으로 정렬
+SCRIPT_RANGES: List[Tuple[int, int, str]] = sorted([
+    (0x0041, 0x005A, 'latin'), (0x0061, 0x007A, 'latin'),
+    (0x00C0, 0x024F, 'latin_ext'),       # Latin-1 보충, 확장 A/B (é, ñ, ß, ă ...)
+    (0x1E00, 0x1EFF, 'latin_ext'),       # 라틴 확장 추가 (베트남어 성조 문자)
+    (0x0400, 0x04FF, 'cyrillic'),
+    (0x0600, 0x06FF, 'arabic'), (0x0750, 0x077F, 'arabic'),
+    (0x0E00, 0x0E7F, 'thai'),
+    (0x1000, 0x109F, 'myanmar'),
+    (0x1100, 0x11FF, 'hangul'),          # 한글 자모
+    (0x1780, 0x17FF, 'khmer'),
+    (0x3040, 0x30FF, 'kana'),            # 히라가나, 가타카나
+    (0x3130, 0x318F, 'hangul'),          # 호환용 자모 (ㅋㅋ, ㅎㅎ)
+    (0x3400, 0x4DBF, 'han'), (0x4E00, 0x9FFF, 'han'), (0xF900, 0xFAFF, 'han'),
+    (0xAC00, 0xD7AF, 'hangul'),
+    (0xFF66, 0xFF9F, 'kana'),            # 반각 가타카나
+])
+_RANGE_STARTS = [start for start, _, _ in SCRIPT_RANGES]
+
+# 여러 문자 체계가 섞이면 앞쪽이 우선 (기존 감지 순서와 동일)
+SCRIPT_PRIORITY = ('thai', 'hangul', 'kana', 'han', 'arabic', 'cyrillic', 'myanmar', 'khmer')
+SCRIPT_LANGUAGE = {
+    'thai': 'thai', 'hangul': 'korean', 'kana': 'japanese', 'han': 'chinese',
+    'arabic': 'arabic', 'cyrillic': 'russian', 'myanmar': 'myanmar', 'khmer': 'khmer',
+}
+
+# 라틴 문자 판별 기준
+WORD_PATTERN = re.compile("[a-z\u00df-\u00f6\u00f8-\u024f\u1e00-\u1eff]+")
+MIN_TRIGRAMS = 6
+# 영어가 아닌 언어로 판단하려면 3-gram 하나당 평균 로그 확률이 이만큼 더 높아야 함
+MIN_MARGIN = 0.35
+# 영어에 없는 글자(é, ñ, ß, ơ 등)가 있으면 기준을 낮춤
+ACCENTED_MARGIN = 0.0
+
+# 프랑스어/스페인어/독일어/베트남어 문장에는 나오지 않는 영어 단어 (ASCII 메시지 빠른 경로)
+# 'in', 'was', 'me', 'a' 처럼 다른 언어에서도 쓰는 단어는 넣지 않음
+ENGLISH_MARKERS = frozenset([
+    'the', 'you', 'your', 'is', 'are', 'do', 'does', 'what', 'how', 'where', 'when', 'can', 'i',
+    'have', 'my', 'want', 'need', 'much', 'price', 'please', 'hi', 'hello', 'thanks', 'thank',
+    'and', 'for', 'to', 'it', 'this', 'that', 'with', 'of',
+])
+
+# 악센트 문자(소문자) → 그 문자를 쓰는 라틴 언어. 메시지의 악센트 문자들이 가리키는 언어가
+# 하나뿐이면 3-gram 점수 없이 그 언어로 판단 (표에 없는 문자가 있으면 점수로 판단)
+_VIETNAMESE = frozenset(['vietnamese'])
+ACCENT_LANGUAGES: Dict[str, FrozenSet[str]] = {
+    **{char: frozenset(['spanish']) for char in 'ñ¿¡'},
+    # ü 는 스페인어에도 드물게 나오지만(pingüino) 그런 문장에는 보통 á/ñ 같은 문자가 함께 있어 점수로 판단됨
+    **{char: frozenset(['german']) for char in 'äöüß'},
+    **{char: frozenset(['french']) for char in 'çëïîûœ'},
+    **{char: frozenset(['french', 'vietnamese']) for char in 'àâèêôù'},
+    'é': frozenset(['french', 'spanish', 'vietnamese']),
+    **{char: frozenset(['spanish', 'vietnamese']) for char in 'áíóú'},
+    **{char: _VIETNAMESE for char in 'ãõìòýăđơưĩũ'},
+}
+
+_script_cache: Dict[str, Optional[str]] = {}
+
+
+def script_of(char: str) -> Optional[str]:
+    """문자 하나의 문자 체계 (구두점, 숫자, 이모지 등은 None)"""
+    cached = _script_cache.get(char, False)
+    if cached is not False:
+        return cached
+    code = ord(char)
+    position = bisect.bisect_right(_RANGE_STARTS, code) - 1
+    script = None
+    if position >= 0:
+        start, end, name = SCRIPT_RANGES[position]
+        if code <= end and char.isalpha():
+            script = name
+    if len(_script_cache) < 65536:
+        _script_cache[char] = script
+    return script
+
+
+def trigrams(text: str) -> List[str]:
+    """소문자 라틴 글자만 남기고 단어 앞뒤에 공백을 붙인 문자 3-gram 목록"""
+    return word_trigrams(WORD_PATTERN.findall(text.lower()))
+
+
+def word_trigrams(words: Iterable[str]) -> List[str]:
+    grams = []
+    for word in words:
+        padded = f" {word} "
+        grams += [padded[i:i + 3] for i in range(len(padded) - 2)]
+    return grams
+
+
+def accent_language(chars: Iterable[str]) -> Optional[str]:
+    """악센트 문자들이 한 언어만 가리키면 그 언어 (ASCII 가 아닌 글자가 표에 없거나 여러 언어면 None)"""
+    candidates: Optional[FrozenSet[str]] = None
+    for char in chars:
+        if char.isascii():
+            continue
+        char = char.lower()
+        languages = ACCENT_LANGUAGES.get(char)
+        if languages is None:
+            if 0x1E00 <= ord(char) <= 0x1EFF:
+                # 라틴 확장 추가 블록 (ạ, ế, ở ...) 은 베트남어 성조 문자
+                languages = _VIETNAMESE
+            elif script_of(char) in ('latin', 'latin_ext'):
+                return None
+            else:
+                # 이모지, 따옴표 등
+                continue
+        candidates = languages if candidates is None else candidates & languages
+        if not candidates:
+            return None
+    if candidates is not None and len(candidates) == 1:
+        return next(iter(candidates))
+    return None
+
+
+def build_profiles(texts: Dict[str, str], top: int = 600) -> Dict[str, Dict[str, object]]:
+    """
+    {언어: 학습 텍스트} → {언어: {"floor": 처음 보는 3-gram 로그 확률, "grams": {3-gram: 로그 확률}}}
+    언어마다 빈도 상위 top 개만 남깁니다. floor 는 모든 언어에 같은 값(가장 낮은 값)을 써서
+    학습 텍스트가 적은 언어(스페인어)가 처음 보는 3-gram 에서 점수를 덜 잃는 쏠림을 막습니다.
+    """
+    profiles = {}
+    floor = 0.0
+    for language, text in texts.items():
+        counts: Dict[str, int] = {}
+        for gram in trigrams(text):
+            counts[gram] = counts.get(gram, 0) + 1
+        ranked = sorted(counts.items(), key=lambda item: (-item[1], item[0]))[:top]
+        total = sum(count for _, count in ranked)
+        floor = min(floor, math.log(0.5 / (total + top)))
+        profiles[language] = {
+            "grams": {gram: round(math.log((count + 0.5) / (total + top)), 3) for gram, count in ranked},
+        }
+    for profile in profiles.values():
+        profile["floor"] = round(floor, 3)
+    return profiles
+
+
+class LanguageDetector:
+    """문자 체계 표 + 라틴 문자 3-gram 프로필 언어 감지기"""
+
+    def __init__(self, profiles: Optional[Dict[str, Dict[str, object]]] = None):
+        self.profiles = profiles if profiles is not None else self._load_profiles()
+        self.latin_languages = list(self.profiles)
+        # 3-gram 하나를 한 번만 찾도록 언어별 확률을 합친 표: {3-gram: (언어별 로그 확률 - floor)}
+        self._floors = [profile["floor"] for profile in self.profiles.values()]
+        self._table: Dict[str, Tuple[float, ...]] = {}
+        for position, profile in enumerate(self.profiles.values()):
+            for gram, logprob in profile["grams"].items():
+                row = self._table.setdefault(gram, (0.0,) * len(self.profiles))
+                self._table[gram] = row[:position] + (logprob - profile["floor"],) + row[position + 1:]
+
+    @staticmethod
+    def _load_profiles() -> Dict[str, Dict[str, object]]:
+        try:
+            with open(PROFILE_PATH, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"⚠️ 언어 프로필({PROFILE_PATH})을 읽지 못해 라틴 문자는 영어로 처리합니다: {e}")
+            return {}
+
+    def scripts(self, message: str) -> Set[Optional[str]]:
+        """메시지에 나타난 문자 체계 집합 (서로 다른 글자마다 한 번만 확인, None 포함 가능)"""
+        return self._scripts_of(set(message))
+
+    @staticmethod
+    def _scripts_of(chars: Set[str]) -> Set[Optional[str]]:
+        try:
+            return {_script_cache[char] for char in chars}
+        except KeyError:
+            return {script_of(char) for char in chars}
+
+    def detect(self, message: str) -> str:
+        if message.isascii():
+            # 순수 ASCII: 문자 체계 확인 없이 바로 라틴 언어 판별
+            return self.detect_unaccented(message)
+        chars = set(message)
+        found = self._scripts_of(chars)
+        for script in SCRIPT_PRIORITY:
+            if script in found:
+                if script == 'han' and 'kana' in found:
+                    return 'japanese'
+                return SCRIPT_LANGUAGE[script]
+        if 'latin_ext' in found:
+            language = accent_language(chars)
+            if language in self.profiles:
+                return language
+            return self.detect_latin(message, accented=True)
+        if 'latin' in found:
+            # 이모지, 따옴표 등만 ASCII 가 아닌 경우
+            return self.detect_unaccented(message)
+        return DEFAULT_LANGUAGE
+
+    def detect_unaccented(self, message: str) -> str:
+        """악센트 없는 라틴 문자 메시지: 영어 단어가 있으면 영어, 없으면 3-gram 점수로 판단"""
+        words = WORD_PATTERN.findall(message.lower())
+        if not ENGLISH_MARKERS.isdisjoint(words):
+            return DEFAULT_LANGUAGE
+        return self.detect_latin(message, accented=False, grams=word_trigrams(words))
+
+    def scores(self, message: str, grams: Optional[List[str]] = None) -> Dict[str, float]:
+        """라틴 언어별 3-gram 평균 로그 확률"""
+        if grams is None:
+            grams = trigrams(message)
+        if not grams or not self.profiles:
+            return {}
+        table = self._table
+        rows = [table[gram] for gram in grams if gram in table]
+        totals = [sum(column) for column in zip(*rows)] if rows else [0.0] * len(self._floors)
+        count = len(grams)
+        return {language: floor + total / count
+                for language, floor, total in zip(self.latin_languages, self._floors, totals)}
+
+    def detect_latin(self, message: str, accented: bool, grams: Optional[List[str]] = None) -> str:
+        if grams is None:
+            grams = trigrams(message)
+        if not self.profiles or (len(grams) < MIN_TRIGRAMS and not accented):
+            return DEFAULT_LANGUAGE
+        scores = self.scores(message, grams)
+        best = max(scores, key=scores.get)
+        if best == DEFAULT_LANGUAGE:
+            return best
+        margin = ACCENTED_MARGIN if accented else MIN_MARGIN
+        if scores[best] - scores.get(DEFAULT_LANGUAGE, -math.inf) <= margin:
+            return DEFAULT_LANGUAGE
+        return best
+
+
+_detector: Optional[LanguageDetector] = None
+
+
+def detect_language(message: str) -> str:
+    """기본 감지기로 언어 감지 (프로필은 처음 호출할 때 읽음)"""
+    global _detector
+    if _detector is None:
+        _detector = LanguageDetector()
+    return _detector.detect(message)
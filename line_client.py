@@ -0,0 +1,171 @@
+# -*- coding: utf-8 -*-
+"""
+LINE Messaging API 클라이언트.
+
+모든 LINE 호출이 하나의 requests.Session(연결 풀 + keep-alive)을 공유하므로
+답장마다 api.line.me 와 TCP/TLS 연결을 새로 맺지 않습니다.
+일시적인 오류(연결 실패, 429, 5xx)는 지수 백오프로 정해진 횟수만 재시도합니다.
+"""
+import logging
+import threading
+import uuid
+from typing import Iterable, List, Optional, Sequence, Union
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_API_BASE = "https://api.line.me"
+
+# LINE 제한: 한 번의 reply/push 호출에 최대 5개 메시지, 텍스트 메시지당 최대 5000자
+MAX_MESSAGES_PER_CALL = 5
+MAX_TEXT_LENGTH = 5000
+
+RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
+
+Messages = Union[str, Sequence[str]]
+
+
+def split_text(text: str, limit: int = MAX_TEXT_LENGTH) -> List[str]:
+    """긴 텍스트를 줄 경계 기준으로 limit 자 이하 조각으로 분리"""
+    text = text.strip()
+    if len(text) <= limit:
+        return [text] if text else []
+
+    chunks: List[str] = []
+    current = ''
+    for line in text.split('\n'):
+        while len(line) > limit:
+            if current:
+                chunks.append(current.rstrip('\n'))
+                current = ''
+            chunks.append(line[:limit])
+            line = line[limit:]
+        if current and len(current) + len(line) + 1 > limit:
+            chunks.append(current.rstrip('\n'))
+            current = ''
+        current += line + '\n'
+    if current.strip():
+        chunks.append(current.rstrip('\n'))
+    return [chunk for chunk in chunks if chunk.strip()]
+
+
+def build_text_messages(messages: Messages, max_messages: Optional[int] = MAX_MESSAGES_PER_CALL) -> List[dict]:
+    """
+    문자열(또는 문자열 목록)을 LINE 텍스트 메시지 객체 목록으로 변환.
+    max_messages 를 넘으면 남는 조각을 마지막 메시지에 이어 붙이지 않고 잘라냅니다.
+    """
+    if isinstance(messages, str):
+        messages = [messages]
+    texts: List[str] = []
+    for message in messages:
+        texts.extend(split_text(message))
+    if max_messages is not None and len(texts) > max_messages:
+        logger.warning(f"⚠️ LINE 메시지 {len(texts)}개 중 {max_messages}개만 전송합니다.")
+        texts = texts[:max_messages]
+    return [{"type": "text", "text": text} for text in texts]
+
+
+def _batches(items: List[dict], size: int) -> Iterable[List[dict]]:
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+class LineClient:
+    """
+    LINE reply/push API 공용 클라이언트.
+
+    - pool_size: 호스트당 유지할 keep-alive 연결 수 (LINE 워커 스레드 수 이상 권장)
+    - retries/backoff: urllib3 Retry 설정 (backoff × 2^(n-1) 초 대기, Retry-After 헤더 우선)
+    """
+
+    def __init__(self, token: Optional[str], base_url: str = DEFAULT_API_BASE, pool_size: int = 8,
+                 retries: int = 3, backoff: float = 0.5, timeout: float = 10.0):
+        self.token = token
+        self.base_url = base_url.rstrip('/')
+        self.pool_size = pool_size
+        self.retries = retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self._session: Optional[requests.Session] = None
+        self._session_lock = threading.Lock()
+        self.calls = 0
+        self.failures = 0
+
+    @property
+    def session(self) -> requests.Session:
+        if self._session is None:
+            with self._session_lock:
+                if self._session is None:
+                    retry = Retry(
+                        total=self.retries,
+                        backoff_factor=self.backoff,
+                        status_forcelist=RETRY_STATUS_CODES,
+                        allowed_methods=frozenset(['POST']),
+                        respect_retry_after_header=True,
+                        raise_on_status=False,
+                    )
+                    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size, max_retries=retry)
+                    session = requests.Session()
+                    session.mount('https://', adapter)
+                    session.mount('http://', adapter)
+                    session.headers.update({
+                        "Content-Type": "application/json",
+                        "Authorization": f"Bearer {self.token}",
+                    })
+                    self._session = session
+        return self._session
+
+    def _post(self, path: str, payload: dict, headers: Optional[dict] = None) -> bool:
+        self.calls += 1
+        try:
+            response = self.session.post(f"{self.base_url}{path}", json=payload, headers=headers, timeout=self.timeout)
+        except requests.RequestException as e:
+            self.failures += 1
+            logger.error(f"❌ LINE API 요청 실패 ({path}): {e}")
+            return False
+        if response.status_code == 200:
+            return True
+        self.failures += 1
+        logger.error(f"❌ LINE API 오류: {response.status_code} - {response.text}")
+        return False
+
+    def reply(self, reply_token: str, messages: Messages) -> bool:
+        """reply 토큰으로 답장 (토큰은 한 번만 쓸 수 있으므로 최대 5개 메시지를 한 번에 전송)"""
+        if not self.token:
+            logger.error("❌ LINE_TOKEN이 없습니다.")
+            return False
+        payload_messages = build_text_messages(messages)
+        if not payload_messages:
+            return False
+        return self._post("/v2/bot/message/reply", {"replyToken": reply_token, "messages": payload_messages})
+
+    def push(self, user_id: str, messages: Messages) -> bool:
+        """사용자에게 push 메시지 전송 (5개씩 나누어 전송, 재시도 시 중복 전송 방지 키 사용)"""
+        if not self.token:
+            logger.error("❌ LINE_TOKEN이 없습니다.")
+            return False
+        payload_messages = build_text_messages(messages, max_messages=None)
+        if not payload_messages:
+            return False
+        for batch in _batches(payload_messages, MAX_MESSAGES_PER_CALL):
+            headers = {"X-Line-Retry-Key": str(uuid.uuid4())}
+            if not self._post("/v2/bot/message/push", {"to": user_id, "messages": batch}, headers):
+                return False
+        return True
+
+    def close(self) -> None:
+        if self._session is not None:
+            self._session.close()
+            self._session = None
+
+    def stats(self) -> dict:
+        return {
+            "base_url": self.base_url,
+            "pool_size": self.pool_size,
+            "retries": self.retries,
+            "calls": self.calls,
+            "failures": self.failures,
+        }
@@ -0,0 +1,173 @@
+# -*- coding: utf-8 -*-
+"""
+LINE 웹훅 이벤트 작업 큐.
+
+웹훅 요청은 서명 검증 후 이벤트를 이 큐에 넣고 바로 200 을 돌려주며,
+GPT 응답 생성과 LINE 답장 전송은 워커 스레드가 백그라운드에서 처리합니다.
+한 웹훅에 여러 사용자의 이벤트가 묶여 와도 서로 다른 사용자는 병렬로,
+같은 사용자의 이벤트는 들어온 순서대로 하나씩 처리합니다.
+"""
+import logging
+import queue
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, Hashable, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+# 대기/처리 시간 통계에 사용할 최근 표본 수
+METRIC_WINDOW = 500
+
+
+def _percentile(samples: List[float], ratio: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(ratio * (len(ordered) - 1))))]
+
+
+class LineWorkQueue:
+    """
+    크기 제한이 있는 키(사용자)별 순차 작업 큐 + 워커 스레드 풀.
+
+    - submit(item, key): 같은 key 의 작업은 순서대로 한 번에 하나씩, 다른 key 는 병렬 처리
+    - 동시에 처리하는 작업 수는 workers 개로 제한
+    - 대기 중인 작업이 max_size 개면 기다리지 않고 False 반환 (버린 이벤트 수 집계)
+    - 워커 스레드는 첫 submit() 때 시작 (gunicorn fork 이후 프로세스에서 생성되도록)
+    - 큐 깊이, 대기 시간(큐에 들어간 뒤 워커가 꺼낼 때까지), 처리 시간, 이벤트별 전체 지연 지표 제공
+    - observer 가 있으면 작업마다 observer(대기 초, 처리 초, 실패 여부) 호출 (/metrics 기록용)
+    """
+
+    def __init__(self, handler: Callable[[Any], None], workers: int = 4, max_size: int = 100,
+                 name: str = "line-worker", observer: Optional[Callable[[float, float, bool], None]] = None):
+        self.handler = handler
+        self.observer = observer
+        self.workers = max(1, workers)
+        self.max_size = max_size
+        self.name = name
+        # 처리할 차례가 된 key 목록. key 마다 최대 하나만 들어있음
+        self._ready: 'queue.Queue' = queue.Queue()
+        self._pending: Dict[Hashable, Deque[Tuple[float, Any]]] = {}
+        self._scheduled: Set[Hashable] = set()
+        self._depth = 0
+        self._unfinished = 0
+        self._threads: List[threading.Thread] = []
+        self._start_lock = threading.Lock()
+        self._lock = threading.Lock()
+        self._wait_times: Deque[float] = deque(maxlen=METRIC_WINDOW)
+        self._handle_times: Deque[float] = deque(maxlen=METRIC_WINDOW)
+        self._latencies: Deque[float] = deque(maxlen=METRIC_WINDOW)
+        self.submitted = 0
+        self.processed = 0
+        self.failed = 0
+        self.dropped = 0
+        self.max_depth = 0
+        self.active = 0
+
+    def start(self) -> None:
+        if self._threads:
+            return
+        with self._start_lock:
+            if self._threads:
+                return
+            for number in range(self.workers):
+                thread = threading.Thread(target=self._run, name=f"{self.name}-{number}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+            logger.info(f"🧵 LINE 작업 큐 워커 {self.workers}개를 시작했습니다. (큐 크기 {self.max_size})")
+
+    def submit(self, item: Any, key: Optional[Hashable] = None) -> bool:
+        """작업 추가. key 가 없으면 다른 작업과 순서 제약 없이 처리. 큐가 가득 차 있으면 False"""
+        self.start()
+        if key is None:
+            key = object()
+        with self._lock:
+            if self._depth >= self.max_size:
+                self.dropped += 1
+                logger.warning(f"⚠️ LINE 작업 큐가 가득 찼습니다. (크기 {self.max_size}) 이벤트를 버립니다.")
+                return False
+            self._pending.setdefault(key, deque()).append((time.monotonic(), item))
+            self._depth += 1
+            self._unfinished += 1
+            self.submitted += 1
+            self.max_depth = max(self.max_depth, self._depth)
+            if key not in self._scheduled:
+                self._scheduled.add(key)
+                self._ready.put(key)
+        return True
+
+    def _run(self) -> None:
+        while True:
+            key = self._ready.get()
+            with self._lock:
+                enqueued_at, item = self._pending[key].popleft()
+                self._depth -= 1
+                self.active += 1
+            started = time.monotonic()
+            failed = False
+            try:
+                self.handler(item)
+            except Exception as e:
+                failed = True
+                logger.error(f"❌ LINE 작업 처리 중 오류 발생: {e}", exc_info=True)
+            finished = time.monotonic()
+            logger.info(f"⏱️ LINE 이벤트 처리 완료 (대기 {(started - enqueued_at) * 1000:.0f}ms, "
+                        f"처리 {(finished - started) * 1000:.0f}ms)")
+
+            if self.observer is not None:
+                try:
+                    self.observer(started - enqueued_at, finished - started, failed)
+                except Exception as e:
+                    logger.error(f"❌ LINE 작업 지표 기록 중 오류: {e}")
+
+            with self._lock:
+                self._wait_times.append(started - enqueued_at)
+                self._handle_times.append(finished - started)
+                self._latencies.append(finished - enqueued_at)
+                self.active -= 1
+                self.processed += 1
+                self.failed += failed
+                self._unfinished -= 1
+                # 같은 key 의 다음 작업은 앞 작업이 끝난 뒤에야 다시 차례를 받음
+                if self._pending[key]:
+                    self._ready.put(key)
+                else:
+                    del self._pending[key]
+                    self._scheduled.discard(key)
+
+    def join(self, timeout: Optional[float] = None) -> bool:
+        """큐가 빌 때까지 대기 (테스트/종료용). timeout 안에 비면 True"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self._unfinished:
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+            time.sleep(0.01)
+        return True
+
+    @staticmethod
+    def _summary(samples: List[float]) -> Dict[str, float]:
+        return {
+            "avg": round(sum(samples) / len(samples) * 1000, 1) if samples else 0.0,
+            "p95": round(_percentile(samples, 0.95) * 1000, 1),
+            "max": round(max(samples) * 1000, 1) if samples else 0.0,
+        }
+
+    def stats(self) -> Dict[str, object]:
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "running": bool(self._threads),
+                "max_size": self.max_size,
+                "depth": self._depth,
+                "max_depth": self.max_depth,
+                "active": self.active,
+                "waiting_keys": len(self._pending),
+                "submitted": self.submitted,
+                "processed": self.processed,
+                "failed": self.failed,
+                "dropped": self.dropped,
+                "wait_ms": self._summary(list(self._wait_times)),
+                "handle_ms": self._summary(list(self._handle_times)),
+                "latency_ms": self._summary(list(self._latencies)),
+            }
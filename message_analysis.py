@@ -0,0 +1,112 @@
+# -*- coding: utf-8 -*-
+"""
+메시지 분석 단계.
+
+들어온 메시지 하나에 대해 언어 감지, 소문자 정규화, 단어 분리, 키워드/의도 스캔,
+인사말 확인을 한 번만 하고 그 결과(MessageAnalysis)를 요청 경로 전체
+(LINE 처리 → GPT 응답 계획 → 견적/제품 검색 → 대화 로그)에 넘겨 재사용합니다.
+"""
+import logging
+import re
+import time
+from typing import Any, Callable, Dict, FrozenSet, Iterable, List, Optional
+
+from keyword_matcher import AhoCorasickMatcher, KeywordHits
+
+logger = logging.getLogger(__name__)
+
+WORD_PATTERN = re.compile(r'\b\w+\b')
+
+
+class MessageAnalysis:
+    """
+    메시지 하나의 분석 결과 (한 번 만든 뒤 읽기만 함).
+
+    - text: 앞뒤 공백을 제거한 원문
+    - normalized: 소문자로 바꾼 text
+    - language: 감지한 언어
+    - tokens: normalized 의 단어 집합
+    - word_count: 공백 기준 단어 수 (짧은 제품명 질문 판단용)
+    - hits: 의도/더보기/제품명 매핑 키워드 스캔 결과
+    - search_words: tokens + 제품명을 영어로 바꾼 문장의 단어 (제품 검색/견적용)
+    - is_welcome: 메시지 전체가 인사말인지
+    """
+    __slots__ = ('text', 'normalized', 'language', 'tokens', 'word_count', 'hits', 'search_words',
+                 'is_welcome', 'elapsed_ms')
+
+    def __init__(self, text: str, normalized: str, language: str, tokens: FrozenSet[str], word_count: int,
+                 hits: KeywordHits, search_words: FrozenSet[str], is_welcome: bool, elapsed_ms: float = 0.0):
+        self.text = text
+        self.normalized = normalized
+        self.language = language
+        self.tokens = tokens
+        self.word_count = word_count
+        self.hits = hits
+        self.search_words = search_words
+        self.is_welcome = is_welcome
+        self.elapsed_ms = elapsed_ms
+
+    @property
+    def intents(self) -> List[str]:
+        """매칭된 키워드 카테고리 (정렬)"""
+        return sorted(self.hits.categories())
+
+    @property
+    def word_intents(self) -> List[str]:
+        """단어 단위로 매칭된 키워드 카테고리 (정렬, 'located' 안의 'cat' 같은 부분 일치 제외)"""
+        return sorted(self.hits.whole_word_categories(self.normalized))
+
+    def log_fields(self) -> Dict[str, Any]:
+        """대화 로그(chat_meta)에 넣을 항목"""
+        return {"language": self.language, "intents": self.intents}
+
+    def __repr__(self) -> str:
+        return f"MessageAnalysis({self.language!r}, intents={self.intents}, words={self.word_count})"
+
+
+class MessageAnalyzer:
+    """
+    MessageAnalysis 생성기.
+
+    matcher 의 'product_mapping' 카테고리 payload 는 (정의 순서, 영어 제품명) 이어야 하며,
+    정의 순서대로 현지 제품명을 영어 제품명으로 바꾼 문장의 단어를 search_words 에 더합니다.
+    """
+
+    def __init__(self, matcher: AhoCorasickMatcher, language_detector: Callable[[str], str],
+                 welcome_keywords: Iterable[str] = ()):
+        self.matcher = matcher
+        self.language_detector = language_detector
+        self.welcome_keywords = frozenset(keyword.lower() for keyword in welcome_keywords)
+        self.analyzed = 0
+        self.total_ms = 0.0
+
+    def translate_product_names(self, normalized: str, hits: KeywordHits) -> str:
+        """다국어 제품명을 영어로 변환 (정의 순서대로 치환)"""
+        translated = normalized
+        mapping_hits = {hit.payload: hit.keyword for hit in hits.get('product_mapping')}
+        for (_, english_name), local_name in sorted(mapping_hits.items()):
+            translated = translated.replace(local_name, english_name)
+            logger.info(f"🌐 제품명 변환: '{local_name}' → '{english_name}'")
+        return translated
+
+    def analyze(self, message: str) -> MessageAnalysis:
+        started = time.perf_counter()
+        text = message.strip()
+        normalized = text.lower()
+        language = self.language_detector(text)
+        hits = self.matcher.scan(normalized)
+        tokens = frozenset(WORD_PATTERN.findall(normalized))
+        search_words = tokens
+        if hits.has('product_mapping'):
+            search_words = tokens | frozenset(WORD_PATTERN.findall(self.translate_product_names(normalized, hits)))
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        self.analyzed += 1
+        self.total_ms += elapsed_ms
+        return MessageAnalysis(text, normalized, language, tokens, len(normalized.split()), hits, search_words,
+                               normalized in self.welcome_keywords, elapsed_ms)
+
+    def stats(self) -> Dict[str, Optional[float]]:
+        return {
+            "analyzed": self.analyzed,
+            "avg_ms": round(self.total_ms / self.analyzed, 3) if self.analyzed else None,
+        }
@@ -0,0 +1,225 @@
+# -*- coding: utf-8 -*-
+"""
+처리 단계별 지연 시간 측정과 Prometheus 텍스트 형식 지표.
+
+- MetricsRegistry: Counter / Histogram / GaugeFunction 을 등록하고 render() 로
+  /metrics 응답(text/plain; version=0.0.4)을 만듭니다. (별도 패키지 없이 직접 구현)
+- StageTracer: `with tracer.span('openai'):` 처럼 단계 하나를 감싸면 단계별 히스토그램에
+  기록하고, start() 로 시작한 요청 안이라면 그 요청의 단계별 시간(ms)에도 더합니다.
+  요청 단위 기록은 contextvars 를 쓰므로 LINE 워커 스레드마다 따로 관리됩니다.
+
+지표는 프로세스마다 따로 쌓입니다. gunicorn 워커가 여러 개면 Prometheus 가 워커별로
+수집하거나 합산해야 합니다.
+"""
+import abc
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+# 초 단위 (1ms ~ 30s)
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+LabelValues = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = '') -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return '{' + ','.join(parts) + '}' if parts else ''
+
+
+def _format_value(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class _Metric(abc.ABC):
+    """지표 공통 부분 (하위 클래스는 render() 로 자기 줄들을 만듦)"""
+    kind = ''
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, object]) -> LabelValues:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name}: 레이블 {self.labelnames} 가 필요합니다 (받은 값: {tuple(labels)})")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+    @abc.abstractmethod
+    def render(self) -> List[str]:
+        """HELP/TYPE 헤더를 포함한 Prometheus 텍스트 줄"""
+
+
+class Counter(_Metric):
+    """증가만 하는 값 (요청 수, 캐시 적중 수 등)"""
+    kind = 'counter'
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: object) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels: object) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return self.header() + [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+                                for key, value in items]
+
+
+class Histogram(_Metric):
+    """구간별 누적 개수 + 합계 + 개수 (지연 시간 분포)"""
+    kind = 'histogram'
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # 레이블별 [구간별 개수(누적 아님), 합계, 개수]
+        self._values: Dict[LabelValues, list] = {}
+
+    def observe(self, value: float, **labels: object) -> None:
+        key = self._key(labels)
+        position = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            entry[0][position] += 1
+            entry[1] += value
+            entry[2] += 1
+
+    def count(self, **labels: object) -> int:
+        entry = self._values.get(self._key(labels))
+        return entry[2] if entry else 0
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = sorted((key, (list(entry[0]), entry[1], entry[2])) for key, entry in self._values.items())
+        lines = self.header()
+        for key, (counts, total, count) in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += bucket_count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(round(total, 6))}")
+            lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+
+class GaugeFunction(_Metric):
+    """수집할 때마다 함수를 호출해 값을 읽는 게이지 (큐 길이 등)"""
+    kind = 'gauge'
+
+    def __init__(self, name: str, documentation: str, function: Callable[[], float]):
+        super().__init__(name, documentation)
+        self.function = function
+
+    def render(self) -> List[str]:
+        try:
+            value = float(self.function())
+        except Exception:
+            return []
+        return self.header() + [f"{self.name} {_format_value(value)}"]
+
+
+class MetricsRegistry:
+    """지표 등록과 Prometheus 텍스트 출력"""
+    CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"이미 등록된 지표입니다: {metric.name}")
+            self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def gauge_function(self, name: str, documentation: str, function: Callable[[], float]) -> GaugeFunction:
+        return self._register(GaugeFunction(name, documentation, function))
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines: List[str] = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+_current_trace: ContextVar[Optional[Dict[str, float]]] = ContextVar('stage_trace', default=None)
+
+
+class StageTracer:
+    """
+    단계별 시간 측정기.
+
+    - start(): 현재 요청의 단계별 기록 시작 (같은 스레드/컨텍스트에서 이후 span 이 모두 더해짐)
+    - span(stage): 단계 하나를 감싸 histogram 에 기록 (start() 없이도 histogram 에는 기록)
+    - finish(): 현재 요청의 {단계: ms} 를 돌려주고 기록 종료
+    """
+
+    def __init__(self, histogram: Histogram):
+        self.histogram = histogram
+
+    def start(self) -> Dict[str, float]:
+        trace: Dict[str, float] = {}
+        _current_trace.set(trace)
+        return trace
+
+    def observe(self, stage: str, seconds: float) -> None:
+        self.histogram.observe(seconds, stage=stage)
+        trace = _current_trace.get()
+        if trace is not None:
+            trace[stage] = trace.get(stage, 0.0) + seconds * 1000
+
+    @contextmanager
+    def span(self, stage: str) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, time.perf_counter() - started)
+
+    def finish(self) -> Dict[str, float]:
+        trace = _current_trace.get() or {}
+        _current_trace.set(None)
+        return {stage: round(ms, 2) for stage, ms in trace.items()}
+
+    @staticmethod
+    def summary(stages_ms: Dict[str, float]) -> str:
+        """로그용 'stage=12.3ms ...' (오래 걸린 순)"""
+        return ' '.join(f"{stage}={ms:.1f}ms" for stage, ms in sorted(stages_ms.items(), key=lambda item: -item[1]))
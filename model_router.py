@@ -0,0 +1,134 @@
+# -*- coding: utf-8 -*-
+"""
+질문 난이도에 따른 GPT 모델 선택.
+
+메시지 분석 결과(MessageAnalysis: 길이, 의도 키워드, 언어)와 응답 경로를 보고
+간단한 질문("몇 시에 열어요?")은 작은 모델(gpt-4o-mini)로, 제품/가격/바코드처럼 회사 자료의
+정확한 사실이 필요한 질문이나 긴 질문은 기본 모델(gpt-4o)로 보냅니다.
+
+정책은 dict(JSON) 로 바꿀 수 있습니다. (flask_app 의 MODEL_ROUTER_POLICY 환경 변수)
+- mode: "auto" (규칙으로 선택) / "default" (항상 기본 모델) / "simple" (항상 작은 모델)
+- complex_routes / complex_intents / complex_languages: 해당하면 기본 모델
+  (complex_intents 기본값은 제품명/구매/목록 키워드 = 카탈로그 사실이 필요한 질문과
+  company_facts 키워드 = 연락처/주소/배송·환불 정책처럼 회사 자료의 정확한 사실이 필요한 질문)
+  의도는 단어 단위 매칭만 봅니다 ('located' 안의 'cat' 은 제품명으로 보지 않음)
+- simple_max_words / simple_max_chars / simple_max_questions: 넘으면 기본 모델
+- simple_max_digits: 숫자가 이보다 많으면(바코드, FDA 번호, 수량) 기본 모델
+- simple_max_tokens: 작은 모델로 보낼 때의 max_tokens
+
+오프라인 비교: benchmarks/replay_model_router.py
+"""
+import logging
+import threading
+from typing import Any, Dict, Optional
+
+from message_analysis import MessageAnalysis
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_POLICY: Dict[str, Any] = {
+    "mode": "auto",
+    "default_model": "gpt-4o",
+    "simple_model": "gpt-4o-mini",
+    "complex_routes": ["more_info"],
+    "complex_intents": ["product_names", "purchase_intent", "list_intent", "company_facts"],
+    "complex_languages": [],
+    "simple_max_words": 15,
+    "simple_max_chars": 90,
+    "simple_max_questions": 1,
+    "simple_max_digits": 3,
+    "simple_max_tokens": 500,
+}
+
+MODES = ('auto', 'default', 'simple')
+
+
+def load_policy(overrides: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """기본 정책에 overrides 를 덮어쓴 정책 (알 수 없는 항목/모드는 ValueError)"""
+    policy = dict(DEFAULT_POLICY)
+    for key, value in (overrides or {}).items():
+        if key not in DEFAULT_POLICY:
+            raise ValueError(f"알 수 없는 모델 라우터 정책 항목입니다: {key}")
+        policy[key] = value
+    if policy["mode"] not in MODES:
+        raise ValueError(f"모델 라우터 mode 는 {MODES} 중 하나여야 합니다: {policy['mode']}")
+    for key in ("complex_routes", "complex_intents", "complex_languages"):
+        policy[key] = frozenset(policy[key])
+    return policy
+
+
+class ModelDecision:
+    """모델 선택 결과 (reason: 선택 이유, 'simple' 이면 작은 모델)"""
+    __slots__ = ('model', 'max_tokens', 'reason')
+
+    def __init__(self, model: str, max_tokens: int, reason: str):
+        self.model = model
+        self.max_tokens = max_tokens
+        self.reason = reason
+
+    def __repr__(self) -> str:
+        return f"ModelDecision({self.model!r}, max_tokens={self.max_tokens}, reason={self.reason!r})"
+
+
+class ModelRouter:
+    """
+    GPT 호출 경로(general, more_info)의 모델 선택기.
+
+    규칙은 위에서부터 처음 해당하는 것 하나로 결정하며, 결정마다 로그 한 줄을 남기고
+    (모델, 이유) 별 건수를 집계합니다.
+    """
+
+    def __init__(self, policy: Optional[Dict[str, Any]] = None):
+        self.policy = load_policy(policy)
+        self._lock = threading.Lock()
+        self._counts: Dict[str, Dict[str, int]] = {}
+
+    def _complex_reason(self, analysis: MessageAnalysis, route: str) -> Optional[str]:
+        policy = self.policy
+        if route in policy["complex_routes"]:
+            return f"route:{route}"
+        intents = policy["complex_intents"].intersection(analysis.word_intents)
+        if intents:
+            return f"intent:{min(intents)}"
+        if analysis.language in policy["complex_languages"]:
+            return f"language:{analysis.language}"
+        if analysis.word_count > policy["simple_max_words"] or len(analysis.text) > policy["simple_max_chars"]:
+            return "long_message"
+        # 전각 물음표(？)는 중국어/일본어 질문
+        if analysis.text.count('?') + analysis.text.count('？') > policy["simple_max_questions"]:
+            return "multi_question"
+        if sum(char.isdigit() for char in analysis.text) > policy["simple_max_digits"]:
+            return "digits"
+        return None
+
+    def decide(self, analysis: MessageAnalysis, route: str, max_tokens: int) -> ModelDecision:
+        """모델 선택 (max_tokens: 기본 모델로 보낼 때의 값)"""
+        policy = self.policy
+        if policy["mode"] != "auto":
+            simple = policy["mode"] == "simple"
+            reason = f"mode:{policy['mode']}"
+        else:
+            reason = self._complex_reason(analysis, route) or "simple"
+            simple = reason == "simple"
+
+        if simple:
+            decision = ModelDecision(policy["simple_model"], min(max_tokens, policy["simple_max_tokens"]), reason)
+        else:
+            decision = ModelDecision(policy["default_model"], max_tokens, reason)
+
+        with self._lock:
+            by_reason = self._counts.setdefault(decision.model, {})
+            by_reason[reason] = by_reason.get(reason, 0) + 1
+        logger.info(f"🧭 모델 선택: {decision.model} ({reason}) - 경로 {route}, 언어 {analysis.language}, "
+                    f"단어 {analysis.word_count}, 글자 {len(analysis.text)}, 의도 {analysis.word_intents}")
+        return decision
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            counts = {model: dict(by_reason) for model, by_reason in self._counts.items()}
+        return {
+            "mode": self.policy["mode"],
+            "default_model": self.policy["default_model"],
+            "simple_model": self.policy["simple_model"],
+            "decisions": counts,
+        }
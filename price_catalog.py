@@ -0,0 +1,206 @@
+# -*- coding: utf-8 -*-
+"""
+price_list/*_price.txt 파서와 가격 카탈로그.
+
+가격 파일의 한 줄
+    PEPPERMINT OVAL SHAPE SOAP 75G - Retail: 75 Baht | 1-100pcs: 46 Baht | 101-500pcs: 43 Baht | ...
+을 PriceRecord(제품명, 용량, 소매가, 수량 구간별 가격) 로 변환하고,
+PriceCatalog 에 열(column) 단위 배열로 보관하여 텍스트를 다시 훑지 않고
+이름/토큰/가격대로 바로 조회할 수 있게 합니다.
+"""
+import bisect
+import math
+import re
+from array import array
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+PRICE_LINE_PATTERN = re.compile(r'^(?P<name>.+?)\s+-\s+Retail\s*:\s*(?P<retail>[\d,]+(?:\.\d+)?)\s*Baht(?P<rest>.*)$', re.IGNORECASE)
+TIER_PATTERN = re.compile(r'(\d+)\s*-\s*(\d+)\s*pcs\s*:\s*([\d,]+(?:\.\d+)?)', re.IGNORECASE)
+SIZE_PATTERN = re.compile(r'(\d+(?:\.\d+)?)\s*(KG|G|ML|L)\b', re.IGNORECASE)
+FILENAME_SIZE_PATTERN = re.compile(r'_(\d+(?:\.\d+)?)(kg|g|ml|l)(?:_|$)', re.IGNORECASE)
+TOKEN_PATTERN = re.compile(r'\w+')
+
+Tier = Tuple[int, int, float]
+
+
+def _to_number(value: str) -> float:
+    return float(value.replace(',', ''))
+
+
+class PriceRecord:
+    """가격 파일 한 줄(SKU)의 구조화된 레코드"""
+    __slots__ = ('product', 'size', 'retail', 'tiers', 'source', 'line_no')
+
+    def __init__(self, product: str, size: Optional[str], retail: float, tiers: Tuple[Tier, ...],
+                 source: str = '', line_no: int = 0):
+        self.product = product
+        self.size = size
+        self.retail = retail
+        self.tiers = tiers
+        self.source = source
+        self.line_no = line_no
+
+    def unit_price(self, quantity: int) -> Optional[float]:
+        """수량에 해당하는 구간 단가 (구간 밖이면 None)"""
+        for low, high, price in self.tiers:
+            if low <= quantity <= high:
+                return price
+        return None
+
+    def to_dict(self) -> Dict[str, object]:
+        return {
+            "product": self.product,
+            "size": self.size,
+            "retail": self.retail,
+            "tiers": [{"min": low, "max": high, "price": price} for low, high, price in self.tiers],
+            "source": self.source,
+            "line_no": self.line_no,
+        }
+
+    def __repr__(self) -> str:
+        return f"PriceRecord({self.product!r}, size={self.size!r}, retail={self.retail})"
+
+
+def parse_price_line(line: str, source: str = '', line_no: int = 0) -> Optional[PriceRecord]:
+    """`NAME - Retail: X Baht | 1-100pcs: Y Baht | ...` 형식의 한 줄을 파싱 (형식이 아니면 None)"""
+    match = PRICE_LINE_PATTERN.match(line.strip())
+    if not match:
+        return None
+
+    product = match.group('name').strip()
+    tiers: List[Tier] = []
+    seen = set()
+    for low, high, price in TIER_PATTERN.findall(match.group('rest')):
+        bounds = (int(low), int(high))
+        # 잘못 이어 붙여진 줄은 같은 구간이 반복되므로 처음 값만 사용
+        if bounds in seen:
+            continue
+        seen.add(bounds)
+        tiers.append((bounds[0], bounds[1], _to_number(price)))
+    tiers.sort()
+
+    size_matches = SIZE_PATTERN.findall(product)
+    size = None
+    if size_matches:
+        amount, unit = size_matches[-1]
+        size = f"{amount}{unit.upper()}"
+    elif source:
+        file_match = FILENAME_SIZE_PATTERN.search(source.rsplit('.', 1)[0])
+        if file_match:
+            size = f"{file_match.group(1)}{file_match.group(2).upper()}"
+
+    return PriceRecord(product, size, _to_number(match.group('retail')), tuple(tiers), source, line_no)
+
+
+def parse_price_file(filename: str, content: str) -> List[PriceRecord]:
+    """가격 파일 전체를 파싱 (제목/구분 줄은 건너뜀)"""
+    records = []
+    for line_no, line in enumerate(content.splitlines(), start=1):
+        record = parse_price_line(line, filename, line_no)
+        if record is not None:
+            records.append(record)
+    return records
+
+
+class PriceCatalog:
+    """
+    PriceRecord 를 열 단위 배열로 보관하는 카탈로그.
+
+    - retail: 소매가 array('d')
+    - tier_prices: 행 × 구간 평탄화 array('d') (해당 구간 가격이 없으면 NaN)
+    - 이름/파일/토큰 색인과 소매가 정렬 색인으로 O(1) 또는 이분 탐색 조회
+    """
+
+    def __init__(self, records: Iterable[PriceRecord] = ()):
+        self.records: List[PriceRecord] = list(records)
+        self.tier_bounds: List[Tuple[int, int]] = sorted({(low, high) for r in self.records for low, high, _ in r.tiers})
+        tier_slot = {bounds: slot for slot, bounds in enumerate(self.tier_bounds)}
+        width = len(self.tier_bounds)
+
+        self.retail = array('d', (r.retail for r in self.records))
+        self.tier_prices = array('d', [math.nan]) * (len(self.records) * width)
+        self.by_name: Dict[str, int] = {}
+        self.by_source: Dict[str, List[int]] = {}
+        self.by_token: Dict[str, array] = {}
+
+        token_rows: Dict[str, List[int]] = {}
+        for row, record in enumerate(self.records):
+            for low, high, price in record.tiers:
+                self.tier_prices[row * width + tier_slot[(low, high)]] = price
+            self.by_name.setdefault(record.product.upper(), row)
+            self.by_source.setdefault(record.source, []).append(row)
+            for token in set(TOKEN_PATTERN.findall(record.product.lower())):
+                token_rows.setdefault(token, []).append(row)
+        self.by_token = {token: array('I', rows) for token, rows in token_rows.items()}
+
+        self._retail_order = array('I', sorted(range(len(self.records)), key=lambda row: self.retail[row]))
+        self._retail_sorted = array('d', (self.retail[row] for row in self._retail_order))
+
+    @classmethod
+    def from_files(cls, files: Dict[str, str],
+                   parsed: Optional[Dict[str, List[PriceRecord]]] = None) -> 'PriceCatalog':
+        """
+        {파일명: 내용} 중 *_price.txt 파일만 파싱하여 카탈로그 생성.
+        parsed 에 파일별 파싱 결과가 있으면 다시 파싱하지 않고, 새로 파싱한 결과는 parsed 에 채웁니다.
+        (파일이 바뀌면 호출하는 쪽에서 parsed 의 해당 항목을 지워야 함)
+        """
+        records: List[PriceRecord] = []
+        for filename, content in files.items():
+            if filename.endswith('_price.txt'):
+                file_records = parsed.get(filename) if parsed is not None else None
+                if file_records is None:
+                    file_records = parse_price_file(filename, content)
+                    if parsed is not None:
+                        parsed[filename] = file_records
+                records.extend(file_records)
+        return cls(records)
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def get(self, product_name: str) -> Optional[PriceRecord]:
+        """정확한 제품명(대소문자 무시)으로 조회"""
+        row = self.by_name.get(product_name.strip().upper())
+        return self.records[row] if row is not None else None
+
+    def rows_for_source(self, filename: str) -> List[int]:
+        return self.by_source.get(filename, [])
+
+    def rows_with_tokens(self, tokens: Sequence[str]) -> List[int]:
+        """제품명에 주어진 토큰이 모두 들어있는 행 (토큰 색인 교집합)"""
+        postings = [self.by_token.get(token.lower()) for token in tokens]
+        if not postings or any(p is None for p in postings):
+            return []
+        postings.sort(key=len)
+        rows = set(postings[0])
+        for posting in postings[1:]:
+            rows.intersection_update(posting)
+        return sorted(rows)
+
+    def rows_in_retail_range(self, low: float = 0.0, high: float = math.inf) -> List[int]:
+        """소매가가 [low, high] 인 행 (정렬 색인 이분 탐색)"""
+        start = bisect.bisect_left(self._retail_sorted, low)
+        end = bisect.bisect_right(self._retail_sorted, high)
+        return sorted(self._retail_order[start:end])
+
+    def tier_slot(self, quantity: int) -> Optional[int]:
+        """수량이 속하는 구간 번호"""
+        for slot, (low, high) in enumerate(self.tier_bounds):
+            if low <= quantity <= high:
+                return slot
+        return None
+
+    def unit_price(self, row: int, quantity: int) -> Optional[float]:
+        """행/수량 → 구간 단가 (O(구간 수))"""
+        slot = self.tier_slot(quantity)
+        if slot is None:
+            return None
+        price = self.tier_prices[row * len(self.tier_bounds) + slot]
+        return None if math.isnan(price) else price
+
+    def stats(self) -> Dict[str, object]:
+        return {
+            "records": len(self.records),
+            "files": len(self.by_source),
+            "tiers": [f"{low}-{high}" for low, high in self.tier_bounds],
+        }
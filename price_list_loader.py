@@ -0,0 +1,197 @@
+# -*- coding: utf-8 -*-
+"""
+price_list 폴더 증분 로더.
+
+파일마다 (수정 시각, 크기)를 기억해 두고, 다시 읽을 때는 폴더를 stat 해서
+새로 생기거나 바뀐 파일만 읽고 삭제된 파일은 빼는 방식으로 새 {파일명: 내용} 을 만듭니다.
+기존 dict 를 비우고 채우는 대신 새 dict 를 만들어 돌려주므로, 읽는 동안에도
+요청은 이전 카탈로그 전체를 그대로 봅니다.
+
+PriceListWatcher 는 일정 간격으로 폴더를 확인해 바뀐 파일이 있으면 콜백을 호출합니다.
+(별도 패키지 없이 stat 폴링)
+"""
+import glob
+import logging
+import os
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+from price_catalog import PriceRecord
+
+logger = logging.getLogger(__name__)
+
+# (st_mtime_ns, st_size)
+FileStamp = Tuple[int, int]
+
+
+class ReloadReport:
+    """다시 읽기 한 번의 결과 (바뀐 파일 목록과 걸린 시간)"""
+    __slots__ = ('added', 'changed', 'removed', 'failed', 'unchanged', 'elapsed_ms', 'finished_at')
+
+    def __init__(self):
+        self.added: List[str] = []
+        self.changed: List[str] = []
+        self.removed: List[str] = []
+        self.failed: List[str] = []
+        self.unchanged = 0
+        self.elapsed_ms = 0.0
+        self.finished_at: Optional[float] = None
+
+    @property
+    def has_changes(self) -> bool:
+        return bool(self.added or self.changed or self.removed)
+
+    def summary(self) -> str:
+        return (f"추가 {len(self.added)}, 변경 {len(self.changed)}, 삭제 {len(self.removed)}, "
+                f"실패 {len(self.failed)}, 그대로 {self.unchanged} ({self.elapsed_ms:.1f}ms)")
+
+    def to_dict(self) -> Dict[str, object]:
+        return {
+            "added": self.added,
+            "changed": self.changed,
+            "removed": self.removed,
+            "failed": self.failed,
+            "unchanged": self.unchanged,
+            "elapsed_ms": round(self.elapsed_ms, 2),
+            "finished_at": self.finished_at,
+        }
+
+
+class PriceListLoader:
+    """
+    폴더의 *.txt 파일을 증분으로 읽는 로더.
+
+    - scan(): 읽지 않고 stat 만으로 추가/변경/삭제된 파일 확인
+    - reload(force): 바뀐 파일만 읽어 새 {파일명: 내용} 과 ReloadReport 반환
+    - parsed_prices: 파일별 가격 파싱 결과 (PriceCatalog.from_files 의 parsed 로 넘겨 재사용)
+    """
+
+    def __init__(self, directory: str = "price_list", pattern: str = "*.txt"):
+        self.directory = directory
+        self.pattern = pattern
+        self.stamps: Dict[str, FileStamp] = {}
+        self.contents: Dict[str, str] = {}
+        self.parsed_prices: Dict[str, List[PriceRecord]] = {}
+        self.last_report: Optional[ReloadReport] = None
+        self._lock = threading.Lock()
+
+    def _stat_files(self) -> Dict[str, Tuple[str, FileStamp]]:
+        """{파일명: (경로, stamp)} (glob 순서 유지)"""
+        found = {}
+        for path in glob.glob(os.path.join(self.directory, self.pattern)):
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            found[os.path.basename(path)] = (path, (stat.st_mtime_ns, stat.st_size))
+        return found
+
+    def scan(self) -> Tuple[List[str], List[str], List[str]]:
+        """(추가, 변경, 삭제) 파일명 목록"""
+        found = self._stat_files()
+        added = [name for name in found if name not in self.stamps]
+        changed = [name for name, (_, stamp) in found.items() if name in self.stamps and self.stamps[name] != stamp]
+        removed = [name for name in self.stamps if name not in found]
+        return added, changed, removed
+
+    def reload(self, force: bool = False) -> Tuple[Dict[str, str], ReloadReport]:
+        """
+        바뀐 파일만 다시 읽은 새 {파일명: 내용} 과 결과 보고.
+        force=True 면 stamp 와 관계없이 모든 파일을 다시 읽습니다.
+        """
+        with self._lock:
+            started = time.perf_counter()
+            report = ReloadReport()
+            found = self._stat_files()
+            stamps: Dict[str, FileStamp] = {}
+            contents: Dict[str, str] = {}
+
+            for name, (path, stamp) in found.items():
+                previous = self.stamps.get(name)
+                if not force and previous == stamp:
+                    stamps[name] = stamp
+                    if name in self.contents:
+                        contents[name] = self.contents[name]
+                    report.unchanged += 1
+                    continue
+                try:
+                    with open(path, 'r', encoding='utf-8') as f:
+                        content = f.read().strip()
+                except Exception as e:
+                    logger.error(f"❌ {path} 로드 실패: {e}")
+                    report.failed.append(name)
+                    # 읽기 실패 시 이전 내용을 유지하고 다음에 다시 시도
+                    if name in self.contents:
+                        contents[name] = self.contents[name]
+                    continue
+                stamps[name] = stamp
+                if content == self.contents.get(name):
+                    # 수정 시각만 바뀐 경우 (touch, 같은 내용으로 다시 저장)
+                    contents[name] = self.contents[name]
+                    report.unchanged += 1
+                    continue
+                self.parsed_prices.pop(name, None)
+                if content:
+                    contents[name] = content
+                    logger.debug(f"✅ {name} 로드 완료 ({len(content)} 문자)")
+                (report.changed if previous is not None else report.added).append(name)
+
+            for name in self.stamps:
+                if name not in found:
+                    report.removed.append(name)
+                    self.parsed_prices.pop(name, None)
+
+            self.stamps = stamps
+            self.contents = contents
+            report.elapsed_ms = (time.perf_counter() - started) * 1000
+            report.finished_at = time.time()
+            self.last_report = report
+            return contents, report
+
+
+class PriceListWatcher:
+    """
+    interval 초마다 loader.scan() 으로 폴더를 확인하고, 바뀐 파일이 있으면 on_change() 호출.
+    스레드는 start() 때 시작합니다 (gunicorn fork 이후 프로세스에서 호출할 것).
+    """
+
+    def __init__(self, loader: PriceListLoader, on_change: Callable[[], None], interval: float = 5.0):
+        self.loader = loader
+        self.on_change = on_change
+        self.interval = interval
+        self.checks = 0
+        self.triggers = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> None:
+        if self.running or self.interval <= 0:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="price-list-watcher", daemon=True)
+        self._thread.start()
+        logger.info(f"👀 {self.loader.directory} 폴더 감시 시작 ({self.interval}초 간격)")
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self.checks += 1
+            try:
+                added, changed, removed = self.loader.scan()
+                if added or changed or removed:
+                    self.triggers += 1
+                    logger.info(f"👀 제품 파일 변경 감지: 추가 {added}, 변경 {changed}, 삭제 {removed}")
+                    self.on_change()
+            except Exception as e:
+                logger.error(f"❌ 제품 폴더 감시 중 오류: {e}")
+
+    def stats(self) -> Dict[str, object]:
+        return {"running": self.running, "interval_seconds": self.interval,
+                "checks": self.checks, "triggers": self.triggers}
@@ -0,0 +1,222 @@
+# -*- coding: utf-8 -*-
+"""
+price_list 제품 파일용 역색인 (Inverted Index).
+
+load_product_files() 가 파일을 읽을 때 한 번만 만들어 두고,
+search_products_by_keywords() 는 매 요청마다 파일 전체를 훑는 대신
+이 색인에서 후보 파일만 꺼내 점수를 계산합니다.
+"""
+import math
+import re
+from typing import Dict, FrozenSet, Iterable, List, Optional, Set, Tuple
+
+WORD_PATTERN = re.compile(r'\b\w+\b')
+_WORD_ONLY = re.compile(r'^\w+$')
+
+# 부분 문자열 조회 결과 메모이제이션 상한 (쿼리 단어 기준)
+MEMO_LIMIT = 4096
+
+# 개별 제품(SKU) 줄 판별: 가격 줄 또는 용량으로 끝나는 목록 줄
+PRICE_LINE_PATTERN = re.compile(r'\s-\s*Retail\s*:', re.IGNORECASE)
+SIZE_SUFFIX_PATTERN = re.compile(r'\d+(?:\.\d+)?\s*(?:kg|g|ml|l)\s*$', re.IGNORECASE)
+
+SkuRef = Tuple[str, int]
+
+# 단어 전체가 아닌 부분 문자열로만 일치한 SKU 줄의 가중치 비율
+PARTIAL_MATCH_FACTOR = 0.5
+
+
+def _trigrams(token: str) -> Set[str]:
+    return {token[i:i + 3] for i in range(len(token) - 2)}
+
+
+def is_sku_line(line: str) -> bool:
+    """제목/구분 줄이 아닌 개별 제품 줄인지 판별"""
+    line = line.strip()
+    if not line or line.startswith('#'):
+        return False
+    if PRICE_LINE_PATTERN.search(line):
+        return True
+    return 'LIST' not in line.upper() and bool(SIZE_SUFFIX_PATTERN.search(line))
+
+
+class ProductIndex:
+    """
+    파일명/내용 → 토큰 역색인.
+
+    검색 단어는 항상 \\w+ 한 단어이므로, 그 단어가 파일 내용에 부분 문자열로
+    등장한다는 것은 내용의 어떤 \\w+ 토큰 안에 포함된다는 것과 같습니다.
+    따라서 (토큰 → 파일) 색인과 (트라이그램 → 토큰) 색인만으로
+    기존 `keyword in content.lower()` 와 동일한 결과를 얻을 수 있습니다.
+
+    previous 를 넘기면 내용이 같은 파일은 이전 색인의 파일별 분석 결과(토큰, SKU 줄)를
+    그대로 재사용하고, 새로 추가되거나 바뀐 파일만 다시 분석합니다.
+    """
+
+    def __init__(self, files: Dict[str, str], previous: Optional['ProductIndex'] = None):
+        self.contents: Dict[str, str] = dict(files)
+        self.contents_lower: Dict[str, str] = {}
+        self.filenames_lower: Dict[str, str] = {}
+        self.file_order: Dict[str, int] = {}
+        self.token_postings: Dict[str, Set[str]] = {}
+        self.trigram_tokens: Dict[str, Set[str]] = {}
+        self.sku_lines: Dict[str, List[str]] = {}
+        self.line_postings: Dict[str, Set[SkuRef]] = {}
+        # 파일별 분석 결과 (다음 증분 색인에서 재사용)
+        self.file_tokens: Dict[str, FrozenSet[str]] = {}
+        self.line_tokens: Dict[str, List[FrozenSet[str]]] = {}
+        self.reused_files = 0
+        self._content_memo: Dict[str, FrozenSet[str]] = {}
+        self._filename_memo: Dict[str, FrozenSet[str]] = {}
+        self._line_memo: Dict[str, FrozenSet[SkuRef]] = {}
+
+        for order, (filename, content) in enumerate(self.contents.items()):
+            if previous is not None and previous.contents.get(filename) == content:
+                content_lower = previous.contents_lower[filename]
+                tokens = previous.file_tokens[filename]
+                lines = previous.sku_lines[filename]
+                line_tokens = previous.line_tokens[filename]
+                self.reused_files += 1
+            else:
+                content_lower = content.lower()
+                tokens = frozenset(WORD_PATTERN.findall(content_lower))
+                # 🔥 SKU(제품 한 줄) 단위 색인
+                lines = [line.strip() for line in content.splitlines() if is_sku_line(line)]
+                line_tokens = [frozenset(WORD_PATTERN.findall(line.lower())) for line in lines]
+
+            self.contents_lower[filename] = content_lower
+            self.filenames_lower[filename] = filename.lower()
+            self.file_order[filename] = order
+            self.file_tokens[filename] = tokens
+            self.sku_lines[filename] = lines
+            self.line_tokens[filename] = line_tokens
+            for token in tokens:
+                postings = self.token_postings.get(token)
+                if postings is None:
+                    postings = self.token_postings[token] = set()
+                    for gram in _trigrams(token):
+                        self.trigram_tokens.setdefault(gram, set()).add(token)
+                postings.add(filename)
+            for line_no, line_token_set in enumerate(line_tokens):
+                for token in line_token_set:
+                    self.line_postings.setdefault(token, set()).add((filename, line_no))
+
+    def __len__(self) -> int:
+        return len(self.contents)
+
+    def _remember(self, memo: Dict[str, FrozenSet[str]], key: str, value: FrozenSet[str]) -> FrozenSet[str]:
+        if len(memo) >= MEMO_LIMIT:
+            memo.clear()
+        memo[key] = value
+        return value
+
+    def _tokens_containing(self, keyword: str) -> Iterable[str]:
+        """keyword 를 부분 문자열로 포함하는 색인 토큰들"""
+        if len(keyword) < 3:
+            return [token for token in self.token_postings if keyword in token]
+        grams = sorted(_trigrams(keyword), key=lambda g: len(self.trigram_tokens.get(g, ())))
+        candidates = self.trigram_tokens.get(grams[0])
+        if not candidates:
+            return []
+        for gram in grams[1:]:
+            candidates = candidates & self.trigram_tokens.get(gram, set())
+            if not candidates:
+                return []
+        return [token for token in candidates if keyword in token]
+
+    def content_matches(self, keyword: str) -> FrozenSet[str]:
+        """파일 내용(소문자)에 keyword 가 포함된 파일명 집합"""
+        cached = self._content_memo.get(keyword)
+        if cached is not None:
+            return cached
+
+        if not keyword:
+            result: FrozenSet[str] = frozenset()
+        elif _WORD_ONLY.match(keyword):
+            files: Set[str] = set()
+            for token in self._tokens_containing(keyword):
+                files |= self.token_postings[token]
+            result = frozenset(files)
+        else:
+            # 공백/기호가 섞인 키워드는 미리 소문자화한 내용에서 직접 찾습니다.
+            result = frozenset(name for name, text in self.contents_lower.items() if keyword in text)
+        return self._remember(self._content_memo, keyword, result)
+
+    def filename_matches(self, keyword: str) -> FrozenSet[str]:
+        """파일명(소문자)에 keyword 가 포함된 파일명 집합"""
+        cached = self._filename_memo.get(keyword)
+        if cached is not None:
+            return cached
+        result = frozenset(name for name, lower in self.filenames_lower.items() if keyword and keyword in lower)
+        return self._remember(self._filename_memo, keyword, result)
+
+    def line_matches(self, keyword: str) -> FrozenSet[SkuRef]:
+        """keyword 가 포함된 SKU 줄 (파일명, 줄 번호) 집합"""
+        cached = self._line_memo.get(keyword)
+        if cached is not None:
+            return cached
+
+        refs: Set[SkuRef] = set()
+        if keyword and _WORD_ONLY.match(keyword):
+            for token in self._tokens_containing(keyword):
+                refs |= self.line_postings.get(token, set())
+        elif keyword:
+            for filename, lines in self.sku_lines.items():
+                refs.update((filename, n) for n, line in enumerate(lines) if keyword in line.lower())
+        return self._remember(self._line_memo, keyword, frozenset(refs))
+
+    def rank_sku_lines(self, filenames: Iterable[str], keywords: Iterable[str],
+                       min_ratio: float = 0.6) -> List[Tuple[str, str, float]]:
+        """
+        주어진 파일들(검색 순위 순)의 SKU 줄을 검색 단어로 점수화하여 (파일명, 줄, 점수) 목록을 반환.
+        후보 파일 전체의 모든 줄에 공통으로 들어있는 단어(예: 비누 파일들만 찾았을 때 'soap')는
+        제품군만 가리키므로 가산점으로만 쓰고, 구분되는 단어가 하나도 없는 줄은 제외합니다.
+        (한 파일의 모든 줄에만 들어있는 단어, 예: 'elephant' 는 그 파일을 가리키므로 구분되는 단어)
+        구분되는 줄이 없으면 빈 리스트를 반환합니다.
+        """
+        allowed = [name for name in dict.fromkeys(filenames) if self.sku_lines.get(name)]
+        total = sum(len(self.sku_lines[name]) for name in allowed)
+        if not total:
+            return []
+        file_rank = {name: rank for rank, name in enumerate(allowed)}
+
+        scores: Dict[SkuRef, float] = {}
+        specific_scores: Dict[SkuRef, float] = {}
+        for keyword in set(keywords):
+            if len(keyword) < 2:
+                continue
+            refs = [ref for ref in self.line_matches(keyword) if ref[0] in file_rank]
+            if not refs:
+                continue
+            weight = math.log(1 + total / len(refs))
+            is_specific = len(refs) < total
+            exact_refs = self.line_postings.get(keyword, set())
+            for ref in refs:
+                # 'mango' 검색 시 'MANGOSTEEN' 처럼 부분 일치만 하는 줄은 절반 점수
+                ref_weight = weight if ref in exact_refs else weight * PARTIAL_MATCH_FACTOR
+                scores[ref] = scores.get(ref, 0.0) + ref_weight
+                if is_specific:
+                    specific_scores[ref] = specific_scores.get(ref, 0.0) + ref_weight
+
+        if not specific_scores:
+            return []
+        best = max(specific_scores.values())
+        ranked = sorted(
+            (ref for ref, score in specific_scores.items() if score >= best * min_ratio),
+            key=lambda ref: (-scores[ref], file_rank[ref[0]], ref[1])
+        )
+        return [(name, self.sku_lines[name][line_no], scores[(name, line_no)]) for name, line_no in ranked]
+
+    def sort_key(self, filename: str) -> int:
+        """로드 순서 (동점일 때 기존 검색과 같은 순서를 유지하기 위함)"""
+        return self.file_order.get(filename, len(self.file_order))
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "files": len(self.contents),
+            "tokens": len(self.token_postings),
+            "trigrams": len(self.trigram_tokens),
+            "sku_lines": sum(len(lines) for lines in self.sku_lines.values()),
+            "reused_files": self.reused_files,
+        }
+
@@ -0,0 +1,200 @@
+# -*- coding: utf-8 -*-
+"""
+대량 구매 견적 엔진.
+
+"500 mango soaps how much" 같은 도매 문의에서 수량과 제품을 뽑아내고,
+PriceCatalog 의 수량 구간(1-100 / 101-500 / 501-1000 / 1001-5000) 가격으로
+합계를 계산해 사용자 언어로 답변합니다. OpenAI 호출 없이 처리됩니다.
+"""
+import math
+import re
+from typing import Dict, Iterable, List, Optional, Set
+
+from price_catalog import PriceCatalog, PriceRecord
+
+# 수량 뒤에 붙는 단위 (있으면 수량으로 확정)
+QUANTITY_UNIT_PATTERN = (
+    r'pcs|pc|pieces|piece|ea|units|unit|bars|bar|'
+    r'개|ชิ้น|ก้อน|個|个|件|块|stück|stk|unités|pièces|piezas|unidades|шт'
+)
+# 수량이 아니라 용량을 뜻하는 단위
+SIZE_UNIT_PATTERN = r'kg|g|ml|l|กรัม|มล|그램|킬로|グラム|克|毫升'
+
+NUMBER_PATTERN = re.compile(
+    r'(?<![\d.,A-Za-z])(\d{1,3}(?:,\d{3})+|\d+)(?![\d.,]\d)\s*'
+    r'(?P<size>(?:' + SIZE_UNIT_PATTERN + r')(?![a-z]))?'
+    r'(?P<unit>(?:' + QUANTITY_UNIT_PATTERN + r'))?',
+    re.IGNORECASE
+)
+
+# 바코드/전화번호 등은 수량으로 보지 않음
+MAX_QUANTITY_DIGITS = 6
+
+# 번역된 제품명 → 카탈로그 제품명 토큰
+TOKEN_ALIASES = {
+    'bathbomb': ('bath', 'bomb'),
+    'bathbombs': ('bath', 'bomb'),
+    'bombs': ('bomb',),
+    'soaps': ('soap',),
+    'scrubs': ('scrub',),
+    'sprays': ('spray',),
+    'perfume': ('parfum',),
+}
+
+# 제품을 특정한다고 보기 위한 최대 출현 비율 (이보다 흔한 토큰만 있으면 견적하지 않음)
+SPECIFIC_TOKEN_MAX_SHARE = 0.25
+MAX_QUOTE_LINES = 5
+
+QUOTE_TEXTS = {
+    'header': {
+        'thai': "🧮 ใบเสนอราคาสำหรับ {quantity} ชิ้น:",
+        'korean': "🧮 {quantity}개 주문 견적입니다:",
+        'japanese': "🧮 {quantity}個のお見積もり:",
+        'chinese': "🧮 {quantity}件的报价:",
+        'english': "🧮 Quote for {quantity} pcs:",
+    },
+    'line': {
+        'thai': "• {product}: {unit} บาท × {quantity} = {total} บาท (ช่วง {tier} ชิ้น)",
+        'korean': "• {product}: {unit} 바트 × {quantity} = {total} 바트 ({tier}개 구간)",
+        'japanese': "• {product}: {unit} バーツ × {quantity} = {total} バーツ ({tier}個の価格帯)",
+        'chinese': "• {product}: {unit} 泰铢 × {quantity} = {total} 泰铢 ({tier}件区间)",
+        'english': "• {product}: {unit} Baht × {quantity} = {total} Baht ({tier} pcs tier)",
+    },
+    'more': {
+        'thai': "…และอีก {count} รายการ",
+        'korean': "…외 {count}개 제품",
+        'japanese': "…他 {count} 商品",
+        'chinese': "…另有 {count} 款产品",
+        'english': "…and {count} more",
+    },
+    'over_limit': {
+        'thai': "📦 สำหรับการสั่งซื้อมากกว่า {limit} ชิ้น กรุณาติดต่อเราเพื่อขอราคาพิเศษ",
+        'korean': "📦 {limit}개를 초과하는 주문은 별도 견적이 필요합니다. 문의해 주세요.",
+        'japanese': "📦 {limit}個を超えるご注文は特別価格となります。お問い合わせください。",
+        'chinese': "📦 超过 {limit} 件的订单请联系我们获取特别报价。",
+        'english': "📦 For orders over {limit} pcs, please contact us for a special quote.",
+    },
+    'footer': {
+        'thai': "* ราคาขายส่งต่อชิ้น ยังไม่รวมค่าจัดส่ง",
+        'korean': "* 도매 단가 기준이며 배송비는 포함되지 않습니다.",
+        'japanese': "* 卸売単価です。送料は含まれていません。",
+        'chinese': "* 以上为批发单价，不含运费。",
+        'english': "* Wholesale unit prices, shipping not included.",
+    },
+}
+
+
+class Quote:
+    """견적 계산 결과"""
+    __slots__ = ('quantity', 'records', 'unit_prices', 'over_limit', 'max_quantity')
+
+    def __init__(self, quantity: int, records: List[PriceRecord], unit_prices: List[Optional[float]],
+                 over_limit: bool, max_quantity: int):
+        self.quantity = quantity
+        self.records = records
+        self.unit_prices = unit_prices
+        self.over_limit = over_limit
+        self.max_quantity = max_quantity
+
+
+def extract_quantity(text: str) -> Optional[int]:
+    """메시지에서 주문 수량 추출 (단위가 붙은 숫자 우선, 용량/바코드 숫자는 제외)"""
+    fallback = None
+    for match in NUMBER_PATTERN.finditer(text):
+        if match.group('size'):
+            continue
+        digits = match.group(1).replace(',', '')
+        if len(digits) > MAX_QUANTITY_DIGITS:
+            continue
+        quantity = int(digits)
+        if quantity <= 0:
+            continue
+        if match.group('unit'):
+            return quantity
+        if fallback is None:
+            fallback = quantity
+    return fallback
+
+
+def expand_tokens(tokens: Iterable[str]) -> Set[str]:
+    """검색 토큰에 별칭/단수형을 추가"""
+    expanded: Set[str] = set()
+    for token in tokens:
+        token = token.lower()
+        expanded.add(token)
+        expanded.update(TOKEN_ALIASES.get(token, ()))
+        if len(token) > 3 and token.endswith('s'):
+            expanded.add(token[:-1])
+    return expanded
+
+
+def match_price_records(catalog: PriceCatalog, tokens: Iterable[str]) -> List[int]:
+    """
+    토큰 IDF 가중치로 카탈로그 행을 점수화하여 최고 점수 행들을 반환.
+    흔한 토큰(soap 등)만 일치하면 제품을 특정할 수 없으므로 빈 리스트를 반환합니다.
+    """
+    total = len(catalog)
+    if not total:
+        return []
+
+    scores: Dict[int, float] = {}
+    has_specific = False
+    for token in expand_tokens(tokens):
+        rows = catalog.by_token.get(token)
+        if not rows:
+            continue
+        if len(rows) <= total * SPECIFIC_TOKEN_MAX_SHARE:
+            has_specific = True
+        weight = math.log(1 + total / len(rows))
+        for row in rows:
+            scores[row] = scores.get(row, 0.0) + weight
+
+    if not scores or not has_specific:
+        return []
+    best = max(scores.values())
+    return sorted(row for row, score in scores.items() if score >= best - 1e-9)
+
+
+def build_quote(catalog: PriceCatalog, quantity: int, tokens: Iterable[str]) -> Optional[Quote]:
+    """수량과 검색 토큰으로 견적 생성 (제품을 찾지 못하면 None)"""
+    rows = match_price_records(catalog, tokens)
+    if not rows:
+        return None
+
+    max_quantity = max((high for _, high in catalog.tier_bounds), default=0)
+    records = [catalog.records[row] for row in rows]
+    unit_prices = [catalog.unit_price(row, quantity) for row in rows]
+    return Quote(quantity, records, unit_prices, quantity > max_quantity, max_quantity)
+
+
+def _format_amount(value: float) -> str:
+    return f"{value:,.0f}" if float(value).is_integer() else f"{value:,.2f}"
+
+
+def format_quote(quote: Quote, language: str = 'english') -> str:
+    """견적을 사용자 언어의 텍스트로 변환"""
+    def text(key: str) -> str:
+        return QUOTE_TEXTS[key].get(language, QUOTE_TEXTS[key]['english'])
+
+    quantity = f"{quote.quantity:,}"
+    parts = [text('header').format(quantity=quantity)]
+
+    if quote.over_limit:
+        parts.append(text('over_limit').format(limit=f"{quote.max_quantity:,}"))
+    else:
+        shown = 0
+        for record, unit in zip(quote.records, quote.unit_prices):
+            if unit is None or shown >= MAX_QUOTE_LINES:
+                continue
+            tier = next((f"{low}-{high}" for low, high, _ in record.tiers if low <= quote.quantity <= high), '')
+            parts.append(text('line').format(
+                product=record.product, unit=_format_amount(unit), quantity=quantity,
+                total=_format_amount(unit * quote.quantity), tier=tier
+            ))
+            shown += 1
+        remaining = sum(1 for unit in quote.unit_prices if unit is not None) - shown
+        if remaining > 0:
+            parts.append(text('more').format(count=remaining))
+
+    parts.append(text('footer'))
+    return "\n".join(parts)
@@ -0,0 +1,217 @@
+# -*- coding: utf-8 -*-
+"""
+GPT 응답 캐시 (LRU + TTL).
+
+"where is your shop", "do you ship abroad" 처럼 자주 반복되는 일반 질문은
+같은 언어/같은 회사 정보 버전이라면 답변도 같으므로, OpenAI 호출 전에
+이 캐시에서 먼저 찾아봅니다.
+"""
+import hashlib
+import logging
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+from state_backend import StateBackend, generation_key
+
+logger = logging.getLogger(__name__)
+
+WHITESPACE_PATTERN = re.compile(r'\s+')
+# 끝에 붙는 물음표/느낌표/마침표/이모티콘성 기호는 같은 질문으로 취급
+TRAILING_PUNCTUATION = ' \t\n?!.,~…？！。、'
+
+CacheKey = Tuple[str, str, int]
+
+
+def normalize_message(message: str) -> str:
+    """대소문자/연속 공백/끝 문장부호 차이를 없앤 캐시용 메시지"""
+    return WHITESPACE_PATTERN.sub(' ', message.lower()).strip(TRAILING_PUNCTUATION)
+
+
+class ResponseCache:
+    """
+    (정규화된 메시지, 언어, 회사 정보 버전) → 응답 텍스트.
+
+    - max_entries 를 넘으면 가장 오래 사용하지 않은 항목부터 제거 (LRU)
+    - ttl_seconds 가 지난 항목은 조회 시 만료 처리
+    - invalidate() 는 버전을 올려 기존 항목을 모두 무효화
+    - put(version=...) 에 조회할 때의 버전을 넘기면, 답변을 만드는 사이 무효화되었을 때 저장하지 않음
+    """
+
+    def __init__(self, max_entries: int = 512, ttl_seconds: float = 3600.0):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.version = 0
+        self._entries: 'OrderedDict[CacheKey, Tuple[float, str]]' = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.stale_puts = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0 and self.ttl_seconds > 0
+
+    def make_key(self, message: str, language: str) -> CacheKey:
+        return normalize_message(message), language, self.version
+
+    def get(self, message: str, language: str) -> Optional[str]:
+        """캐시된 응답 (없거나 만료되었으면 None)"""
+        if not self.enabled:
+            return None
+        key = self.make_key(message, language)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            stored_at, response = entry
+            if time.monotonic() - stored_at > self.ttl_seconds:
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return response
+
+    def put(self, message: str, language: str, response: str, version: Optional[int] = None) -> None:
+        """응답 저장 (version: 조회 시점의 버전, 그 사이 invalidate() 되었으면 저장하지 않음)"""
+        if not self.enabled or not response:
+            return
+        key = self.make_key(message, language)
+        with self._lock:
+            if version is not None and version != self.version:
+                self.stale_puts += 1
+                return
+            self._entries[key] = (time.monotonic(), response)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self) -> int:
+        """회사 정보/제품 데이터가 바뀌었을 때 호출. 제거된 항목 수를 반환"""
+        with self._lock:
+            removed = len(self._entries)
+            self._entries.clear()
+            self.version += 1
+            return removed
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict[str, object]:
+        lookups = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+            "version": self.version,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "stale_puts": self.stale_puts,
+        }
+
+
+class SharedResponseCache:
+    """
+    여러 워커가 공유하는 응답 캐시 (SQLite/Redis StateBackend 사용).
+    만료는 저장소의 TTL 에 맡기고, invalidate() 는 공유 세대 번호를 올려 모든 워커의 기존 키를 무효화합니다.
+    hits/misses 는 이 워커에서 집계한 값입니다.
+    """
+
+    # 세대 번호를 저장소에서 다시 읽는 간격 (초)
+    VERSION_REFRESH_SECONDS = 1.0
+
+    def __init__(self, backend: StateBackend, ttl_seconds: float = 3600.0, max_entries: int = 512):
+        self.backend = backend
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._version_key = generation_key('response_cache')
+        self._version = 0
+        self._version_read_at = 0.0
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0 and self.ttl_seconds > 0
+
+    @property
+    def version(self) -> int:
+        now = time.monotonic()
+        if now - self._version_read_at > self.VERSION_REFRESH_SECONDS:
+            # 조회에 실패하면 마지막으로 읽은 세대 번호를 계속 사용하고 다음 주기에 다시 시도
+            self._version_read_at = now
+            try:
+                self._version = self.backend.get_int(self._version_key)
+            except Exception as e:
+                self.errors += 1
+                logger.warning(f"⚠️ 공유 응답 캐시 세대 번호 조회 실패: {e}")
+        return self._version
+
+    def make_key(self, message: str, language: str, version: Optional[int] = None) -> str:
+        digest = hashlib.sha1(normalize_message(message).encode('utf-8')).hexdigest()
+        return f"resp:{self.version if version is None else version}:{language}:{digest}"
+
+    def get(self, message: str, language: str) -> Optional[str]:
+        if not self.enabled:
+            return None
+        try:
+            value = self.backend.get(self.make_key(message, language))
+        except Exception as e:
+            self.errors += 1
+            logger.warning(f"⚠️ 공유 응답 캐시 조회 실패: {e}")
+            return None
+        if value is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return value.decode('utf-8')
+
+    def put(self, message: str, language: str, response: str, version: Optional[int] = None) -> None:
+        """
+        응답 저장. version(조회 시점의 세대 번호)을 넘기면 그 세대의 키에 저장하므로,
+        그 사이 다른 워커가 invalidate() 했다면 아무도 읽지 않는 키가 되어 TTL 로 사라집니다.
+        """
+        if not self.enabled or not response:
+            return
+        try:
+            self.backend.set(self.make_key(message, language, version), response, ttl=self.ttl_seconds)
+        except Exception as e:
+            self.errors += 1
+            logger.warning(f"⚠️ 공유 응답 캐시 저장 실패: {e}")
+
+    def invalidate(self) -> int:
+        """공유 세대 번호 증가 (제거된 항목 수는 알 수 없으므로 0 반환)"""
+        try:
+            self._version = self.backend.incr(self._version_key)
+        except Exception as e:
+            self.errors += 1
+            logger.warning(f"⚠️ 공유 응답 캐시 무효화 실패: {e}")
+            return 0
+        self._version_read_at = time.monotonic()
+        return 0
+
+    def stats(self) -> Dict[str, object]:
+        lookups = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "backend": self.backend.name,
+            "ttl_seconds": self.ttl_seconds,
+            "version": self._version,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            "errors": self.errors,
+        }
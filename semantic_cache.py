@@ -0,0 +1,256 @@
+# -*- coding: utf-8 -*-
+"""
+유사 질문 캐시 (문자 n-gram TF-IDF + 코사인 유사도, NumPy).
+
+정확히 같은 문장만 찾는 ResponseCache 는 "where is you shop", "ร้านอยู่ที่ไหนคะ" /
+"ร้านอยู่ไหนคะ" 같은 오타/어미 차이를 놓칩니다. 이 캐시는 질문을 문자 2~3-gram 으로
+나누어 해시 공간의 벡터로 만들고, 같은 언어의 최근 질문 중 가장 비슷한 질문이
+언어별 임계값 이상이면 그 답변을 재사용합니다. 외부 서비스 호출 없이 동작합니다.
+"""
+import difflib
+import re
+import threading
+import time
+import zlib
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from response_cache import normalize_message
+
+DIGIT_PATTERN = re.compile(r'\d+')
+# 띄어쓰기로 단어를 나누는 문자(라틴/한글) 단어
+SPACED_WORD_PATTERN = re.compile(r"[a-zA-Z\u00c0-\u024f\u1e00-\u1effA-Z']+|[\uac00-\ud7af]+")
+
+# 오타로 볼 수 있는 단어 간 최소 문자 유사도 (difflib ratio)
+TYPO_WORD_RATIO = 0.75
+
+# 해시 공간 크기 (언어당 max_entries × FEATURE_DIM float32 메모리 사용)
+FEATURE_DIM = 1 << 12
+NGRAM_RANGE = (2, 3)
+
+# 언어별 코사인 유사도 임계값 (benchmarks/eval_semantic_cache.py 로 조정)
+# 영어/한국어는 words_compatible() 로 핵심 단어가 바뀐 질문을 한 번 더 거르므로 낮게,
+# 단어 비교를 할 수 없는 태국어/일본어/중국어는 유사도만으로 판단하므로 높게 둡니다.
+DEFAULT_THRESHOLDS = {
+    'english': 0.70,
+    'korean': 0.65,
+    'thai': 0.80,
+    'japanese': 0.80,
+    'chinese': 0.80,
+}
+FALLBACK_THRESHOLD = 0.85
+
+
+def char_ngrams(text: str) -> List[str]:
+    """정규화된 메시지의 문자 n-gram (단어 경계를 살리기 위해 앞뒤에 공백을 붙임)"""
+    padded = f" {normalize_message(text)} "
+    grams: List[str] = []
+    for n in range(NGRAM_RANGE[0], NGRAM_RANGE[1] + 1):
+        grams.extend(padded[i:i + n] for i in range(len(padded) - n + 1))
+    return grams
+
+
+def _word_covered(word: str, other_words: List[str], other_compact: str) -> bool:
+    """word 가 상대 문장의 어떤 단어와 오타 수준으로 같거나, 띄어쓰기만 다른지"""
+    if word in other_compact:
+        return True
+    return any(difflib.SequenceMatcher(None, word, other).ratio() >= TYPO_WORD_RATIO for other in other_words)
+
+
+def _is_key_word(word: str) -> bool:
+    return len(word) >= (2 if '\uac00' <= word[0] <= '\ud7af' else 4)
+
+
+def words_compatible(first: str, second: str) -> bool:
+    """
+    띄어쓰기가 있는 언어(영어/한국어 등)에서 두 질문의 단어가 오타/띄어쓰기 차이 이상으로
+    다르지 않은지 확인. 'dry skin' / 'oily skin', '매장' / '공장' 처럼 문자 n-gram 은 많이
+    겹치지만 핵심 단어가 바뀐 질문을 걸러냅니다. (영어는 4자 이상, 한글은 2자 이상 단어만 비교)
+    """
+    first_words = SPACED_WORD_PATTERN.findall(normalize_message(first))
+    second_words = SPACED_WORD_PATTERN.findall(normalize_message(second))
+    first_compact = normalize_message(first).replace(' ', '')
+    second_compact = normalize_message(second).replace(' ', '')
+    return (all(_word_covered(w, second_words, second_compact) for w in first_words if _is_key_word(w)) and
+            all(_word_covered(w, first_words, first_compact) for w in second_words if _is_key_word(w)))
+
+
+def hashed_term_vector(text: str) -> np.ndarray:
+    """n-gram 을 crc32 로 FEATURE_DIM 칸에 해시한 로그 TF 벡터"""
+    vector = np.zeros(FEATURE_DIM, dtype=np.float32)
+    grams = char_ngrams(text)
+    if grams:
+        slots = np.fromiter((zlib.crc32(gram.encode('utf-8')) % FEATURE_DIM for gram in grams),
+                            dtype=np.int64, count=len(grams))
+        np.add.at(vector, slots, 1.0)
+        np.log1p(vector, out=vector)
+    return vector
+
+
+class SemanticMatch:
+    """유사 질문 캐시 조회 결과"""
+    __slots__ = ('response', 'similarity', 'question', 'source_id')
+
+    def __init__(self, response: str, similarity: float, question: str, source_id: int):
+        self.response = response
+        self.similarity = similarity
+        self.question = question
+        self.source_id = source_id
+
+
+class _LanguageBucket:
+    """한 언어의 캐시 항목 (원형 버퍼 행렬 + 문서 빈도)"""
+
+    def __init__(self, capacity: int):
+        self.tf = np.zeros((capacity, FEATURE_DIM), dtype=np.float32)
+        self.doc_freq = np.zeros(FEATURE_DIM, dtype=np.float32)
+        self.questions: List[Optional[str]] = [None] * capacity
+        self.responses: List[Optional[str]] = [None] * capacity
+        self.digits: List[Tuple[str, ...]] = [()] * capacity
+        self.stored_at = np.zeros(capacity, dtype=np.float64)
+        self.source_ids = np.full(capacity, -1, dtype=np.int64)
+        self.count = 0
+        self.next_slot = 0
+        self._weighted: Optional[np.ndarray] = None
+        self._idf: Optional[np.ndarray] = None
+
+    def add(self, vector: np.ndarray, question: str, response: str, digits: Tuple[str, ...], source_id: int) -> None:
+        slot = self.next_slot
+        if self.questions[slot] is not None:
+            self.doc_freq -= self.tf[slot] > 0
+        else:
+            self.count += 1
+        self.tf[slot] = vector
+        self.doc_freq += vector > 0
+        self.questions[slot] = question
+        self.responses[slot] = response
+        self.digits[slot] = digits
+        self.stored_at[slot] = time.monotonic()
+        self.source_ids[slot] = source_id
+        self.next_slot = (slot + 1) % len(self.questions)
+        self._weighted = None
+
+    def weighted(self) -> Tuple[np.ndarray, np.ndarray]:
+        """IDF 가중 + L2 정규화된 항목 행렬 (항목이 바뀔 때만 다시 계산)"""
+        if self._weighted is None:
+            self._idf = (np.log((1.0 + self.count) / (1.0 + self.doc_freq)) + 1.0).astype(np.float32)
+            matrix = self.tf * self._idf
+            norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+            norms[norms == 0] = 1.0
+            self._weighted = matrix / norms
+        return self._weighted, self._idf
+
+
+class SemanticCache:
+    """
+    언어별 유사 질문 캐시.
+
+    - lookup(): 같은 언어의 항목 중 코사인 유사도가 가장 높은 항목이 임계값 이상이고,
+      질문에 들어있는 숫자(수량, 날짜 등)가 같고 핵심 단어가 바뀌지 않았을 때만 적중
+    - 언어당 max_entries 개를 넘으면 가장 오래된 항목부터 덮어씀, ttl_seconds 지난 항목은 무시
+    - invalidate() 마다 version 이 올라가며, add(version=...) 에 조회할 때의 버전을 넘기면
+      답변을 만드는 사이 무효화되었을 때 저장하지 않음
+    """
+
+    def __init__(self, max_entries: int = 256, ttl_seconds: float = 3600.0,
+                 thresholds: Optional[Dict[str, float]] = None):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.thresholds = dict(DEFAULT_THRESHOLDS)
+        self.thresholds.update(thresholds or {})
+        self._buckets: Dict[str, _LanguageBucket] = {}
+        self._lock = threading.Lock()
+        self._next_source_id = 0
+        self.version = 0
+        self.hits = 0
+        self.misses = 0
+        self.stale_adds = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0 and self.ttl_seconds > 0
+
+    def threshold(self, language: str) -> float:
+        return self.thresholds.get(language, FALLBACK_THRESHOLD)
+
+    def best_match(self, message: str, language: str) -> Optional[SemanticMatch]:
+        """임계값과 관계없이 가장 비슷한 유효 항목 (평가/디버깅용)"""
+        if not self.enabled:
+            return None
+        bucket = self._buckets.get(language)
+        if bucket is None or not bucket.count:
+            return None
+
+        query = hashed_term_vector(message)
+        matrix, idf = bucket.weighted()
+        query *= idf
+        norm = float(np.linalg.norm(query))
+        if not norm:
+            return None
+        similarities = matrix @ (query / norm)
+
+        now = time.monotonic()
+        expired = (bucket.source_ids < 0) | (now - bucket.stored_at > self.ttl_seconds)
+        similarities[expired] = -1.0
+        digits = tuple(DIGIT_PATTERN.findall(message))
+        for slot in np.argsort(-similarities)[:5]:
+            if similarities[slot] < 0:
+                break
+            # 숫자가 다르거나("100개" vs "500개") 핵심 단어가 바뀐 질문은 답도 다르므로 건너뜀
+            if bucket.digits[slot] != digits or not words_compatible(message, bucket.questions[slot]):
+                continue
+            return SemanticMatch(bucket.responses[slot], float(similarities[slot]),
+                                 bucket.questions[slot], int(bucket.source_ids[slot]))
+        return None
+
+    def lookup(self, message: str, language: str) -> Optional[SemanticMatch]:
+        """임계값 이상인 유사 질문의 답변 (없으면 None)"""
+        if not self.enabled:
+            return None
+        with self._lock:
+            match = self.best_match(message, language)
+            if match is not None and match.similarity >= self.threshold(language):
+                self.hits += 1
+                return match
+            self.misses += 1
+            return None
+
+    def add(self, message: str, language: str, response: str, version: Optional[int] = None) -> int:
+        """질문/답변 저장. 저장된 항목의 source id 를 반환 (비활성화 상태이거나 버전이 지났으면 -1)"""
+        if not self.enabled or not response:
+            return -1
+        vector = hashed_term_vector(message)
+        with self._lock:
+            if version is not None and version != self.version:
+                self.stale_adds += 1
+                return -1
+            bucket = self._buckets.get(language)
+            if bucket is None:
+                bucket = self._buckets[language] = _LanguageBucket(self.max_entries)
+            source_id = self._next_source_id
+            self._next_source_id += 1
+            bucket.add(vector, message, response, tuple(DIGIT_PATTERN.findall(message)), source_id)
+            return source_id
+
+    def invalidate(self) -> int:
+        """모든 항목 제거. 제거된 항목 수를 반환"""
+        with self._lock:
+            removed = sum(bucket.count for bucket in self._buckets.values())
+            self._buckets.clear()
+            self.version += 1
+            return removed
+
+    def stats(self) -> Dict[str, object]:
+        lookups = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "entries": {language: bucket.count for language, bucket in self._buckets.items()},
+            "max_entries_per_language": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            "version": self.version,
+            "stale_adds": self.stale_adds,
+        }
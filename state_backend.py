@@ -0,0 +1,320 @@
+# -*- coding: utf-8 -*-
+"""
+여러 gunicorn 워커가 공유하는 상태 저장소.
+
+대화 컨텍스트, GPT 응답 캐시, 데이터 다시 읽기 세대(generation) 번호처럼
+워커 간에 같아야 하는 값만 이 저장소에 둡니다. (제품/회사 정보 파일 내용은
+각 워커가 직접 읽고, 세대 번호가 바뀌면 다시 읽습니다.)
+
+STATE_BACKEND 설정값:
+- memory (기본값): 프로세스 내부 dict. 워커 1개일 때만 일관성 보장
+- sqlite:///경로/state.db : 같은 서버의 워커들이 공유 (WAL 모드)
+- redis://호스트:포트/DB번호 : 여러 서버가 공유 (RESP 프로토콜, 별도 패키지 불필요)
+"""
+import os
+import socket
+import sqlite3
+import threading
+import time
+from typing import Dict, Optional, Union
+from urllib.parse import unquote, urlparse
+
+Value = Union[bytes, str]
+
+
+def _to_bytes(value: Value) -> bytes:
+    return value if isinstance(value, bytes) else str(value).encode('utf-8')
+
+
+class StateBackend:
+    """키-값 저장소 공통 인터페이스 (값은 bytes, ttl 은 초)"""
+    name = 'base'
+    shared = False
+
+    def get(self, key: str) -> Optional[bytes]:
+        raise NotImplementedError
+
+    def set(self, key: str, value: Value, ttl: Optional[float] = None) -> None:
+        raise NotImplementedError
+
+    def delete(self, key: str) -> None:
+        raise NotImplementedError
+
+    def incr(self, key: str) -> int:
+        """정수 값을 1 증가시키고 증가된 값을 반환 (없으면 0 에서 시작)"""
+        raise NotImplementedError
+
+    def get_int(self, key: str, default: int = 0) -> int:
+        value = self.get(key)
+        return int(value) if value is not None else default
+
+    def close(self) -> None:
+        pass
+
+    def stats(self) -> Dict[str, object]:
+        return {"backend": self.name, "shared": self.shared}
+
+
+class MemoryBackend(StateBackend):
+    """프로세스 내부 dict (기본값)"""
+    name = 'memory'
+
+    def __init__(self):
+        self._data: Dict[str, tuple] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at is not None and time.time() > expires_at:
+                del self._data[key]
+                return None
+            return value
+
+    def set(self, key: str, value: Value, ttl: Optional[float] = None) -> None:
+        with self._lock:
+            self._data[key] = (_to_bytes(value), time.time() + ttl if ttl else None)
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def incr(self, key: str) -> int:
+        with self._lock:
+            value, expires_at = self._data.get(key, (b'0', None))
+            number = int(value) + 1
+            self._data[key] = (str(number).encode(), expires_at)
+            return number
+
+    def stats(self) -> Dict[str, object]:
+        return {"backend": self.name, "shared": self.shared, "keys": len(self._data)}
+
+
+class SQLiteBackend(StateBackend):
+    """
+    SQLite 파일 하나를 같은 서버의 모든 워커가 공유.
+    스레드마다 연결을 따로 열고, WAL 모드로 읽기와 쓰기가 서로 막지 않도록 합니다.
+    """
+    name = 'sqlite'
+    shared = True
+
+    # 만료된 행 정리 주기 (set 호출 횟수 기준)
+    PURGE_EVERY = 500
+
+    def __init__(self, path: str):
+        self.path = path
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self._local = threading.local()
+        self._writes = 0
+        with self._connection() as connection:
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS kv (key TEXT PRIMARY KEY, value BLOB NOT NULL, expires_at REAL)"
+            )
+            connection.execute("CREATE INDEX IF NOT EXISTS kv_expires ON kv (expires_at)")
+
+    def _connection(self) -> sqlite3.Connection:
+        connection = getattr(self._local, 'connection', None)
+        # fork 이전에 열린 연결은 자식 프로세스에서 쓰지 않음
+        if connection is None or self._local.pid != os.getpid():
+            connection = sqlite3.connect(self.path, timeout=5.0, isolation_level=None, check_same_thread=False)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+            self._local.pid = os.getpid()
+        return connection
+
+    def get(self, key: str) -> Optional[bytes]:
+        row = self._connection().execute(
+            "SELECT value FROM kv WHERE key = ? AND (expires_at IS NULL OR expires_at > ?)", (key, time.time())
+        ).fetchone()
+        return bytes(row[0]) if row else None
+
+    def set(self, key: str, value: Value, ttl: Optional[float] = None) -> None:
+        connection = self._connection()
+        connection.execute(
+            "INSERT INTO kv (key, value, expires_at) VALUES (?, ?, ?) "
+            "ON CONFLICT(key) DO UPDATE SET value = excluded.value, expires_at = excluded.expires_at",
+            (key, _to_bytes(value), time.time() + ttl if ttl else None)
+        )
+        self._writes += 1
+        if self._writes % self.PURGE_EVERY == 0:
+            connection.execute("DELETE FROM kv WHERE expires_at IS NOT NULL AND expires_at <= ?", (time.time(),))
+
+    def delete(self, key: str) -> None:
+        self._connection().execute("DELETE FROM kv WHERE key = ?", (key,))
+
+    def incr(self, key: str) -> int:
+        connection = self._connection()
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            row = connection.execute("SELECT value FROM kv WHERE key = ?", (key,)).fetchone()
+            number = int(row[0]) + 1 if row else 1
+            connection.execute(
+                "INSERT INTO kv (key, value, expires_at) VALUES (?, ?, NULL) "
+                "ON CONFLICT(key) DO UPDATE SET value = excluded.value",
+                (key, str(number).encode())
+            )
+            connection.execute("COMMIT")
+            return number
+        except Exception:
+            connection.execute("ROLLBACK")
+            raise
+
+    def close(self) -> None:
+        connection = getattr(self._local, 'connection', None)
+        if connection is not None:
+            connection.close()
+            self._local.connection = None
+
+    def stats(self) -> Dict[str, object]:
+        try:
+            count = self._connection().execute("SELECT COUNT(*) FROM kv").fetchone()[0]
+        except sqlite3.Error:
+            count = None
+        return {"backend": self.name, "shared": self.shared, "path": self.path, "keys": count}
+
+
+class RedisError(Exception):
+    pass
+
+
+class RedisBackend(StateBackend):
+    """
+    Redis(RESP2 프로토콜) 저장소. redis 패키지 없이 GET/SET/DEL/INCR 만 직접 구현하며,
+    스레드마다 연결 하나를 재사용합니다. 연결이 끊기면 한 번 다시 연결해 재시도합니다.
+    """
+    name = 'redis'
+    shared = True
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 6379, db: int = 0,
+                 password: Optional[str] = None, timeout: float = 2.0):
+        self.host = host
+        self.port = port
+        self.db = db
+        self.password = password
+        self.timeout = timeout
+        self._local = threading.local()
+
+    # --- RESP 프로토콜 ---
+    @staticmethod
+    def _encode(*parts: Value) -> bytes:
+        chunks = [b'*%d\r\n' % len(parts)]
+        for part in parts:
+            data = _to_bytes(part)
+            chunks.append(b'$%d\r\n%s\r\n' % (len(data), data))
+        return b''.join(chunks)
+
+    def _read_reply(self, reader):
+        line = reader.readline()
+        if not line:
+            raise ConnectionError("Redis connection closed")
+        prefix, payload = line[:1], line[1:-2]
+        if prefix == b'+':
+            return payload
+        if prefix == b'-':
+            raise RedisError(payload.decode('utf-8', 'replace'))
+        if prefix == b':':
+            return int(payload)
+        if prefix == b'$':
+            length = int(payload)
+            if length < 0:
+                return None
+            data = reader.read(length + 2)
+            return data[:-2]
+        if prefix == b'*':
+            length = int(payload)
+            return None if length < 0 else [self._read_reply(reader) for _ in range(length)]
+        raise RedisError(f"Unknown RESP reply: {line!r}")
+
+    def _connect(self):
+        sock = socket.create_connection((self.host, self.port), timeout=self.timeout)
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        reader = sock.makefile('rb')
+        self._local.connection = (sock, reader)
+        self._local.pid = os.getpid()
+        if self.password:
+            self._call_on(sock, reader, 'AUTH', self.password)
+        if self.db:
+            self._call_on(sock, reader, 'SELECT', str(self.db))
+        return sock, reader
+
+    def _call_on(self, sock, reader, *parts: Value):
+        sock.sendall(self._encode(*parts))
+        return self._read_reply(reader)
+
+    def _drop_connection(self) -> None:
+        connection = getattr(self._local, 'connection', None)
+        self._local.connection = None
+        if connection is not None:
+            try:
+                connection[1].close()
+                connection[0].close()
+            except OSError:
+                pass
+
+    def execute(self, *parts: Value):
+        """명령 실행. 연결 오류면 새 연결로 한 번 재시도"""
+        for attempt in range(2):
+            connection = getattr(self._local, 'connection', None)
+            if connection is not None and self._local.pid != os.getpid():
+                connection = None
+            try:
+                sock, reader = connection or self._connect()
+                return self._call_on(sock, reader, *parts)
+            except (ConnectionError, OSError):
+                self._drop_connection()
+                if attempt:
+                    raise
+
+    # --- StateBackend ---
+    def get(self, key: str) -> Optional[bytes]:
+        return self.execute('GET', key)
+
+    def set(self, key: str, value: Value, ttl: Optional[float] = None) -> None:
+        if ttl:
+            self.execute('SET', key, value, 'PX', str(int(ttl * 1000)))
+        else:
+            self.execute('SET', key, value)
+
+    def delete(self, key: str) -> None:
+        self.execute('DEL', key)
+
+    def incr(self, key: str) -> int:
+        return self.execute('INCR', key)
+
+    def ping(self) -> bool:
+        return self.execute('PING') == b'PONG'
+
+    def close(self) -> None:
+        self._drop_connection()
+
+    def stats(self) -> Dict[str, object]:
+        return {"backend": self.name, "shared": self.shared, "address": f"{self.host}:{self.port}/{self.db}"}
+
+
+def create_backend(url: Optional[str]) -> StateBackend:
+    """STATE_BACKEND 값으로 저장소 생성 (memory / sqlite:///path / redis://host:port/db)"""
+    if not url or url == 'memory':
+        return MemoryBackend()
+    parsed = urlparse(url)
+    if parsed.scheme == 'sqlite':
+        # sqlite:///상대/경로.db, sqlite:////절대/경로.db
+        return SQLiteBackend(url[len('sqlite:///'):] or 'state.db')
+    if parsed.scheme == 'redis':
+        db_path = parsed.path.strip('/')
+        return RedisBackend(
+            host=parsed.hostname or '127.0.0.1',
+            port=parsed.port or 6379,
+            db=int(db_path) if db_path else 0,
+            password=unquote(parsed.password) if parsed.password else None,
+        )
+    raise ValueError(f"지원하지 않는 STATE_BACKEND 입니다: {url}")
+
+
+def generation_key(name: str) -> str:
+    return f"gen:{name}"
+
@@ -0,0 +1,229 @@
+# -*- coding: utf-8 -*-
+"""
+OpenAI 토큰 사용량 집계와 비용 보고서.
+
+- record(model, route, language, usage): 호출 한 번의 prompt / completion / cached 토큰을
+  (모델, 응답 경로, 언어) 별로 메모리에 더합니다. (요청 스레드에서는 dict 갱신만)
+  스트림을 일찍 닫아 usage 를 받지 못한 호출은 estimated=True 로 추정치를 기록하고 따로 셉니다.
+- 기록 스레드가 flush_interval 초마다 그 사이 늘어난 양(delta)만 날짜별
+  usage_YYYY_MM_DD.jsonl 파일에 한 줄씩 덧붙입니다. gunicorn 워커가 여러 개여도 각자
+  덧붙이기만 하므로 파일을 합치면 전체 사용량이 됩니다.
+- report(days): 최근 days 일 파일 + 아직 쓰지 않은 이 프로세스의 사용량을 합쳐
+  경로별 / 언어별 / 모델별 토큰과 비용(USD)을 돌려줍니다.
+
+가격은 100만 토큰당 USD (input, cached input, output). cached 토큰은 prompt 토큰에 포함되어
+있으므로 (prompt - cached) 는 input 가격, cached 는 cached input 가격으로 계산합니다.
+"""
+import json
+import logging
+import os
+import threading
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# 100만 토큰당 USD: (input, cached input, output)
+DEFAULT_PRICES: Dict[str, Tuple[float, float, float]] = {
+    "gpt-4o": (2.50, 1.25, 10.00),
+    "gpt-4o-mini": (0.15, 0.075, 0.60),
+}
+
+TOKEN_FIELDS = ('prompt_tokens', 'completion_tokens', 'cached_tokens')
+
+# (모델, 경로, 언어)
+UsageKey = Tuple[str, str, str]
+
+
+def _empty() -> Dict[str, int]:
+    return {"calls": 0, "prompt_tokens": 0, "completion_tokens": 0, "cached_tokens": 0}
+
+
+def _add(target: Dict[str, int], source: Dict[str, Any]) -> None:
+    for field in ('calls',) + TOKEN_FIELDS:
+        target[field] += int(source.get(field) or 0)
+
+
+class UsageTracker:
+    """
+    토큰 사용량 집계기.
+
+    - 기록 스레드는 첫 record() 때 시작 (gunicorn fork 이후 프로세스에서 생성되도록)
+    - close() 는 남은 사용량을 파일에 쓰고 스레드를 종료 (atexit 에 등록해서 사용)
+    - 가격이 없는 모델은 토큰만 집계하고 비용은 0 으로 보고 (unpriced_models 에 표시)
+    """
+
+    def __init__(self, directory: str, prefix: str = "usage", flush_interval: float = 60.0,
+                 prices: Optional[Dict[str, Tuple[float, float, float]]] = None):
+        self.directory = directory
+        self.prefix = prefix
+        self.flush_interval = flush_interval
+        self.prices = dict(DEFAULT_PRICES if prices is None else prices)
+        self._lock = threading.Lock()
+        self._pending: Dict[UsageKey, Dict[str, int]] = {}
+        self._totals: Dict[UsageKey, Dict[str, int]] = {}
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._closed = False
+        self.recorded = 0
+        self.estimated = 0
+        self.missing_usage = 0
+        self.flushes = 0
+        self.errors = 0
+        self.last_flush: Optional[str] = None
+
+    # --- 요청 스레드 ---
+    def record(self, model: Optional[str], route: str, language: Optional[str],
+               usage: Optional[Dict[str, int]], estimated: bool = False) -> None:
+        """
+        호출 한 번의 사용량 추가 (usage: usage_to_dict 결과, None 이면 건수만 따로 셈).
+        estimated: usage 가 실제 값이 아닌 추정치 (stats 의 estimated 에 건수 표시)
+        """
+        if usage is None:
+            self.missing_usage += 1
+            return
+        if estimated:
+            self.estimated += 1
+        key = (model or "unknown", route or "unknown", language or "unknown")
+        entry = dict(usage, calls=1)
+        with self._lock:
+            _add(self._pending.setdefault(key, _empty()), entry)
+            _add(self._totals.setdefault(key, _empty()), entry)
+            self.recorded += 1
+        if not self._closed:
+            self._ensure_started()
+
+    def _ensure_started(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._start_lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="usage-tracker", daemon=True)
+                self._thread.start()
+
+    def close(self, timeout: float = 5.0) -> None:
+        """남은 사용량을 파일에 쓰고 기록 스레드 종료"""
+        if self._closed:
+            return
+        self._closed = True
+        self._stop.set()
+        if self._thread is not None and self._thread.is_alive():
+            self._thread.join(timeout)
+        self.flush()
+
+    # --- 기록 스레드 ---
+    def _run(self) -> None:
+        while not self._stop.wait(self.flush_interval):
+            self.flush()
+
+    def _path_for(self, day: date) -> str:
+        return os.path.join(self.directory, f"{self.prefix}_{day.strftime('%Y_%m_%d')}.jsonl")
+
+    def flush(self) -> int:
+        """쌓인 사용량을 오늘 파일에 덧붙임. 쓴 줄 수 반환 (실패하면 다음 flush 때 다시 시도)"""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        if not pending:
+            return 0
+        now = datetime.now()
+        lines = [json.dumps({"ts": now.isoformat(timespec='seconds'), "model": model, "route": route,
+                             "language": language, **entry}, ensure_ascii=False)
+                 for (model, route, language), entry in sorted(pending.items())]
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            with open(self._path_for(now.date()), 'a', encoding='utf-8') as f:
+                f.write('\n'.join(lines) + '\n')
+        except Exception as e:
+            self.errors += 1
+            logger.error(f"❌ 토큰 사용량 {len(lines)}건 저장 실패 ({self.directory}): {e}")
+            with self._lock:
+                for key, entry in pending.items():
+                    _add(self._pending.setdefault(key, _empty()), entry)
+            return 0
+        self.flushes += 1
+        self.last_flush = now.isoformat(timespec='seconds')
+        logger.info(f"🪙 토큰 사용량 {len(lines)}건을 '{self._path_for(now.date())}' 파일에 저장했습니다.")
+        return len(lines)
+
+    # --- 보고서 ---
+    def _read_days(self, days: int) -> Iterator[Dict[str, Any]]:
+        today = date.today()
+        for offset in range(days - 1, -1, -1):
+            path = self._path_for(today - timedelta(days=offset))
+            if not os.path.exists(path):
+                continue
+            with open(path, encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        yield json.loads(line)
+                    except ValueError:
+                        continue
+
+    def cost(self, model: str, entry: Dict[str, int]) -> float:
+        """사용량 entry 의 USD 비용 (가격이 없는 모델은 0)"""
+        price = self.prices.get(model)
+        if price is None:
+            return 0.0
+        input_price, cached_price, output_price = price
+        cached = entry["cached_tokens"]
+        return ((entry["prompt_tokens"] - cached) * input_price + cached * cached_price
+                + entry["completion_tokens"] * output_price) / 1_000_000
+
+    def report(self, days: int = 1) -> Dict[str, Any]:
+        """최근 days 일(오늘 포함)의 경로별 / 언어별 / 모델별 토큰과 비용 (비용이 큰 순)"""
+        days = max(1, days)
+        combined: Dict[UsageKey, Dict[str, int]] = {}
+        for row in self._read_days(days):
+            key = (row.get("model") or "unknown", row.get("route") or "unknown", row.get("language") or "unknown")
+            _add(combined.setdefault(key, _empty()), row)
+        with self._lock:
+            for key, entry in self._pending.items():
+                _add(combined.setdefault(key, _empty()), entry)
+
+        groups: Dict[str, Dict[str, Dict[str, Any]]] = {"by_route": {}, "by_language": {}, "by_model": {}}
+        total = dict(_empty(), cost_usd=0.0)
+        for (model, route, language), entry in combined.items():
+            cost = self.cost(model, entry)
+            for group, name in (("by_route", route), ("by_language", language), ("by_model", model)):
+                bucket = groups[group].setdefault(name, dict(_empty(), cost_usd=0.0))
+                _add(bucket, entry)
+                bucket["cost_usd"] += cost
+            _add(total, entry)
+            total["cost_usd"] += cost
+
+        def finish(bucket: Dict[str, Any]) -> Dict[str, Any]:
+            bucket["cost_usd"] = round(bucket["cost_usd"], 6)
+            calls = bucket["calls"]
+            bucket["avg_prompt_tokens"] = round(bucket["prompt_tokens"] / calls, 1) if calls else 0.0
+            bucket["avg_cost_usd"] = round(bucket["cost_usd"] / calls, 6) if calls else 0.0
+            return bucket
+
+        report: Dict[str, Any] = {"days": days, "total": finish(total)}
+        for group, buckets in groups.items():
+            report[group] = {name: finish(bucket) for name, bucket in
+                             sorted(buckets.items(), key=lambda item: -item[1]["cost_usd"])}
+        report["unpriced_models"] = sorted({model for model, _, _ in combined if model not in self.prices})
+        report["prices_per_million"] = {model: {"input": p[0], "cached_input": p[1], "output": p[2]}
+                                        for model, p in self.prices.items()}
+        return report
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            pending = len(self._pending)
+            totals: List[Tuple[UsageKey, Dict[str, int]]] = list(self._totals.items())
+        tokens = _empty()
+        for _, entry in totals:
+            _add(tokens, entry)
+        return {
+            "directory": self.directory,
+            "recorded": self.recorded,
+            "estimated": self.estimated,
+            "missing_usage": self.missing_usage,
+            "pending_keys": pending,
+            "flushes": self.flushes,
+            "errors": self.errors,
+            "last_flush": self.last_flush,
+            "process_tokens": tokens,
+            "process_cost_usd": round(sum(self.cost(key[0], entry) for key, entry in totals), 6),
+        }